@@ -0,0 +1,337 @@
+"""
+Admission control for model calls.
+Every upstream request needs a token from its user's bucket and from a
+global bucket sized to the shared API quota. A user over their own budget is
+turned away at once (callers serve a fallback); when only the global bucket
+is empty, requests wait in a weighted fair queue so one busy user cannot
+starve the others, and callers are told the expected wait.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+import streamlit as st
+from metrics import registry
+from single_flight import session_id
+from job_queue import current_job
+
+# Per-user budget: sustained requests per minute and burst size
+USER_REQUESTS_PER_MINUTE = float(os.getenv('MODEL_USER_RPM', '10'))
+USER_BURST = 5
+
+# Shared budget across all users, matching the API quota
+GLOBAL_REQUESTS_PER_MINUTE = float(os.getenv('MODEL_GLOBAL_RPM', '60'))
+GLOBAL_BURST = 10
+
+# Requests expected to wait longer than this are rejected instead of queued
+MAX_QUEUE_WAIT = 20.0
+
+# Token cost per request kind; vision calls are heavier than chat
+CHAT_REQUEST_COST = 1.0
+PHOTO_REQUEST_COST = 2.0
+
+# Window for quota utilisation, and queue delays kept for percentiles
+UTILISATION_WINDOW = 60.0
+DELAY_SAMPLES = 500
+
+# Seconds between sweeps dropping per-user state for users back at full budget
+IDLE_SWEEP_INTERVAL = 60.0
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over budget; eta is the suggested retry delay in seconds."""
+
+    def __init__(self, reason: str, eta: float):
+        super().__init__(f"Request rate limit reached ({reason}); retry in {eta:.0f}s")
+        self.reason = reason
+        self.eta = eta
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        # Callers may pass a timestamp taken just before the bucket was created
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def try_take(self, cost: float, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def refund(self, cost: float):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def time_until(self, cost: float, now: float) -> float:
+        """Seconds until cost tokens are available."""
+        self._refill(now)
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+class _Waiter:
+    def __init__(self, tag: float, seq: int, user_id: str, cost: float):
+        self.tag = tag
+        self.seq = seq
+        self.user_id = user_id
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.admitted = False
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+class Ticket:
+    """Outcome of an admission request: 'admitted', 'queued' or 'rejected'."""
+
+    def __init__(self, controller: 'AdmissionController', status: str, eta: float = 0.0,
+                 reason: Optional[str] = None, waiter: Optional[_Waiter] = None):
+        self._controller = controller
+        self.status = status
+        self.eta = eta
+        self.reason = reason
+        self._waiter = waiter
+
+    @property
+    def admitted(self) -> bool:
+        return self.status == 'admitted'
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block a queued request until admitted; returns False if it timed out."""
+        if self.status == 'queued':
+            if timeout is None:
+                timeout = self._controller.max_wait * 1.5
+            self.status = 'admitted' if self._controller._wait(self._waiter, timeout) else 'rejected'
+            if self.status == 'rejected':
+                self.reason = 'timeout'
+        return self.admitted
+
+class AdmissionController:
+    def __init__(self, user_rate: float = USER_REQUESTS_PER_MINUTE / 60, user_burst: float = USER_BURST,
+                 global_rate: float = GLOBAL_REQUESTS_PER_MINUTE / 60, global_burst: float = GLOBAL_BURST,
+                 max_wait: float = MAX_QUEUE_WAIT):
+        """
+        Initialize the controller.
+
+        Args:
+            user_rate: Tokens per second for each user
+            user_burst: Per-user bucket capacity
+            global_rate: Tokens per second shared by everyone
+            global_burst: Global bucket capacity
+            max_wait: Longest expected queue wait accepted
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_wait = max_wait
+        self._global = TokenBucket(global_rate, global_burst)
+        self._users: Dict[str, TokenBucket] = {}
+        self._weights: Dict[str, float] = {}
+        self._queue = []
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._next_sweep = time.monotonic() + IDLE_SWEEP_INTERVAL
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_user = 0
+        self.rejected_global = 0
+        self.timeouts = 0
+        self._consumed = deque()
+        self._delays = deque(maxlen=DELAY_SAMPLES)
+
+    def set_weight(self, user_id: str, weight: float):
+        """Give a user a larger (or smaller) share of the queue; default 1."""
+        with self._cond:
+            self._weights[user_id] = weight
+
+    def _record_admission(self, cost: float, now: float, delay: float = 0.0):
+        self.admitted += 1
+        self._consumed.append((now, cost))
+        self._delays.append(delay)
+
+    def _evict_idle(self, now: float):
+        # A full bucket with nothing queued is the same as a fresh one, so drop it;
+        # with no waiter left, the user's last finish tag is at or behind virtual time
+        queued = {waiter.user_id for waiter in self._queue}
+        for user_id in [user_id for user_id, bucket in self._users.items() if user_id not in queued]:
+            bucket = self._users[user_id]
+            bucket._refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._users[user_id]
+                self._last_finish.pop(user_id, None)
+        self._next_sweep = now + IDLE_SWEEP_INTERVAL
+
+    def request(self, user_id: str, cost: float = 1.0) -> Ticket:
+        """
+        Ask to make one upstream call.
+
+        Args:
+            user_id: Quota owner
+            cost: Tokens the call consumes
+
+        Returns:
+            Ticket; a queued ticket must be waited on before calling upstream
+        """
+        now = time.monotonic()
+        with self._cond:
+            if now >= self._next_sweep:
+                self._evict_idle(now)
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            if not bucket.try_take(cost, now):
+                self.rejected_user += 1
+                return Ticket(self, 'rejected', bucket.time_until(cost, now), 'user_limit')
+
+            if not self._queue and self._global.try_take(cost, now):
+                self._record_admission(cost, now)
+                return Ticket(self, 'admitted')
+
+            # Global quota exhausted: order by weighted virtual finish time
+            start = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+            tag = start + cost / self._weights.get(user_id, 1.0)
+            ahead = sum(waiter.cost for waiter in self._queue if waiter.tag <= tag)
+            eta = max(0.0, ahead + cost - self._global.tokens) / self._global.rate
+
+            if eta > self.max_wait:
+                bucket.refund(cost)
+                self.rejected_global += 1
+                return Ticket(self, 'rejected', eta, 'global_limit')
+
+            self._last_finish[user_id] = tag
+            waiter = _Waiter(tag, next(self._seq), user_id, cost)
+            heapq.heappush(self._queue, waiter)
+            self.queued += 1
+            return Ticket(self, 'queued', eta, waiter=waiter)
+
+    def try_acquire(self, user_id: str, cost: float = 1.0) -> bool:
+        """Take tokens only if available right now, without queueing; e.g. for optional hedged duplicates."""
+        now = time.monotonic()
+        with self._cond:
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = self._users[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            if not bucket.try_take(cost, now):
+                return False
+            if self._queue or not self._global.try_take(cost, now):
+                bucket.refund(cost)
+                return False
+            self._record_admission(cost, now)
+            return True
+
+    def _wait(self, waiter: _Waiter, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not waiter.admitted:
+                now = time.monotonic()
+                if self._queue[0] is waiter:
+                    if self._global.try_take(waiter.cost, now):
+                        heapq.heappop(self._queue)
+                        waiter.admitted = True
+                        self._virtual_time = waiter.tag
+                        self._record_admission(waiter.cost, now, now - waiter.enqueued_at)
+                        self._cond.notify_all()
+                        break
+                    pause = self._global.time_until(waiter.cost, now)
+                else:
+                    # Woken when the head is admitted
+                    pause = self.max_wait
+
+                if now >= deadline:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                    self._users[waiter.user_id].refund(waiter.cost)
+                    self.timeouts += 1
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(min(pause, deadline - now))
+        return True
+
+    def stats(self) -> Dict:
+        """Quota utilisation and queueing metrics."""
+        now = time.monotonic()
+        with self._cond:
+            self._evict_idle(now)
+            while self._consumed and now - self._consumed[0][0] > UTILISATION_WINDOW:
+                self._consumed.popleft()
+            consumed = sum(cost for _, cost in self._consumed)
+            delays = sorted(self._delays)
+            return {
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'rejected_user_limit': self.rejected_user,
+                'rejected_global_limit': self.rejected_global,
+                'queue_timeouts': self.timeouts,
+                'queue_depth': len(self._queue),
+                'tracked_users': len(self._users),
+                'global_utilisation': consumed / (self._global.rate * UTILISATION_WINDOW),
+                'global_tokens_available': self._global.tokens,
+                'queue_delay_avg': sum(delays) / len(delays) if delays else 0.0,
+                'queue_delay_p95': delays[int(0.95 * (len(delays) - 1))] if delays else 0.0,
+                'queue_delay_max': delays[-1] if delays else 0.0
+            }
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide controller guarding the shared model quota."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
+
+registry.register_stats('admission', lambda: get_admission_controller().stats(),
+                        counters=('admitted', 'queued', 'rejected_user_limit', 'rejected_global_limit', 'queue_timeouts'),
+                        gauges=('queue_depth', 'tracked_users', 'global_utilisation', 'queue_delay_p95'))
+
+def quota_key() -> str:
+    """Quota owner for the current session: its user id, else the session id."""
+    return st.session_state.get('user_id') or session_id()
+
+def admit(cost: float = 1.0, user_id: Optional[str] = None):
+    """
+    Wait for admission for one upstream call, showing the ETA if queued.
+    Inside a background job the ETA becomes the job's progress note, and
+    user_id must be given since there is no session to read it from.
+
+    Raises:
+        AdmissionRejected: The user or the shared quota is over budget
+    """
+    ticket = get_admission_controller().request(user_id or quota_key(), cost)
+    if ticket.status == 'queued':
+        note = f"High demand right now, about {max(1, round(ticket.eta))}s wait..."
+        job = current_job()
+        if job is not None:
+            job.message = note
+        else:
+            st.toast(f"⏳ {note}")
+        ticket.wait()
+        if job is not None:
+            job.message = None
+    if not ticket.admitted:
+        raise AdmissionRejected(ticket.reason, ticket.eta)
+
+def admitted_call(fn: Callable, cost: float = 1.0, user_id: Optional[str] = None) -> Callable:
+    """Wrap an upstream call so it runs only once admitted."""
+    def call():
+        admit(cost, user_id)
+        return fn()
+    return call
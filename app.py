@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import json
+import time
 
 from therapy_bot import TherapyBot
 from emotion_tracker import EmotionTracker
@@ -12,8 +13,23 @@ from data_manager import DataManager
 from meditation_module import MeditationModule
 from quick_remedies import QuickRemedies
 from translations import get_text, LANGUAGES
+from emotion_taxonomy import emotion_name_to_scale, level_face, level_label
+from tracing import span, traced
+from single_flight import session_id
+from admission import quota_key
+from job_queue import JobQueueFull, get_job_queue, track_job, tracked_job, untrack_job, watch_job
+from metrics import registry, start_metrics_server
+from session_memory import get_session_activity
+from session_archive import archive_session, restore_session
+from profiler import profile_run, profiling_enabled, render_slow_runs
+from records import ChatMessage, EmotionEntry
+from chat_window import display_chat_window, reset_chat_window
 import random
 
+# Session job names for background work
+CHAT_REPLY_JOB = 'chat_reply'
+EXPORT_JOB = 'export'
+
 # Initialize session state
 if 'initialized' not in st.session_state:
     st.session_state.initialized = True
@@ -26,7 +42,7 @@ if 'initialized' not in st.session_state:
     st.session_state.breathing_exercises = BreathingExercises()
     st.session_state.camera_analysis = CameraAnalysis()
     st.session_state.meditation_module = MeditationModule()
-    st.session_state.daily_challenges = DailyChallenges()
+    st.session_state.daily_challenges = DailyChallenges(quota_key())
     st.session_state.data_manager = DataManager()
     st.session_state.quick_remedies = QuickRemedies()
 
@@ -36,7 +52,7 @@ def get_current_detected_emotion():
     if len(st.session_state.camera_analysis.emotion_data) > 0:
         latest_camera = st.session_state.camera_analysis.emotion_data[-1]
         # Convert camera emotion to 1-10 scale
-        camera_emotion = convert_camera_emotion_to_scale(latest_camera['primary_emotion'])
+        camera_emotion = emotion_name_to_scale(latest_camera['primary_emotion'])
         return camera_emotion
     
     # Check for recent chat-based emotion detection
@@ -45,33 +61,31 @@ def get_current_detected_emotion():
     
     return None
 
-def convert_camera_emotion_to_scale(emotion_name: str) -> int:
-    """Convert camera emotion name to 1-10 scale with enhanced mapping."""
-    emotion_mapping = {
-        'angry': 2,
-        'rage': 1,
-        'furious': 1,
-        'disgust': 2, 
-        'fear': 2,
-        'terror': 1,
-        'panic': 1,
-        'sad': 1,
-        'depressed': 1,
-        'devastated': 1,
-        'trauma': 1,
-        'shock': 2,
-        'surprise': 6,
-        'confused': 4,
-        'neutral': 5,
-        'calm': 6,
-        'content': 7,
-        'happy': 8,
-        'joy': 9,
-        'ecstatic': 10,
-        'peaceful': 7
-    }
-    return emotion_mapping.get(emotion_name.lower(), 5)
+def add_bot_reply(response: str, detected_emotion: int):
+    """Append the bot's reply to the chat and flag remedies for low emotions."""
+    bot_message = ChatMessage.now("assistant", response)
+    st.session_state.data_manager.append_message(st.session_state.chat_history, bot_message)
+    
+    # Auto-suggest remedies for low emotions (1-4)
+    if detected_emotion <= 4:
+        st.session_state.show_auto_remedies = True
+
+def finish_chat_reply(job):
+    """Pick up a finished background chat reply."""
+    # The user moved to another conversation meanwhile; the reply belongs to neither
+    if job.meta.get('session_id') != st.session_state.current_session_id:
+        return
+    response = job.result if job.status == 'done' else get_text("reply_failed", st.session_state.language)
+    add_bot_reply(response, job.meta['emotion'])
+
+def finish_export(job):
+    """Keep a finished export for the download button."""
+    if job.status == 'done':
+        st.session_state.export_data = job.result
+    else:
+        st.toast("⚠️ Export failed, please try again.")
 
+@traced('emotion.detect_text', lambda text: {'payload.chars': len(text)}, lambda level: {'emotion.level': level})
 def detect_emotion_from_text(text: str) -> int:
     """Enhanced text-based emotion detection including anger and trauma."""
     text_lower = text.lower()
@@ -498,11 +512,12 @@ def main():
                 'messages': st.session_state.chat_history.copy(),
                 'emotions': st.session_state.emotion_history.copy(),
                 'created_at': datetime.now().isoformat(),
-                'message_count': len([m for m in st.session_state.chat_history if m.get('role') == 'user'])
+                'message_count': st.session_state.data_manager.count_user_messages(st.session_state.chat_history)
             }
-            st.session_state.all_sessions.append(session_data)
+            st.session_state.all_sessions.append(archive_session(session_data))
         
-        # Start new session
+        # Start new session; a reply still pending belongs to the old one
+        untrack_job(CHAT_REPLY_JOB)
         st.session_state.chat_history = []
         st.session_state.emotion_history = []
         st.session_state.current_emotion = 5
@@ -511,6 +526,7 @@ def main():
         if hasattr(st.session_state, 'show_auto_remedies'):
             st.session_state.show_auto_remedies = False
         st.session_state.active_view = 'chat'
+        reset_chat_window()
         st.rerun()
     
     # Layout with collapsible left sidebar
@@ -542,7 +558,7 @@ def main():
             # Current session
             if st.session_state.chat_history:
                 st.markdown("### 💬 Current Session")
-                st.markdown(f"**{len([m for m in st.session_state.chat_history if m.get('role') == 'user'])} messages**")
+                st.markdown(f"**{st.session_state.data_manager.count_user_messages(st.session_state.chat_history)} messages**")
                 
                 # Show recent messages from current session
                 for i, message in enumerate(st.session_state.chat_history[-3:]):  # Show last 3
@@ -564,7 +580,7 @@ def main():
                     
                     with col1:
                         if st.button(f"Session {len(st.session_state.all_sessions) - i}: {session['message_count']} messages", 
-                                   key=f"load_session_{session['id']}", help=f"Created: {session_date}"):
+                                   key=f"load_session_{session['id']}", help=f"{session.get('title') or 'Session'} · Created: {session_date}"):
                             # Save current session first if it has content
                             if st.session_state.chat_history:
                                 current_session = {
@@ -572,16 +588,19 @@ def main():
                                     'messages': st.session_state.chat_history.copy(),
                                     'emotions': st.session_state.emotion_history.copy(),
                                     'created_at': datetime.now().isoformat(),
-                                    'message_count': len([m for m in st.session_state.chat_history if m.get('role') == 'user'])
+                                    'message_count': st.session_state.data_manager.count_user_messages(st.session_state.chat_history)
                                 }
                                 # Remove if already exists, then add updated version
                                 st.session_state.all_sessions = [s for s in st.session_state.all_sessions if s['id'] != current_session['id']]
-                                st.session_state.all_sessions.append(current_session)
+                                st.session_state.all_sessions.append(archive_session(current_session))
                             
-                            # Load selected session
+                            # Load selected session; archived sessions decompress here
+                            untrack_job(CHAT_REPLY_JOB)
+                            session = restore_session(session)
                             st.session_state.chat_history = session['messages'].copy()
                             st.session_state.emotion_history = session['emotions'].copy()
                             st.session_state.current_session_id = session['id']
+                            reset_chat_window()
                             st.rerun()
                     
                     with col2:
@@ -634,23 +653,10 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
             
-            # Display chat history
-            for message in st.session_state.chat_history:
-                if message["role"] == "user":
-                    st.markdown(f"""
-                    <div style="background: rgba(58, 134, 255, 0.1); border: 1px solid rgba(58, 134, 255, 0.3); border-radius: 15px; padding: 1rem; margin: 1rem 0; margin-left: 2rem;">
-                        <div style="color: #3A86FF; font-weight: bold; margin-bottom: 0.5rem;">👤 You</div>
-                        <div style="color: #FFFFFF;">{message["content"]}</div>
-                        {f'<small style="color: #CCCCCC;">Emotion: {message.get("emotion", 5)}/10</small>' if "emotion" in message else ''}
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div style="background: rgba(157, 78, 221, 0.1); border: 1px solid rgba(157, 78, 221, 0.3); border-radius: 15px; padding: 1rem; margin: 1rem 0; margin-right: 2rem;">
-                        <div style="color: #9D4EDD; font-weight: bold; margin-bottom: 0.5rem;">🤖 AI Therapist</div>
-                        <div style="color: #FFFFFF;">{message["content"]}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
+            # Display the newest messages; earlier ones load on demand
+            display_chat_window(st.session_state.chat_history, st.session_state.language)
+            
+            watch_job(CHAT_REPLY_JOB, finish_chat_reply, get_text("thinking", st.session_state.language))
             
             # Auto-remedies notification for low emotions
             if hasattr(st.session_state, 'show_auto_remedies') and st.session_state.show_auto_remedies:
@@ -679,53 +685,38 @@ def main():
                 
                 st.markdown("</div></div>", unsafe_allow_html=True)
             
-            # Chat input
-            if prompt := st.chat_input(get_text("chat_placeholder", st.session_state.language)):
+            # Chat input, paused while a reply is pending
+            if prompt := st.chat_input(get_text("chat_placeholder", st.session_state.language),
+                                       disabled=tracked_job(CHAT_REPLY_JOB) is not None):
                 # Detect emotion from user input
                 detected_emotion = detect_emotion_from_text(prompt)
                 st.session_state.last_chat_emotion = detected_emotion
                 st.session_state.current_emotion = detected_emotion
                 
                 # Add emotion to history
-                emotion_entry = {
-                    "emotion": detected_emotion,
-                    "timestamp": datetime.now().isoformat()
-                }
-                st.session_state.emotion_history.append(emotion_entry)
+                emotion_entry = EmotionEntry.now(detected_emotion)
+                st.session_state.data_manager.append_emotion(st.session_state.emotion_history, emotion_entry)
                 
                 # Initialize session ID if not exists
                 if not st.session_state.current_session_id:
                     st.session_state.current_session_id = str(datetime.now().timestamp())
                 
                 # Add user message
-                user_message = {
-                    "role": "user",
-                    "content": prompt,
-                    "timestamp": datetime.now().isoformat(),
-                    "emotion": detected_emotion
-                }
-                st.session_state.chat_history.append(user_message)
-                
-                # Get bot response
-                with st.spinner(get_text("thinking", st.session_state.language)):
-                    response = st.session_state.therapy_bot.get_response(
-                        prompt, 
-                        st.session_state.language,
-                        detected_emotion,
-                        st.session_state.chat_history[-5:]  # Last 5 messages for context
-                    )
+                user_message = ChatMessage.now("user", prompt, detected_emotion)
+                st.session_state.data_manager.append_message(st.session_state.chat_history, user_message)
                 
-                # Add bot message
-                bot_message = {
-                    "role": "assistant",
-                    "content": response,
-                    "timestamp": datetime.now().isoformat()
-                }
-                st.session_state.chat_history.append(bot_message)
-                
-                # Auto-suggest remedies for low emotions (1-4)
-                if detected_emotion <= 4:
-                    st.session_state.show_auto_remedies = True
+                # Get bot response in the background; the pending reply is polled above
+                reply = st.session_state.therapy_bot.prepare_response(
+                    prompt, 
+                    st.session_state.language,
+                    detected_emotion,
+                    st.session_state.chat_history[-5:]  # Last 5 messages for context
+                )
+                try:
+                    track_job(CHAT_REPLY_JOB, get_job_queue().submit('chat', reply, meta={'emotion': detected_emotion, 'session_id': st.session_state.current_session_id}))
+                except JobQueueFull:
+                    with st.spinner(get_text("thinking", st.session_state.language)):
+                        add_bot_reply(reply(), detected_emotion)
                 
                 st.rerun()
         
@@ -793,20 +784,10 @@ def main():
         detected_emotion = get_current_detected_emotion()
         
         if detected_emotion:
-            emotion_faces = {
-                1: "💔", 2: "😠", 3: "😕", 4: "😐", 5: "😶",
-                6: "🙂", 7: "😊", 8: "😄", 9: "😁", 10: "🤩"
-            }
-            
-            emotion_labels = {
-                1: "Crisis/Trauma", 2: "Angry/Very Sad", 3: "Down", 4: "Low", 5: "Neutral",
-                6: "Okay", 7: "Good", 8: "Happy", 9: "Very Happy", 10: "Excellent"
-            }
-            
             st.markdown(f"""
             <div style="text-align: center; margin: 1rem 0;">
-                <div style="font-size: 3rem;">{emotion_faces.get(detected_emotion, "😶")}</div>
-                <div style="color: #FFFFFF; font-size: 1.2rem; margin-top: 0.5rem;">Detected: {emotion_labels.get(detected_emotion, "Neutral")}</div>
+                <div style="font-size: 3rem;">{level_face(detected_emotion)}</div>
+                <div style="color: #FFFFFF; font-size: 1.2rem; margin-top: 0.5rem;">Detected: {level_label(detected_emotion, 'en')}</div>
                 <div style="color: #9D4EDD; font-size: 0.9rem;">Based on your conversation & camera</div>
             </div>
             """, unsafe_allow_html=True)
@@ -851,12 +832,12 @@ def main():
         
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Messages", len([m for m in st.session_state.chat_history if m.get('role') == 'user']))
+            st.metric("Messages", st.session_state.data_manager.count_user_messages(st.session_state.chat_history))
             st.metric("🔥 Streak", f"{challenge_stats['current_streak']} days")
         with col2:
             detected_emotion = get_current_detected_emotion()
             if detected_emotion:
-                avg_emotion = sum([e['emotion'] for e in st.session_state.emotion_history]) / len(st.session_state.emotion_history) if st.session_state.emotion_history else detected_emotion
+                avg_emotion = st.session_state.data_manager.average_emotion(st.session_state.emotion_history) or detected_emotion
                 st.metric("Avg Mood", f"{avg_emotion:.1f}/10")
             else:
                 st.metric("Avg Mood", "Not detected")
@@ -882,17 +863,43 @@ def main():
         # Export data
         st.markdown("---")
         if st.button("📥 Export Data", key="export_data_sidebar"):
-            data = st.session_state.data_manager.export_all_data(
-                st.session_state.chat_history,
-                st.session_state.emotion_history
-            )
+            # Snapshot the histories so the export sees a consistent copy; it builds its own statistics
+            chat_history = list(st.session_state.chat_history)
+            emotion_history = list(st.session_state.emotion_history)
+            data_manager = st.session_state.data_manager
+            export = lambda: data_manager.export_all_data(chat_history, emotion_history)
+            try:
+                track_job(EXPORT_JOB, get_job_queue().submit('export', export))
+            except JobQueueFull:
+                st.session_state.export_data = export()
+        
+        watch_job(EXPORT_JOB, finish_export, get_text("preparing_export", st.session_state.language))
+        
+        if st.session_state.get('export_data') is not None:
             st.download_button(
                 label="Download JSON",
-                data=data,
+                data=st.session_state.export_data,
                 file_name=f"lumosai_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json",
-                key="download_data"
+                key="download_data",
+                on_click=lambda: st.session_state.pop('export_data', None)
             )
+        
+        if profiling_enabled():
+            st.markdown("---")
+            render_slow_runs(session_id())
+
+SCRIPT_RUN_SECONDS = registry.histogram('script_run_seconds', 'Streamlit script run duration', ('view',))
 
 if __name__ == "__main__":
-    main()
+    start_metrics_server()
+    started = time.perf_counter()
+    try:
+        with profile_run(session_id()), \
+                span('script.run', {'session.id': session_id(), 'language': st.session_state.language}) as run:
+            main()
+            run.set_attribute('view', st.session_state.get('active_view'))
+    finally:
+        # Reruns end the script with an exception, so they are timed too
+        SCRIPT_RUN_SECONDS.observe(time.perf_counter() - started, view=st.session_state.get('active_view') or 'none')
+        get_session_activity().touch(session_id(), st.session_state.to_dict())
@@ -0,0 +1,283 @@
+"""
+Vectorised audio synthesis for meditation and breathing sessions.
+Ambient pads, binaural beats and breath-pacing cues are generated as whole
+NumPy arrays (no per-sample Python loops), encoded to WAV (or OGG when
+soundfile is installed) and kept in a process-wide content-addressed cache,
+so an identical request is rendered once and shared by every session.
+"""
+
+import hashlib
+import io
+import json
+import threading
+import time
+import wave
+from collections import OrderedDict
+from typing import Callable, Dict, Sequence
+import numpy as np
+from metrics import registry
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+AMBIENT_LOOP_SECONDS = 60
+MAX_RENDER_SECONDS = 300
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Bump when synthesis changes so stale renders are never served
+ENGINE_VERSION = 1
+
+# Per meditation type: root pitch (Hz), partial ratios and weights, binaural
+# beat (Hz; theta for deep relaxation, alpha for calm focus), noise level and
+# slow swell rate (Hz)
+VOICES = {
+    'default': {'root': 174.0, 'partials': (1.0, 1.5, 2.0), 'weights': (1.0, 0.5, 0.3), 'beat': 6.0, 'noise': 0.06, 'swell': 0.05},
+    'breathing': {'root': 196.0, 'partials': (1.0, 1.5, 2.0), 'weights': (1.0, 0.4, 0.25), 'beat': 6.0, 'noise': 0.08, 'swell': 0.1},
+    'body_scan': {'root': 130.8, 'partials': (1.0, 1.5, 3.0), 'weights': (1.0, 0.5, 0.15), 'beat': 4.0, 'noise': 0.05, 'swell': 0.033},
+    'loving_kindness': {'root': 220.0, 'partials': (1.0, 1.25, 1.5), 'weights': (1.0, 0.6, 0.4), 'beat': 7.0, 'noise': 0.04, 'swell': 0.05},
+    'walking': {'root': 246.9, 'partials': (1.0, 1.5, 2.0), 'weights': (1.0, 0.3, 0.3), 'beat': 10.0, 'noise': 0.1, 'swell': 0.1},
+    'visualization': {'root': 164.8, 'partials': (1.0, 1.2, 1.5, 2.0), 'weights': (1.0, 0.5, 0.4, 0.2), 'beat': 5.0, 'noise': 0.05, 'swell': 0.033},
+    'compassion': {'root': 220.0, 'partials': (1.0, 1.25, 1.5), 'weights': (1.0, 0.5, 0.4), 'beat': 6.0, 'noise': 0.04, 'swell': 0.05},
+    'mindfulness': {'root': 196.0, 'partials': (1.0, 1.5, 2.0), 'weights': (1.0, 0.4, 0.2), 'beat': 8.0, 'noise': 0.06, 'swell': 0.05},
+    'gratitude': {'root': 261.6, 'partials': (1.0, 1.25, 1.5, 2.0), 'weights': (1.0, 0.6, 0.5, 0.2), 'beat': 10.0, 'noise': 0.04, 'swell': 0.1}
+}
+
+# Breathing steps cycle through these kinds by position (inhale, hold, exhale, hold)
+BREATH_STEP_KINDS = ('inhale', 'hold', 'exhale', 'hold')
+
+class AudioCache:
+    """Byte-bounded LRU of rendered tracks keyed by a hash of their render spec."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+        self.last_render_ms = 0.0
+
+    @staticmethod
+    def key(spec: Dict) -> str:
+        payload = json.dumps(spec, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get_or_render(self, spec: Dict, render: Callable[[], bytes]) -> bytes:
+        """Return the cached bytes for spec, rendering them on first use."""
+        key = self.key(spec)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        start = time.perf_counter()
+        data = render()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.render_seconds += elapsed
+            self.last_render_ms = elapsed * 1000
+            if key not in self._entries:
+                self._entries[key] = data
+                self.bytes += len(data)
+                while self.bytes > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= len(evicted)
+                    self.evictions += 1
+        return data
+
+    def stats(self) -> Dict:
+        with self._lock:
+            renders = self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'render_seconds_total': self.render_seconds,
+                'avg_render_ms': self.render_seconds / renders * 1000 if renders else 0.0,
+                'last_render_ms': self.last_render_ms
+            }
+
+_cache = AudioCache()
+registry.register_stats('audio_cache', _cache.stats, counters=('hits', 'misses', 'evictions', 'render_seconds_total'),
+                        gauges=('entries', 'bytes'))
+
+def _time_axis(seconds: float) -> np.ndarray:
+    return np.arange(int(seconds * SAMPLE_RATE), dtype=np.float64) / SAMPLE_RATE
+
+def _loop_frequency(frequency: float, seconds: float) -> float:
+    """Round a frequency to a whole number of cycles so the track loops without a click."""
+    return max(1.0, round(frequency * seconds)) / seconds
+
+def _pink_noise(samples: int, seed: int) -> np.ndarray:
+    """Circular 1/f noise shaped in the frequency domain."""
+    rng = np.random.default_rng(seed)
+    spectrum = np.fft.rfft(rng.standard_normal(samples))
+    scale = np.ones(len(spectrum))
+    scale[1:] = 1.0 / np.sqrt(np.arange(1, len(spectrum)))
+    noise = np.fft.irfft(spectrum * scale, n=samples)
+    return noise / (np.max(np.abs(noise)) or 1.0)
+
+def _normalize(signal: np.ndarray, peak: float = 0.8) -> np.ndarray:
+    return signal * (peak / (np.max(np.abs(signal)) or 1.0))
+
+def synthesize_ambient(meditation_type: str, seconds: float, binaural: bool = True) -> np.ndarray:
+    """
+    Synthesize a seamlessly looping ambient pad.
+
+    Args:
+        meditation_type: Key into VOICES; unknown types use 'default'
+        seconds: Loop length
+        binaural: Offset the right channel carrier by the voice's beat frequency
+
+    Returns:
+        Float array of shape (samples, 2) in [-1, 1]
+    """
+    voice = VOICES.get(meditation_type, VOICES['default'])
+    t = _time_axis(seconds)
+
+    frequencies = np.array([_loop_frequency(voice['root'] * ratio, seconds) for ratio in voice['partials']])
+    weights = np.array(voice['weights'])
+    pad = weights @ np.sin(2 * np.pi * frequencies[:, None] * t)
+    swell = 0.65 + 0.35 * np.sin(2 * np.pi * _loop_frequency(voice['swell'], seconds) * t)
+    pad = pad * swell / weights.sum()
+
+    stereo = np.repeat(pad[:, None], 2, axis=1)
+    if binaural:
+        carrier = _loop_frequency(voice['root'] / 2, seconds)
+        beat = _loop_frequency(voice['beat'], seconds)
+        stereo[:, 0] += 0.4 * np.sin(2 * np.pi * carrier * t)
+        stereo[:, 1] += 0.4 * np.sin(2 * np.pi * (carrier + beat) * t)
+
+    seed = int(AudioCache.key({'noise': meditation_type})[:8], 16)
+    stereo += voice['noise'] * _pink_noise(len(t), seed)[:, None]
+    return _normalize(stereo)
+
+def synthesize_breath_cue(durations: Sequence[float], rounds: int = 1, voice_name: str = 'breathing') -> np.ndarray:
+    """
+    Synthesize a breath-pacing cue for a breathing pattern.
+
+    The tone swells and rises in pitch while inhaling, stays soft while
+    holding and falls away while exhaling; a short chime marks each step.
+
+    Args:
+        durations: Seconds per step, in inhale/hold/exhale/hold order
+        rounds: Number of cycles
+        voice_name: Key into VOICES for the base pitch
+
+    Returns:
+        Mono float array in [-1, 1]
+    """
+    voice = VOICES.get(voice_name, VOICES['default'])
+    root = voice['root']
+    durations = np.asarray(durations, dtype=np.float64)
+    cycle = durations.sum()
+    t = _time_axis(cycle * rounds)
+
+    # Breakpoints within one cycle: amplitude and pitch at each step boundary
+    boundaries = np.concatenate(([0.0], np.cumsum(durations)))
+    levels, pitches = [0.2], [1.0]
+    for index in range(len(durations)):
+        kind = BREATH_STEP_KINDS[index % len(BREATH_STEP_KINDS)]
+        if kind == 'inhale':
+            levels.append(1.0)
+            pitches.append(1.5)
+        elif kind == 'exhale':
+            levels.append(0.2)
+            pitches.append(1.0)
+        else:
+            levels.append(levels[-1] * 0.7)
+            pitches.append(pitches[-1])
+
+    position = np.mod(t, cycle)
+    envelope = np.interp(position, boundaries, levels)
+    frequency = root * np.interp(position, boundaries, pitches)
+    phase = 2 * np.pi * np.cumsum(frequency) / SAMPLE_RATE
+    tone = envelope * (np.sin(phase) + 0.3 * np.sin(2 * phase))
+
+    step_starts = boundaries[:-1]
+    since_step = position - step_starts[np.searchsorted(step_starts, position, side='right') - 1]
+    chime = np.exp(-since_step * 6.0) * np.sin(2 * np.pi * root * 4 * since_step)
+
+    return _normalize(tone + 0.5 * chime)
+
+def encode_audio(samples: np.ndarray, file_format: str = 'wav') -> bytes:
+    """
+    Encode float samples to audio file bytes.
+
+    Args:
+        samples: Mono (n,) or multi-channel (n, channels) array in [-1, 1]
+        file_format: 'wav', or 'ogg' when soundfile is installed
+
+    Returns:
+        Encoded file contents
+    """
+    buffer = io.BytesIO()
+    if file_format == 'ogg':
+        if not SOUNDFILE_AVAILABLE:
+            raise RuntimeError("OGG encoding requires soundfile")
+        sf.write(buffer, samples, SAMPLE_RATE, format='OGG', subtype='VORBIS')
+        return buffer.getvalue()
+
+    if file_format != 'wav':
+        raise ValueError(f"Unsupported audio format: {file_format}")
+
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+def ambient_track(meditation_type: str, seconds: float = AMBIENT_LOOP_SECONDS, binaural: bool = True,
+                  file_format: str = 'wav') -> bytes:
+    """Encoded ambient loop for a meditation type, rendered once per process."""
+    seconds = min(float(seconds), MAX_RENDER_SECONDS)
+    spec = {
+        'kind': 'ambient',
+        'voice': meditation_type if meditation_type in VOICES else 'default',
+        'seconds': seconds,
+        'binaural': binaural,
+        'format': file_format,
+        'sample_rate': SAMPLE_RATE,
+        'version': ENGINE_VERSION
+    }
+    return _cache.get_or_render(
+        spec, lambda: encode_audio(synthesize_ambient(spec['voice'], seconds, binaural), file_format)
+    )
+
+def breath_cue_track(durations: Sequence[float], rounds: int = 1, voice_name: str = 'breathing',
+                     file_format: str = 'wav') -> bytes:
+    """Encoded breath-pacing cue for a breathing pattern, rendered once per process."""
+    durations = [float(duration) for duration in durations]
+    rounds = max(1, min(int(rounds), int(MAX_RENDER_SECONDS // (sum(durations) or 1)) or 1))
+    spec = {
+        'kind': 'breath_cue',
+        'pattern': durations,
+        'rounds': rounds,
+        'voice': voice_name if voice_name in VOICES else 'default',
+        'format': file_format,
+        'sample_rate': SAMPLE_RATE,
+        'version': ENGINE_VERSION
+    }
+    return _cache.get_or_render(
+        spec, lambda: encode_audio(synthesize_breath_cue(durations, rounds, spec['voice']), file_format)
+    )
+
+def audio_mime_type(file_format: str = 'wav') -> str:
+    return 'audio/ogg' if file_format == 'ogg' else 'audio/wav'
+
+def audio_cache_stats() -> Dict:
+    """Render time and cache size metrics for the process-wide audio cache."""
+    return _cache.stats()
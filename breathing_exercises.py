@@ -3,58 +3,18 @@ import time
 import threading
 from typing import Dict
 from translations import get_text
+from content_catalog import get_catalog
+from audio_engine import breath_cue_track, audio_mime_type
 
 class BreathingExercises:
     def __init__(self):
         """Initialize breathing exercises."""
-        self.exercises = {
-            'en': {
-                '4-7-8': {
-                    'name': '4-7-8 Breathing',
-                    'description': 'Inhale for 4, hold for 7, exhale for 8 seconds',
-                    'steps': ['Inhale', 'Hold', 'Exhale'],
-                    'durations': [4, 7, 8],
-                    'benefits': 'Reduces anxiety and promotes sleep'
-                },
-                'box': {
-                    'name': 'Box Breathing',
-                    'description': 'Inhale, hold, exhale, hold - each for 4 seconds',
-                    'steps': ['Inhale', 'Hold', 'Exhale', 'Hold'],
-                    'durations': [4, 4, 4, 4],
-                    'benefits': 'Improves focus and reduces stress'
-                },
-                'triangle': {
-                    'name': 'Triangle Breathing',
-                    'description': 'Inhale for 4, hold for 4, exhale for 4 seconds',
-                    'steps': ['Inhale', 'Hold', 'Exhale'],
-                    'durations': [4, 4, 4],
-                    'benefits': 'Simple technique for beginners'
-                }
-            },
-            'hi': {
-                '4-7-8': {
-                    'name': '4-7-8 सांस लेना',
-                    'description': '4 सेकंड सांस लें, 7 सेकंड रोकें, 8 सेकंड छोड़ें',
-                    'steps': ['सांस लें', 'रोकें', 'छोड़ें'],
-                    'durations': [4, 7, 8],
-                    'benefits': 'चिंता कम करता है और नींद में सहायक है'
-                },
-                'box': {
-                    'name': 'बॉक्स ब्रीदिंग',
-                    'description': 'सांस लें, रोकें, छोड़ें, रोकें - हर एक 4 सेकंड के लिए',
-                    'steps': ['सांस लें', 'रोकें', 'छोड़ें', 'रोकें'],
-                    'durations': [4, 4, 4, 4],
-                    'benefits': 'फोकस बढ़ाता है और तनाव कम करता है'
-                },
-                'triangle': {
-                    'name': 'त्रिकोण सांस',
-                    'description': '4 सेकंड सांस लें, 4 सेकंड रोकें, 4 सेकंड छोड़ें',
-                    'steps': ['सांस लें', 'रोकें', 'छोड़ें'],
-                    'durations': [4, 4, 4],
-                    'benefits': 'शुरुआती लोगों के लिए सरल तकनीक'
-                }
-            }
-        }
+        pass
+    
+    @property
+    def exercises(self) -> Dict:
+        """Exercises by language and id, shared read-only across sessions."""
+        return get_catalog('breathing_exercises').data
     
     def display_breathing_interface(self, language: str):
         """
@@ -114,6 +74,10 @@ class BreathingExercises:
             st.subheader(get_text("visual_guide", language))
             self._display_breathing_visual(selected_exercise, language)
             
+            # Audio cue paced to the pattern; shared by every session using it
+            st.subheader(get_text("audio_guide", language))
+            st.audio(breath_cue_track(exercise_data['durations'], rounds), format=audio_mime_type())
+            
             # Tips section
             st.subheader(get_text("breathing_tips", language))
             tips = self._get_breathing_tips(language)
@@ -1,17 +1,103 @@
 import streamlit as st
 import cv2
+import json
 import numpy as np
-from typing import Optional, Tuple, List
+from typing import Callable, Dict, Optional, Tuple, List
 import time
 from translations import get_text
+from emotion_taxonomy import CAMERA_EMOTIONS, emotion_name_to_scale
+from content_catalog import get_catalog
+from single_flight import fingerprint, get_single_flight, session_id
+from admission import PHOTO_REQUEST_COST, AdmissionRejected, admitted_call, quota_key
+from tracing import span
+from metrics import metered_call, registry
+from session_memory import ColdData, register_offloader
+from job_queue import JobQueueFull, get_job_queue, track_job, watch_job
+
+# Session job name for the pending AI photo analysis
+PHOTO_ANALYSIS_JOB = 'photo_analysis'
+
+PHOTO_ANALYSES = registry.counter('photo_analyses_total', 'Photo analyses recorded, by path', ('path',))
+
+# Recent analyses kept uncompressed when a session's camera data is over budget
+HOT_ANALYSES = 20
+
+# Response schema for structured-output mode, so the model returns bare JSON
+EMOTION_RESPONSE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'primary_emotion': {'type': 'STRING', 'enum': list(CAMERA_EMOTIONS)},
+        'confidence': {'type': 'NUMBER'},
+        'emotions': {
+            'type': 'OBJECT',
+            'properties': {emotion: {'type': 'NUMBER'} for emotion in CAMERA_EMOTIONS},
+            'required': list(CAMERA_EMOTIONS)
+        }
+    },
+    'required': ['primary_emotion', 'confidence', 'emotions']
+}
+
+def extract_json_object(text: str) -> Optional[dict]:
+    """
+    Recover the first complete JSON object from model output.
+    
+    Scans the text once, tracking brace depth and string state, so responses
+    wrapped in markdown fences or prefixed with prose still yield the object.
+    
+    Args:
+        text: Raw model response text
+        
+    Returns:
+        Parsed dictionary, or None if no complete object was found
+    """
+    start = None
+    depth = 0
+    in_string = False
+    escaped = False
+    
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"' and start is not None:
+            in_string = True
+        elif char == '{':
+            if start is None:
+                start = i
+            depth += 1
+        elif char == '}' and start is not None:
+            depth -= 1
+            if depth == 0:
+                try:
+                    candidate = json.loads(text[start:i + 1])
+                except json.JSONDecodeError:
+                    # Not valid JSON after all, keep looking for the next object
+                    start = None
+                    continue
+                if isinstance(candidate, dict):
+                    return candidate
+                start = None
+    
+    return None
 
 class CameraAnalysis:
     def __init__(self):
         """Initialize camera analysis for emotion detection."""
         self.face_cascade = None
         self.emotion_data = []
+        # Older analyses, compressed in chunks, oldest first
+        self.cold_analyses: List[ColdData] = []
+        self.cold_analysis_count = 0
         self.is_recording = False
         self.captured_images = []
+        # Vision response parsing outcomes: clean JSON, recovered from wrapped text, unusable
+        self.parse_stats = {'strict': 0, 'recovered': 0, 'failed': 0}
     
     def display_camera_interface(self, language: str):
         """
@@ -68,6 +154,8 @@ class CameraAnalysis:
             with col1_3:
                 if st.button("🗑️ Clear Results", key="clear_results"):
                     self.emotion_data = []
+                    self.cold_analyses = []
+                    self.cold_analysis_count = 0
                     self.captured_images = []
                     st.success("Results cleared!")
             
@@ -93,6 +181,10 @@ class CameraAnalysis:
                     <div style="color: #999; font-size: 0.9rem; margin-top: 0.5rem;">Camera access requires HTTPS or localhost</div>
                 </div>
                 """, unsafe_allow_html=True)
+            
+            # AI analysis runs in the background; the result is picked up when it lands
+            watch_job(PHOTO_ANALYSIS_JOB, lambda job: self._finish_photo_analysis(job, language),
+                      "Analyzing facial emotions using AI...")
         
         with col2:
             # Emotion analysis results
@@ -130,9 +222,31 @@ class CameraAnalysis:
                 """, unsafe_allow_html=True)
         
         # Display emotion analysis history
-        if len(self.emotion_data) > 1:
+        if self.cold_analysis_count + len(self.emotion_data) > 1:
             self._display_emotion_timeline(language)
     
+    def offload_old_analyses(self, keep: int = HOT_ANALYSES) -> int:
+        """
+        Compress all but the newest keep analyses.
+        
+        Returns:
+            Number of analyses offloaded
+        """
+        if len(self.emotion_data) <= keep:
+            return 0
+        cold = self.emotion_data[:-keep]
+        self.cold_analyses.append(ColdData(cold))
+        self.cold_analysis_count += len(cold)
+        self.emotion_data = self.emotion_data[-keep:]
+        return len(cold)
+    
+    def analysis_history(self) -> List[Dict]:
+        """All analyses, oldest first, including offloaded ones."""
+        history = []
+        for chunk in self.cold_analyses:
+            history.extend(chunk.thaw())
+        return history + self.emotion_data
+    
     def _check_camera_available(self) -> bool:
         """Check if camera is available."""
         try:
@@ -175,129 +289,221 @@ class CameraAnalysis:
         }
         
         self.emotion_data.append(analysis_result)
+        PHOTO_ANALYSES.inc(path='sample')
         st.success(f"Sample photo analyzed! Detected emotion: {primary_emotion.title()} ({confidence:.1f}% confidence)")
         st.rerun()
     
     def _analyze_uploaded_photo(self, image_bytes: bytes, language: str):
-        """Analyze uploaded photo using improved emotion detection."""
+        """Start AI analysis of a photo as a background job; rule-based analysis when AI is unavailable."""
+        import os
+        
+        # Check if we can use Gemini API
+        api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
+        if api_key is None:
+            # Use enhanced rule-based analysis as fallback
+            return self._analyze_photo_fallback(image_bytes, language)
+        
+        photo_fingerprint = fingerprint('photo', image_bytes)
         try:
-            import os
-            import json
-            import tempfile
-            
-            # Check if we can use Gemini API
-            api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
-            use_ai_analysis = api_key is not None
+            job = get_job_queue().submit(
+                'vision',
+                self._prepare_vision_request(api_key, image_bytes, photo_fingerprint),
+                meta={'image_bytes': image_bytes, 'fingerprint': photo_fingerprint}
+            )
+        except JobQueueFull:
+            st.warning("The analysis service is busy. Using quick analysis for now...")
+            return self._analyze_photo_fallback(image_bytes, language)
+        track_job(PHOTO_ANALYSIS_JOB, job)
+    
+    def _prepare_vision_request(self, api_key: str, image_bytes: bytes, photo_fingerprint: str) -> Callable:
+        """Capture the vision call for a background job; session and quota owner are read here."""
+        # Identical photos from this session share one vision call, made once admitted
+        key = (session_id(), photo_fingerprint)
+        user_id = quota_key()
+        
+        def request():
+            from google import genai
+            from google.genai import types
             
-            if not use_ai_analysis:
-                # Use enhanced rule-based analysis as fallback
-                return self._analyze_photo_fallback(image_bytes, language)
+            client = genai.Client(api_key=api_key)
+            with span('model.vision', {'payload.bytes': len(image_bytes)}):
+                response, _ = get_single_flight().do(key, admitted_call(metered_call(lambda: client.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=[
+                        types.Part.from_bytes(
+                            data=image_bytes,
+                            mime_type="image/jpeg",
+                        ),
+                        """Analyze this facial image and detect emotions. Look at facial expressions, eye movements, mouth position, overall facial features, and signs of psychological distress.
+                    
+                        Respond with ONLY a JSON object in this exact format:
+                        {
+                            "primary_emotion": "neutral",
+                            "confidence": 85.5,
+                            "emotions": {
+                                "happy": 15.5,
+                                "sad": 5.2,
+                                "angry": 8.1,
+                                "neutral": 45.2,
+                                "surprised": 2.5,
+                                "fear": 1.3,
+                                "trauma": 1.2,
+                                "disgust": 1.0
+                            }
+                        }
+                    
+                        Primary emotion must be one of: happy, sad, angry, neutral, surprised, fear, trauma, disgust
+                    
+                        EMOTION DETECTION GUIDELINES:
+                        - **Angry**: Furrowed brows, tense jaw, narrow eyes, downturned mouth
+                        - **Neutral**: Relaxed facial muscles, no strong emotional indicators, calm expression
+                        - **Trauma**: Distant/vacant stare, tense facial muscles, signs of distress, withdrawn expression
+                        - **Happy**: Smile, raised cheeks, crinkled eyes (Duchenne markers)
+                        - **Sad**: Downturned mouth corners, drooping eyelids, furrowed inner brows
+                        - **Fear**: Wide eyes, raised eyebrows, open mouth, tense face
+                        - **Surprised**: Raised eyebrows, wide eyes, dropped jaw
+                        - **Disgust**: Wrinkled nose, raised upper lip, squinted eyes
+                    
+                        Make sure all emotion percentages sum to 100.
+                        Base your analysis on actual facial features visible in the image.
+                        Pay special attention to subtle signs of anger, neutral states, and trauma."""
+                    ],
+                    config=types.GenerateContentConfig(
+                        response_mime_type="application/json",
+                        response_schema=EMOTION_RESPONSE_SCHEMA
+                    ),
+                ), 'vision'), PHOTO_REQUEST_COST, user_id))
+            return response
+        
+        return request
+    
+    def _finish_photo_analysis(self, job, language: str):
+        """Record the outcome of a finished vision job; runs on the script thread right before a rerun, so notices are toasts."""
+        image_bytes = job.meta['image_bytes']
+        photo_fingerprint = job.meta['fingerprint']
+        
+        if isinstance(job.error, AdmissionRejected):
+            st.toast(f"⏳ Too many analyses right now; AI analysis is available again in about {max(1, round(job.error.eta))}s. Using quick analysis for now...")
+            return self._analyze_photo_fallback(image_bytes, language)
+        if job.error is not None:
+            st.toast(f"⚠️ AI analysis failed: {str(job.error)}. Using fallback analysis...")
+            return self._analyze_photo_fallback(image_bytes, language)
+        
+        response = job.result
+        if response and response.text:
+            result = self._parse_emotion_response(response)
             
-            try:
-                from google import genai
-                from google.genai import types
+            if result is not None:
+                analysis_result = {
+                    'timestamp': time.time(),
+                    'primary_emotion': result['primary_emotion'],
+                    'confidence': result['confidence'],
+                    'emotions': result['emotions'],
+                    'source': 'uploaded',
+                    'fingerprint': photo_fingerprint
+                }
                 
-                # Initialize Gemini client
-                client = genai.Client(api_key=api_key)
+                # A replayed analysis (rerun with the same photo) is recorded only once
+                if self.emotion_data and self.emotion_data[-1].get('fingerprint') == photo_fingerprint:
+                    st.toast("ℹ️ This photo was just analyzed; showing the same result.")
+                    return
                 
-                # Analyze image with Gemini
-                with st.spinner("Analyzing facial emotions using AI..."):
-                    response = client.models.generate_content(
-                        model="gemini-2.5-flash",
-                        contents=[
-                            types.Part.from_bytes(
-                                data=image_bytes,
-                                mime_type="image/jpeg",
-                            ),
-                            """Analyze this facial image and detect emotions. Look at facial expressions, eye movements, mouth position, overall facial features, and signs of psychological distress.
-                            
-                            Respond with ONLY a JSON object in this exact format:
-                            {
-                                "primary_emotion": "neutral",
-                                "confidence": 85.5,
-                                "emotions": {
-                                    "happy": 15.5,
-                                    "sad": 5.2,
-                                    "angry": 8.1,
-                                    "neutral": 45.2,
-                                    "surprised": 2.5,
-                                    "fear": 1.3,
-                                    "trauma": 1.2,
-                                    "disgust": 1.0
-                                }
-                            }
-                            
-                            Primary emotion must be one of: happy, sad, angry, neutral, surprised, fear, trauma, disgust
-                            
-                            EMOTION DETECTION GUIDELINES:
-                            - **Angry**: Furrowed brows, tense jaw, narrow eyes, downturned mouth
-                            - **Neutral**: Relaxed facial muscles, no strong emotional indicators, calm expression
-                            - **Trauma**: Distant/vacant stare, tense facial muscles, signs of distress, withdrawn expression
-                            - **Happy**: Smile, raised cheeks, crinkled eyes (Duchenne markers)
-                            - **Sad**: Downturned mouth corners, drooping eyelids, furrowed inner brows
-                            - **Fear**: Wide eyes, raised eyebrows, open mouth, tense face
-                            - **Surprised**: Raised eyebrows, wide eyes, dropped jaw
-                            - **Disgust**: Wrinkled nose, raised upper lip, squinted eyes
-                            
-                            Make sure all emotion percentages sum to 100.
-                            Base your analysis on actual facial features visible in the image.
-                            Pay special attention to subtle signs of anger, neutral states, and trauma."""
-                        ],
-                    )
+                self.emotion_data.append(analysis_result)
+                PHOTO_ANALYSES.inc(path='ai')
                 
-                if response and response.text:
-                    try:
-                        result = json.loads(response.text.strip())
-                        
-                        analysis_result = {
-                            'timestamp': time.time(),
-                            'primary_emotion': result['primary_emotion'],
-                            'confidence': result['confidence'],
-                            'emotions': result['emotions'],
-                            'source': 'uploaded'
-                        }
-                        
-                        self.emotion_data.append(analysis_result)
-                        
-                        # Auto-suggest remedies for negative emotions
-                        if result['primary_emotion'] in ['sad', 'angry', 'fear', 'disgust', 'trauma']:
-                            st.session_state.show_auto_remedies = True
-                            
-                            # Map camera emotion to chat emotion scale (1-10)
-                            emotion_mapping = {
-                                'trauma': 1,     # Severe distress
-                                'angry': 2,      # High distress
-                                'sad': 3,        # Low mood
-                                'fear': 3,       # Anxiety
-                                'disgust': 4,    # Moderate negative
-                                'neutral': 5,    # Balanced
-                                'surprised': 6,  # Mild positive
-                                'happy': 8       # Positive mood
-                            }
-                            
-                            # Update chat emotion based on camera detection
-                            detected_level = emotion_mapping.get(result['primary_emotion'], 5)
-                            st.session_state.current_emotion = detected_level
-                            st.session_state.last_chat_emotion = detected_level
-                        
-                        st.success(f"Photo analyzed! Detected emotion: {result['primary_emotion'].title()} ({result['confidence']:.1f}% confidence)")
-                        st.rerun()
-                        
-                    except json.JSONDecodeError:
-                        st.error("Failed to parse emotion analysis results. Using fallback analysis...")
-                        return self._analyze_photo_fallback(image_bytes, language)
-                else:
-                    st.error("No response from emotion analysis service. Using fallback analysis...")
-                    return self._analyze_photo_fallback(image_bytes, language)
+                # Auto-suggest remedies for negative emotions
+                if result['primary_emotion'] in ['sad', 'angry', 'fear', 'disgust', 'trauma']:
+                    st.session_state.show_auto_remedies = True
                     
-            except Exception as e:
-                st.error(f"AI analysis failed: {str(e)}. Using fallback analysis...")
-                return self._analyze_photo_fallback(image_bytes, language)
+                    # Update chat emotion based on camera detection
+                    detected_level = emotion_name_to_scale(result['primary_emotion'])
+                    st.session_state.current_emotion = detected_level
+                    st.session_state.last_chat_emotion = detected_level
                 
-        except Exception as e:
-            st.error(f"Error analyzing photo: {str(e)}. Using fallback analysis...")
+                st.toast(f"✅ Photo analyzed! Detected emotion: {result['primary_emotion'].title()} ({result['confidence']:.1f}% confidence)")
+            else:
+                st.toast("⚠️ Failed to parse emotion analysis results. Using fallback analysis...")
+                return self._analyze_photo_fallback(image_bytes, language)
+        else:
+            st.toast("⚠️ No response from emotion analysis service. Using fallback analysis...")
             return self._analyze_photo_fallback(image_bytes, language)
     
+    def _parse_emotion_response(self, response) -> Optional[dict]:
+        """
+        Parse and validate a vision model response.
+        
+        Args:
+            response: Response returned by generate_content
+            
+        Returns:
+            Validated analysis dictionary, or None if the response is unusable
+        """
+        # Structured-output mode hands back the parsed object directly
+        parsed = getattr(response, 'parsed', None)
+        recovered = False
+        
+        if not isinstance(parsed, dict):
+            text = response.text.strip()
+            try:
+                parsed = json.loads(text)
+            except json.JSONDecodeError:
+                parsed = extract_json_object(text)
+                recovered = True
+        
+        result = self._validate_emotion_result(parsed) if isinstance(parsed, dict) else None
+        
+        if result is None:
+            self.parse_stats['failed'] += 1
+        elif recovered:
+            self.parse_stats['recovered'] += 1
+        else:
+            self.parse_stats['strict'] += 1
+        
+        return result
+    
+    def _validate_emotion_result(self, result: dict) -> Optional[dict]:
+        """
+        Validate an emotion analysis and renormalise its percentages to 100.
+        
+        Args:
+            result: Raw analysis with primary_emotion, confidence and emotions
+            
+        Returns:
+            Cleaned analysis dictionary, or None if it cannot be salvaged
+        """
+        raw_emotions = result.get('emotions')
+        if not isinstance(raw_emotions, dict):
+            return None
+        
+        emotions = {}
+        for emotion in CAMERA_EMOTIONS:
+            value = raw_emotions.get(emotion, 0)
+            try:
+                emotions[emotion] = max(0.0, float(value))
+            except (TypeError, ValueError):
+                emotions[emotion] = 0.0
+        
+        total = sum(emotions.values())
+        if total <= 0:
+            return None
+        emotions = {k: (v / total) * 100 for k, v in emotions.items()}
+        
+        primary_emotion = str(result.get('primary_emotion', '')).lower()
+        if primary_emotion not in emotions:
+            primary_emotion = max(emotions, key=emotions.get)
+        
+        try:
+            confidence = float(result.get('confidence'))
+        except (TypeError, ValueError):
+            confidence = emotions[primary_emotion]
+        confidence = max(0.0, min(100.0, confidence))
+        
+        return {
+            'primary_emotion': primary_emotion,
+            'confidence': confidence,
+            'emotions': emotions
+        }
+    
     def _analyze_photo_fallback(self, image_bytes: bytes, language: str):
         """Fallback emotion analysis using computer vision techniques."""
         try:
@@ -306,12 +512,14 @@ class CameraAnalysis:
             from PIL import Image
             import io
             
-            # Load image for basic analysis
-            image = Image.open(io.BytesIO(image_bytes))
-            width, height = image.size
-            
-            # Convert to numpy array for analysis
-            img_array = np.array(image)
+            with span('image.decode', {'payload.bytes': len(image_bytes)}) as decode:
+                # Load image for basic analysis
+                image = Image.open(io.BytesIO(image_bytes))
+                width, height = image.size
+                
+                # Convert to numpy array for analysis
+                img_array = np.array(image)
+                decode.set_attributes({'image.width': width, 'image.height': height})
             
             # Enhanced emotion detection based on image properties
             emotions = self._analyze_image_features(img_array, width, height)
@@ -329,6 +537,7 @@ class CameraAnalysis:
             }
             
             self.emotion_data.append(analysis_result)
+            PHOTO_ANALYSES.inc(path='fallback')
             st.success(f"Photo analyzed using computer vision! Detected emotion: {primary_emotion.title()} ({confidence:.1f}% confidence)")
             st.rerun()
             
@@ -434,201 +643,8 @@ class CameraAnalysis:
     
     def _get_quick_remedies(self, emotion: str, language: str) -> list:
         """Get quick remedies based on detected emotion."""
-        if language == 'hi':
-            remedies = {
-                'happy': [
-                    {
-                        'title': 'खुशी को साझा करें',
-                        'description': 'किसी मित्र या परिवार के सदस्य को कॉल करें और अपनी खुशी साझा करें',
-                        'duration': '5 मिनट'
-                    },
-                    {
-                        'title': 'कृतज्ञता डायरी',
-                        'description': '3 चीजें लिखें जिनके लिए आप आज आभारी हैं',
-                        'duration': '3 मिनट'
-                    }
-                ],
-                'sad': [
-                    {
-                        'title': '4-7-8 सांस तकनीक',
-                        'description': '4 गिनती में सांस लें, 7 गिनती रोकें, 8 गिनती में छोड़ें',
-                        'duration': '2 मिनट'
-                    },
-                    {
-                        'title': 'स्व-करुणा अभ्यास',
-                        'description': 'अपने आप से दयालुता से बात करें जैसे आप किसी अच्छे मित्र से करते हैं',
-                        'duration': '5 मिनट'
-                    }
-                ],
-                'angry': [
-                    {
-                        'title': 'प्रगतिशील मांसपेशी विश्राम',
-                        'description': 'अपनी मांसपेशियों को कसें और फिर छोड़ें, पैर की उंगलियों से सिर तक',
-                        'duration': '10 मिनट'
-                    },
-                    {
-                        'title': '10 की गिनती',
-                        'description': 'धीरे-धीरे 10 तक गिनती करें और प्रत्येक संख्या के साथ गहरी सांस लें',
-                        'duration': '1 मिनट'
-                    }
-                ],
-                'neutral': [
-                    {
-                        'title': 'माइंडफुल वॉक',
-                        'description': '5 मिनट की छोटी सी टहलने जाएं और अपने आसपास के वातावरण पर ध्यान दें',
-                        'duration': '5 मिनट'
-                    }
-                ],
-                'surprised': [
-                    {
-                        'title': 'ग्राउंडिंग तकनीक',
-                        'description': '5 चीजें देखें, 4 सुनें, 3 छुएं, 2 सूंघें, 1 चखें',
-                        'duration': '3 मिनट'
-                    }
-                ],
-                'fear': [
-                    {
-                        'title': 'बॉक्स ब्रीथिंग',
-                        'description': '4-4-4-4 की तकनीक: 4 गिनती में सांस लें, रोकें, छोड़ें, रोकें',
-                        'duration': '5 मिनट'
-                    }
-                ],
-                'trauma': [
-                    {
-                        'title': 'ग्राउंडिंग 5-4-3-2-1',
-                        'description': '5 चीजें देखें, 4 सुनें, 3 छुएं, 2 सूंघें, 1 चखें - अभी और यहाँ वापस आएं',
-                        'duration': '3 मिनट'
-                    },
-                    {
-                        'title': 'सुरक्षित स्थान विज़ुअलाइज़ेशन',
-                        'description': 'अपने दिमाग में एक सुरक्षित और शांत जगह की कल्पना करें',
-                        'duration': '5 मिनट'
-                    }
-                ],
-                'disgust': [
-                    {
-                        'title': 'सफाई अनुष्ठान',
-                        'description': 'हाथ धोएं और गहरी सांस लें - यह भावना गुजर जाएगी',
-                        'duration': '2 मिनट'
-                    }
-                ]
-            }
-        else:
-            remedies = {
-                'happy': [
-                    {
-                        'title': 'Share Your Joy',
-                        'description': 'Call a friend or family member and share what made you happy today',
-                        'duration': '5 minutes'
-                    },
-                    {
-                        'title': 'Gratitude Journaling',
-                        'description': 'Write down 3 things you are grateful for right now',
-                        'duration': '3 minutes'
-                    }
-                ],
-                'sad': [
-                    {
-                        'title': '4-7-8 Breathing',
-                        'description': 'Breathe in for 4 counts, hold for 7, exhale for 8. Repeat 4 times',
-                        'duration': '2 minutes'
-                    },
-                    {
-                        'title': 'Self-Compassion Break',
-                        'description': 'Talk to yourself with the same kindness you would show a good friend',
-                        'duration': '5 minutes'
-                    },
-                    {
-                        'title': 'Gentle Movement',
-                        'description': 'Do some light stretching or gentle yoga poses',
-                        'duration': '5 minutes'
-                    }
-                ],
-                'angry': [
-                    {
-                        'title': 'Progressive Muscle Relaxation',
-                        'description': 'Tense and release each muscle group from toes to head',
-                        'duration': '10 minutes'
-                    },
-                    {
-                        'title': 'Count to 10',
-                        'description': 'Slowly count to 10, taking a deep breath with each number',
-                        'duration': '1 minute'
-                    },
-                    {
-                        'title': 'Cold Water Splash',
-                        'description': 'Splash cold water on your face or hold ice cubes',
-                        'duration': '30 seconds'
-                    }
-                ],
-                'neutral': [
-                    {
-                        'title': 'Mindful Walking',
-                        'description': 'Take a short 5-minute walk and notice your surroundings',
-                        'duration': '5 minutes'
-                    },
-                    {
-                        'title': 'Energy Boost',
-                        'description': 'Do 10 jumping jacks or stretch your arms above your head',
-                        'duration': '2 minutes'
-                    }
-                ],
-                'surprised': [
-                    {
-                        'title': '5-4-3-2-1 Grounding',
-                        'description': 'Name 5 things you see, 4 you hear, 3 you touch, 2 you smell, 1 you taste',
-                        'duration': '3 minutes'
-                    },
-                    {
-                        'title': 'Deep Belly Breathing',
-                        'description': 'Place hand on chest, one on belly. Breathe so only belly hand moves',
-                        'duration': '3 minutes'
-                    }
-                ],
-                'fear': [
-                    {
-                        'title': 'Box Breathing',
-                        'description': '4-4-4-4 technique: Inhale 4, hold 4, exhale 4, hold 4',
-                        'duration': '5 minutes'
-                    },
-                    {
-                        'title': 'Positive Affirmations',
-                        'description': 'Repeat: "I am safe, I am strong, this feeling will pass"',
-                        'duration': '2 minutes'
-                    }
-                ],
-                'trauma': [
-                    {
-                        'title': '5-4-3-2-1 Grounding',
-                        'description': 'Name 5 things you see, 4 you hear, 3 you touch, 2 you smell, 1 you taste - come back to the present',
-                        'duration': '3 minutes'
-                    },
-                    {
-                        'title': 'Safe Place Visualization',
-                        'description': 'Close your eyes and imagine a place where you feel completely safe and calm',
-                        'duration': '5 minutes'
-                    },
-                    {
-                        'title': 'Gentle Self-Talk',
-                        'description': 'Remind yourself: "I am safe now. That was then, this is now. I survived."',
-                        'duration': '2 minutes'
-                    }
-                ],
-                'disgust': [
-                    {
-                        'title': 'Cleansing Breath',
-                        'description': 'Take 5 deep breaths, imagining you are clearing negativity',
-                        'duration': '2 minutes'
-                    },
-                    {
-                        'title': 'Washing Ritual',
-                        'description': 'Wash your hands mindfully and take deep breaths - this feeling will pass',
-                        'duration': '2 minutes'
-                    }
-                ]
-            }
-        
-        return remedies.get(emotion, remedies.get('neutral', []))
+        remedies = get_catalog('camera_remedies')['hi' if language == 'hi' else 'en']
+        return remedies.get(emotion, remedies.get('neutral', ()))
     
     def _get_emotion_color(self, emotion: str) -> str:
         """Get color coding for emotions."""
@@ -732,13 +748,14 @@ class CameraAnalysis:
         
         st.subheader("📊 Emotion Analysis Timeline")
         
-        if len(self.emotion_data) < 2:
+        history = self.analysis_history()
+        if len(history) < 2:
             return
             
         # Prepare data
-        timestamps = [datetime.fromtimestamp(d['timestamp']) for d in self.emotion_data]
-        emotions = [d['primary_emotion'] for d in self.emotion_data]
-        confidences = [d['confidence'] for d in self.emotion_data]
+        timestamps = [datetime.fromtimestamp(d['timestamp']) for d in history]
+        emotions = [d['primary_emotion'] for d in history]
+        confidences = [d['confidence'] for d in history]
         
         # Create timeline chart
         fig = go.Figure()
@@ -783,3 +800,4 @@ class CameraAnalysis:
         st.plotly_chart(fig, use_container_width=True)
     
 
+register_offloader('camera_analysis', lambda camera: camera.offload_old_analyses())
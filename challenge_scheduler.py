@@ -0,0 +1,75 @@
+"""
+Deterministic daily challenge selection.
+A user's challenge for a day is derived from a stable hash of
+(user, date, difficulty) over the read-only challenge catalog, so every
+worker, device and rerun agrees on "today's challenge" without storing it.
+"""
+
+import hashlib
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from content_catalog import get_catalog
+
+class ChallengeScheduler:
+    def __init__(self, catalog_name: str = 'daily_challenges'):
+        """
+        Initialize the scheduler.
+
+        Args:
+            catalog_name: Content catalog holding difficulty -> category -> challenges
+        """
+        self.catalog_name = catalog_name
+
+    def _seed(self, user_id: str, day: date, difficulty: str) -> int:
+        """Stable 64-bit seed; unlike hash(), identical in every process."""
+        key = f"{user_id}|{day.isoformat()}|{difficulty}".encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+    def challenge_for(self, user_id: str, day: date, difficulty: str = 'beginner') -> Optional[Dict]:
+        """
+        Get the challenge scheduled for a user on a given day.
+
+        Picks a category uniformly, then a challenge within it, matching the
+        distribution of the previous random selection.
+
+        Args:
+            user_id: Stable user identifier
+            day: Calendar date
+            difficulty: 'beginner', 'intermediate' or 'advanced'
+
+        Returns:
+            New dictionary with the challenge plus 'date' and 'difficulty',
+            or None if the difficulty has no challenges
+        """
+        catalog = get_catalog(self.catalog_name)
+        categories = catalog.keys(difficulty)
+        if not categories:
+            return None
+
+        seed = self._seed(user_id, day, difficulty)
+        category = categories[seed % len(categories)]
+        challenges = catalog[difficulty][category]
+        challenge = challenges[(seed // len(categories)) % len(challenges)]
+
+        scheduled = dict(challenge)
+        scheduled['date'] = day.isoformat()
+        scheduled['difficulty'] = difficulty
+        return scheduled
+
+    def calendar(self, user_id: str, difficulty: str, start: date, days: int) -> List[Dict]:
+        """
+        Precompute a user's challenges for a run of days.
+
+        Args:
+            user_id: Stable user identifier
+            difficulty: Challenge difficulty
+            start: First day
+            days: Number of days
+
+        Returns:
+            One scheduled challenge per day, in date order
+        """
+        return [
+            self.challenge_for(user_id, start + timedelta(days=offset), difficulty)
+            for offset in range(days)
+        ]
@@ -0,0 +1,108 @@
+"""
+Windowed rendering of the chat transcript.
+Only the newest messages are rendered, CHAT_PAGE_SIZE more per "load
+earlier" click, and each message's HTML block is cached by (message id,
+language), so a rerun costs the same however long the transcript grows.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Tuple
+import streamlit as st
+from translations import get_text
+from metrics import registry
+
+# Messages shown initially and added per "load earlier" click
+CHAT_PAGE_SIZE = 30
+# Rendered blocks kept, shared by all sessions
+RENDER_CACHE_SIZE = 5000
+
+def message_id(message: Mapping) -> str:
+    """Stable id of a message: its timestamp, role and content hash (cached on the string)."""
+    return f"{message.get('timestamp')}|{message.get('role')}|{hash(message.get('content')):x}"
+
+class RenderCache:
+    """LRU cache of rendered message blocks keyed by (message id, language)."""
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, message: Mapping, language: str) -> str:
+        key = (message_id(message), language)
+        with self._lock:
+            block = self._entries.get(key)
+            if block is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
+        block = render_message(message, language)
+        with self._lock:
+            self._entries[key] = block
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return block
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+_render_cache = RenderCache()
+registry.register_stats('chat_render_cache', _render_cache.stats, counters=('hits', 'misses'), gauges=('entries',))
+
+def get_render_cache() -> RenderCache:
+    return _render_cache
+
+def render_message(message: Mapping, language: str) -> str:
+    """HTML block for one chat message."""
+    if message["role"] == "user":
+        emotion = f'<small style="color: #CCCCCC;">{get_text("emotion", language)}: {message["emotion"]}/10</small>' if "emotion" in message else ''
+        return f"""
+        <div style="background: rgba(58, 134, 255, 0.1); border: 1px solid rgba(58, 134, 255, 0.3); border-radius: 15px; padding: 1rem; margin: 1rem 0; margin-left: 2rem;">
+            <div style="color: #3A86FF; font-weight: bold; margin-bottom: 0.5rem;">👤 You</div>
+            <div style="color: #FFFFFF;">{message["content"]}</div>
+            {emotion}
+        </div>
+        """
+    return f"""
+        <div style="background: rgba(157, 78, 221, 0.1); border: 1px solid rgba(157, 78, 221, 0.3); border-radius: 15px; padding: 1rem; margin: 1rem 0; margin-right: 2rem;">
+            <div style="color: #9D4EDD; font-weight: bold; margin-bottom: 0.5rem;">🤖 AI Therapist</div>
+            <div style="color: #FFFFFF;">{message["content"]}</div>
+        </div>
+        """
+
+def visible_window(history: List[Mapping], shown: int) -> Tuple[int, List[Mapping]]:
+    """
+    The newest messages to render.
+
+    Args:
+        history: Full chat history
+        shown: Number of messages the session asked to see
+
+    Returns:
+        (number of earlier messages hidden, messages to render)
+    """
+    start = max(0, len(history) - shown)
+    return start, history[start:]
+
+def reset_chat_window():
+    """Go back to showing one page, e.g. when another session is opened."""
+    st.session_state.chat_window = CHAT_PAGE_SIZE
+
+def display_chat_window(history: List[Mapping], language: str):
+    """Render the newest page(s) of the transcript with a "load earlier" pager."""
+    shown = st.session_state.setdefault('chat_window', CHAT_PAGE_SIZE)
+    hidden, messages = visible_window(history, shown)
+
+    if hidden:
+        label = get_text("load_earlier", language).format(count=min(hidden, CHAT_PAGE_SIZE), total=hidden)
+        if st.button(label, key="load_earlier_messages"):
+            st.session_state.chat_window = shown + CHAT_PAGE_SIZE
+            st.rerun()
+
+    for message in messages:
+        st.markdown(_render_cache.get_or_render(message, language), unsafe_allow_html=True)
@@ -0,0 +1,173 @@
+"""
+Compact per-user index of challenge completions.
+Completed days are bits in one integer bitset keyed by day offset from an
+origin date, and points are kept as a prefix-sum array, so streaks, range
+counts and point totals come from a few word-level bit operations instead
+of scanning a list of completed challenge dicts.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+class CompletionIndex:
+    def __init__(self, origin: Optional[date] = None):
+        """
+        Create an empty index.
+
+        Args:
+            origin: Day stored at bit 0; defaults to the first recorded day
+        """
+        self.origin = origin
+        self.bits = 0
+        # points_prefix[i] = points earned on days before offset i
+        self.points_prefix = [0]
+        self.total_completions = 0
+        self.longest_streak = 0
+
+    @classmethod
+    def from_history(cls, history: Iterable[Dict]) -> 'CompletionIndex':
+        """
+        Back-fill an index from existing challenge history entries.
+
+        Args:
+            history: Dicts with 'completed_date' (YYYY-MM-DD) and 'points'
+
+        Returns:
+            Populated index
+        """
+        index = cls()
+        for entry in history:
+            completed_date = entry.get('completed_date')
+            if not completed_date:
+                continue
+            try:
+                day = datetime.strptime(completed_date, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                continue
+            index.record(day, entry.get('points', 0))
+        return index
+
+    def _offset(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def _rebase(self, new_origin: date):
+        """Move the origin earlier so an older day fits at a non-negative offset."""
+        shift = (self.origin - new_origin).days
+        self.bits <<= shift
+        self.points_prefix = [0] * shift + self.points_prefix
+        self.origin = new_origin
+
+    def record(self, day: date, points: int = 0):
+        """
+        Record a completed challenge.
+
+        Args:
+            day: Completion date
+            points: Points earned
+        """
+        if self.origin is None:
+            self.origin = day
+        elif day < self.origin:
+            self._rebase(day)
+
+        offset = self._offset(day)
+        prefix = self.points_prefix
+        if len(prefix) < offset + 2:
+            prefix.extend([prefix[-1]] * (offset + 2 - len(prefix)))
+        # Only days at or after this one shift; completions are normally today
+        for i in range(offset + 1, len(prefix)):
+            prefix[i] += points
+
+        self.total_completions += 1
+        bit = 1 << offset
+        if not self.bits & bit:
+            self.bits |= bit
+            # Setting one bit can only merge neighbouring runs
+            self.longest_streak = max(self.longest_streak, self._run_length(offset))
+
+    def _run_start(self, offset: int) -> int:
+        """First day of the run of completed days ending at offset."""
+        gaps_below = ~self.bits & ((1 << offset) - 1)
+        return gaps_below.bit_length()
+
+    def _run_length(self, offset: int) -> int:
+        """Length of the run of completed days containing offset."""
+        above = ~(self.bits >> offset)
+        end = (above & -above).bit_length() - 1  # first gap at or after offset
+        return offset + end - self._run_start(offset)
+
+    def is_completed(self, day: date) -> bool:
+        if self.origin is None or day < self.origin:
+            return False
+        return bool(self.bits >> self._offset(day) & 1)
+
+    def current_streak(self, today: date) -> int:
+        """
+        Consecutive completed days ending today, or yesterday if today is not done yet.
+
+        Args:
+            today: Reference date
+
+        Returns:
+            Streak length in days
+        """
+        if self.origin is None:
+            return 0
+        if not self.is_completed(today):
+            today -= timedelta(days=1)
+            if not self.is_completed(today):
+                return 0
+        offset = self._offset(today)
+        return offset - self._run_start(offset) + 1
+
+    def completed_days(self, start: date, end: date) -> int:
+        """Number of days with a completion in [start, end]."""
+        if self.origin is None or end < start:
+            return 0
+        first = max(self._offset(start), 0)
+        last = self._offset(end)
+        if last < first:
+            return 0
+        return ((self.bits >> first) & ((1 << (last - first + 1)) - 1)).bit_count()
+
+    def points_between(self, start: date, end: date) -> int:
+        """Points earned in [start, end]."""
+        if self.origin is None or end < start:
+            return 0
+        prefix = self.points_prefix
+        first = min(max(self._offset(start), 0), len(prefix) - 1)
+        last = min(max(self._offset(end) + 1, 0), len(prefix) - 1)
+        return prefix[last] - prefix[first]
+
+    @property
+    def total_points(self) -> int:
+        return self.points_prefix[-1]
+
+    def year_heatmap(self, year: int) -> np.ndarray:
+        """
+        Points per day for a calendar year laid out as weekday x week.
+
+        Args:
+            year: Calendar year
+
+        Returns:
+            Array of shape (7, 54); rows are Monday..Sunday, -1 marks cells
+            outside the year
+        """
+        heatmap = np.full((7, 54), -1, dtype=np.int32)
+        first_day = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - first_day).days
+
+        cells = np.arange(days) + first_day.weekday()
+        values = np.zeros(days, dtype=np.int32)
+
+        if self.origin is not None:
+            prefix = np.asarray(self.points_prefix, dtype=np.int64)
+            offsets = np.arange(days) + self._offset(first_day)
+            lower = np.clip(offsets, 0, len(prefix) - 1)
+            upper = np.clip(offsets + 1, 0, len(prefix) - 1)
+            values = (prefix[upper] - prefix[lower]).astype(np.int32)
+
+        heatmap[cells % 7, cells // 7] = values
+        return heatmap
@@ -0,0 +1,167 @@
+"""
+Read-only content catalogs shared by every session in the process.
+Static content (remedies, exercises, challenges, meditations) lives in
+JSON/TOML files under content/. Each file is parsed once, frozen so no
+session can mutate it, indexed by path and id, and reloaded when the file
+changes on disk.
+"""
+
+import json
+import os
+import threading
+import time
+import tomllib
+from typing import Any, Dict, Optional, Tuple
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content')
+
+# Seconds between file modification checks for hot reload
+RELOAD_CHECK_INTERVAL = 2.0
+
+class FrozenDict(dict):
+    """Dictionary that rejects mutation but still serializes and copies like a dict."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Catalog content is read-only; copy it with dict(...) first")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class ContentCatalog:
+    def __init__(self, path: str):
+        """
+        Load a catalog file.
+
+        Args:
+            path: Path to a .json or .toml file
+        """
+        self.path = path
+        self.data = FrozenDict()
+        self._entries = {}
+        self._ids = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Parse, freeze and index the file, then swap it in."""
+        mtime = os.path.getmtime(self.path)
+        if self.path.endswith('.toml'):
+            with open(self.path, 'rb') as f:
+                raw = tomllib.load(f)
+        else:
+            with open(self.path, encoding='utf-8') as f:
+                raw = json.load(f)
+
+        data = freeze(raw)
+        entries, ids = {}, {}
+        self._index(data, (), entries, ids)
+
+        # Readers only ever see a complete catalog
+        self.data, self._entries, self._ids, self._mtime = data, entries, ids, mtime
+
+    def _index(self, node: Any, path: Tuple[str, ...], entries: Dict, ids: Dict):
+        """Register every entry with an 'id' under each prefix of its parent path."""
+        if isinstance(node, dict) and 'id' in node and path:
+            parent = path[:-1] if isinstance(node.get('id'), str) and path[-1] == node['id'] else path
+            for depth in range(len(parent) + 1):
+                prefix = parent[:depth]
+                entries.setdefault(prefix, []).append(node)
+                ids.setdefault(prefix, {}).setdefault(node['id'], node)
+            return
+
+        if isinstance(node, dict):
+            for key, child in node.items():
+                self._index(child, path + (key,), entries, ids)
+        elif isinstance(node, tuple):
+            for child in node:
+                self._index(child, path, entries, ids)
+
+        if path == ():
+            for prefix in entries:
+                entries[prefix] = tuple(entries[prefix])
+
+    def reload_if_changed(self):
+        """Reload the file if it changed on disk, checking at most every RELOAD_CHECK_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+
+        if changed:
+            with self._lock:
+                try:
+                    self._load()
+                except Exception as e:
+                    # Keep serving the previous version until the file is fixed
+                    print(f"Error reloading content catalog {self.path}: {e}")
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def get(self, *path: str, default: Any = None) -> Any:
+        """Follow a path of keys, returning default if any key is missing."""
+        node = self.data
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return default
+            node = node[key]
+        return node
+
+    def keys(self, *path: str) -> Tuple[str, ...]:
+        """Keys of the mapping at path, e.g. the categories of a language."""
+        node = self.get(*path, default={})
+        return tuple(node.keys()) if isinstance(node, dict) else ()
+
+    def entries(self, *path: str) -> Tuple[Any, ...]:
+        """All id-bearing entries under path, in file order."""
+        return self._entries.get(tuple(path), ())
+
+    def find(self, entry_id: str, *path: str) -> Optional[Any]:
+        """Look up an entry by id under path, e.g. find('box', 'en')."""
+        return self._ids.get(tuple(path), {}).get(entry_id)
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(name: str) -> ContentCatalog:
+    """
+    Get the process-wide catalog for a content file.
+
+    Args:
+        name: File name under content/ without extension ('.json' or '.toml')
+
+    Returns:
+        Shared, read-only catalog
+    """
+    catalog = _catalogs.get(name)
+    if catalog is not None:
+        catalog.reload_if_changed()
+        return catalog
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(name)
+        if catalog is None:
+            path = os.path.join(CONTENT_DIR, f"{name}.json")
+            if not os.path.exists(path):
+                path = os.path.join(CONTENT_DIR, f"{name}.toml")
+            catalog = ContentCatalog(path)
+            _catalogs[name] = catalog
+        return catalog
@@ -1,230 +1,135 @@
 import streamlit as st
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
+import hashlib
 import json
 from typing import Dict, List
+from content_catalog import get_catalog
+from challenge_scheduler import ChallengeScheduler
+from completion_index import CompletionIndex
+from leaderboard import get_leaderboard
+
+# Number of recent completions kept for the history panel
+HISTORY_DISPLAY_LIMIT = 7
+
+# Shared schedule for sessions without a user id; never posted to the leaderboard
+ANONYMOUS_USER = 'anonymous'
 
 class DailyChallenges:
-    def __init__(self):
+    def __init__(self, user_id: str = None):
+        """
+        Initialize daily challenges.
+        
+        Args:
+            user_id: Stable user identifier used to schedule challenges and post
+                to the leaderboard, e.g. admission.quota_key(); defaults to
+                st.session_state.user_id, or a shared anonymous schedule
+        """
         if 'daily_challenges_data' not in st.session_state:
             st.session_state.daily_challenges_data = {
-                'current_challenge': None,
-                'completed_challenges': [],
                 'challenge_history': [],
-                'streak': 0,
-                'last_completed': None,
-                'total_points': 0
+                'completions': {},
+                'completion_index': CompletionIndex()
             }
         
-        self.challenges_data = self._load_challenges()
+        self.user_id = user_id or st.session_state.get('user_id', ANONYMOUS_USER)
+        self.scheduler = ChallengeScheduler()
+    
+    @property
+    def challenges_data(self) -> Dict:
+        """Challenges by difficulty and category, shared read-only across sessions."""
+        return self._load_challenges()
     
     def _load_challenges(self) -> Dict:
-        """Load daily challenges data."""
-        return {
-            'beginner': {
-                'mindfulness': [
-                    {
-                        'title': 'Mindful Morning',
-                        'description': 'Spend 5 minutes focusing on your breath when you wake up',
-                        'instructions': 'Sit quietly, close your eyes, and breathe naturally. Count each breath from 1 to 10, then start over.',
-                        'duration': '5 minutes',
-                        'points': 10,
-                        'category': 'Mindfulness'
-                    },
-                    {
-                        'title': 'Gratitude Practice',
-                        'description': 'Write down 3 things you are grateful for today',
-                        'instructions': 'Take a moment to think about what went well today. Write down 3 specific things you appreciate.',
-                        'duration': '3 minutes',
-                        'points': 10,
-                        'category': 'Gratitude'
-                    },
-                    {
-                        'title': 'Body Scan Check-in',
-                        'description': 'Do a quick body scan to notice tension',
-                        'instructions': 'Start from your toes and slowly move up to your head. Notice any areas of tension without trying to change them.',
-                        'duration': '5 minutes',
-                        'points': 15,
-                        'category': 'Body Awareness'
-                    }
-                ],
-                'self_care': [
-                    {
-                        'title': 'Hydration Hero',
-                        'description': 'Drink 8 glasses of water throughout the day',
-                        'instructions': 'Keep a water bottle nearby and take sips regularly. Notice how proper hydration affects your mood.',
-                        'duration': 'All day',
-                        'points': 15,
-                        'category': 'Physical Health'
-                    },
-                    {
-                        'title': 'Digital Detox Hour',
-                        'description': 'Spend 1 hour without any digital devices',
-                        'instructions': 'Put away your phone, computer, and TV. Read a book, go for a walk, or have a conversation.',
-                        'duration': '1 hour',
-                        'points': 20,
-                        'category': 'Digital Wellness'
-                    },
-                    {
-                        'title': 'Nature Connection',
-                        'description': 'Spend 10 minutes outdoors in nature',
-                        'instructions': 'Go outside and observe the natural world around you. Feel the sun, breeze, or notice plants and animals.',
-                        'duration': '10 minutes',
-                        'points': 15,
-                        'category': 'Nature'
-                    }
-                ],
-                'social': [
-                    {
-                        'title': 'Kindness Spread',
-                        'description': 'Do one small act of kindness for someone',
-                        'instructions': 'Send a supportive message, help a neighbor, or simply smile at strangers you meet.',
-                        'duration': '5 minutes',
-                        'points': 15,
-                        'category': 'Kindness'
-                    },
-                    {
-                        'title': 'Quality Connection',
-                        'description': 'Have a meaningful conversation with someone you care about',
-                        'instructions': 'Put away distractions and really listen. Ask open-ended questions and share authentically.',
-                        'duration': '15 minutes',
-                        'points': 20,
-                        'category': 'Connection'
-                    }
-                ]
-            },
-            'intermediate': {
-                'mindfulness': [
-                    {
-                        'title': 'Mindful Eating',
-                        'description': 'Eat one meal completely mindfully',
-                        'instructions': 'Eat slowly, notice textures, flavors, and how the food makes you feel. No distractions.',
-                        'duration': '20 minutes',
-                        'points': 25,
-                        'category': 'Mindful Living'
-                    },
-                    {
-                        'title': 'Walking Meditation',
-                        'description': 'Take a 15-minute mindful walk',
-                        'instructions': 'Walk slowly and deliberately. Focus on each step, your surroundings, and your breathing.',
-                        'duration': '15 minutes',
-                        'points': 20,
-                        'category': 'Movement'
-                    }
-                ],
-                'emotional': [
-                    {
-                        'title': 'Emotion Journaling',
-                        'description': 'Write about your emotions for 10 minutes',
-                        'instructions': 'Describe what you felt today, what triggered these emotions, and how you responded.',
-                        'duration': '10 minutes',
-                        'points': 20,
-                        'category': 'Emotional Intelligence'
-                    },
-                    {
-                        'title': 'Forgiveness Practice',
-                        'description': 'Practice forgiving yourself or someone else',
-                        'instructions': 'Think of a situation that bothers you. Try to understand all perspectives and let go of resentment.',
-                        'duration': '10 minutes',
-                        'points': 30,
-                        'category': 'Forgiveness'
-                    }
-                ]
-            },
-            'advanced': {
-                'mindfulness': [
-                    {
-                        'title': 'Silent Observation',
-                        'description': 'Sit in silence for 20 minutes observing thoughts',
-                        'instructions': 'Sit quietly and observe your thoughts without judgment. Notice patterns and let thoughts pass by.',
-                        'duration': '20 minutes',
-                        'points': 35,
-                        'category': 'Deep Practice'
-                    }
-                ],
-                'growth': [
-                    {
-                        'title': 'Fear Facing',
-                        'description': 'Do one thing that scares you (but is safe)',
-                        'instructions': 'Identify a fear that holds you back and take one small step toward facing it today.',
-                        'duration': 'Varies',
-                        'points': 40,
-                        'category': 'Personal Growth'
-                    },
-                    {
-                        'title': 'Value Reflection',
-                        'description': 'Identify and reflect on your core values',
-                        'instructions': 'Write down your top 5 values and think about how well your current life aligns with them.',
-                        'duration': '15 minutes',
-                        'points': 30,
-                        'category': 'Self-Discovery'
-                    }
-                ]
-            }
-        }
+        """Load daily challenges data from the shared content catalog."""
+        return get_catalog('daily_challenges').data
     
     def get_daily_challenge(self, difficulty: str = 'beginner') -> Dict:
         """Get today's daily challenge."""
         today = datetime.now().date()
         
-        # Check if we already have a challenge for today
-        if (st.session_state.daily_challenges_data['current_challenge'] and 
-            st.session_state.daily_challenges_data['current_challenge'].get('date') == str(today)):
-            return st.session_state.daily_challenges_data['current_challenge']
+        challenge = self.scheduler.challenge_for(self.user_id, today, difficulty)
+        if challenge is not None:
+            challenge['completed'] = self._is_completed(challenge['date'])
         
-        # Generate new challenge for today
-        categories = list(self.challenges_data[difficulty].keys())
-        selected_category = random.choice(categories)
-        challenges_in_category = self.challenges_data[difficulty][selected_category]
-        selected_challenge = random.choice(challenges_in_category)
-        
-        # Add metadata
-        selected_challenge['date'] = str(today)
-        selected_challenge['difficulty'] = difficulty
-        selected_challenge['completed'] = False
-        
-        # Store in session state
-        st.session_state.daily_challenges_data['current_challenge'] = selected_challenge
-        
-        return selected_challenge
+        return challenge
+    
+    def _completions(self) -> Dict:
+        """Per-user completion record: date -> {difficulty: challenge id}."""
+        return st.session_state.daily_challenges_data.setdefault('completions', {})
+    
+    def _is_completed(self, date_str: str) -> bool:
+        """One challenge, of any difficulty, can be completed per day."""
+        return bool(self._completions().get(date_str))
+    
+    def _completion_index(self) -> CompletionIndex:
+        """Per-user completion index, back-filled from history saved before it existed."""
+        data = st.session_state.daily_challenges_data
+        index = data.get('completion_index')
+        if index is None:
+            history = data.get('completed_challenges') or data.get('challenge_history', [])
+            index = CompletionIndex.from_history(history)
+            data['completion_index'] = index
+            data['challenge_history'] = [self._history_entry(entry) for entry in history[-HISTORY_DISPLAY_LIMIT:]]
+            for key in ('completed_challenges', 'streak', 'last_completed', 'total_points'):
+                data.pop(key, None)
+        return index
+    
+    def _history_entry(self, challenge: Dict) -> Dict:
+        """Compact record of a completion for the history panel."""
+        return {
+            'id': challenge.get('id'),
+            'title': challenge.get('title', ''),
+            'points': challenge.get('points', 0),
+            'completed_date': challenge.get('completed_date')
+        }
     
     def mark_challenge_complete(self, challenge: Dict):
-        """Mark current challenge as completed."""
-        today = datetime.now().date()
+        """
+        Mark current challenge as completed.
         
-        if challenge and not challenge.get('completed'):
-            # Mark as completed
+        Only the first completion on a day earns credit, whichever difficulty
+        it is, and it is credited to the day the challenge was scheduled for,
+        even if the button is pressed after midnight.
+        """
+        if challenge and not self._is_completed(challenge['date']):
+            day = datetime.strptime(challenge['date'], '%Y-%m-%d').date()
+            
+            # Record completion separately from the scheduled challenge
+            self._completions()[challenge['date']] = {challenge['difficulty']: challenge.get('id')}
             challenge['completed'] = True
-            challenge['completed_date'] = str(today)
             
-            # Add to completed challenges
-            st.session_state.daily_challenges_data['completed_challenges'].append(challenge)
-            st.session_state.daily_challenges_data['challenge_history'].append(challenge)
+            # Streak, points and totals are all derived from the index
+            self._completion_index().record(day, challenge.get('points', 0))
+            if self.user_id != ANONYMOUS_USER:
+                get_leaderboard().add_points(self.user_id, challenge.get('points', 0), day)
             
-            # Update streak
-            last_completed = st.session_state.daily_challenges_data['last_completed']
-            if last_completed:
-                last_date = datetime.strptime(last_completed, '%Y-%m-%d').date()
-                if today - last_date == timedelta(days=1):
-                    st.session_state.daily_challenges_data['streak'] += 1
-                elif today - last_date > timedelta(days=1):
-                    st.session_state.daily_challenges_data['streak'] = 1
-            else:
-                st.session_state.daily_challenges_data['streak'] = 1
-            
-            # Update points and last completed date
-            st.session_state.daily_challenges_data['total_points'] += challenge.get('points', 0)
-            st.session_state.daily_challenges_data['last_completed'] = str(today)
+            history = st.session_state.daily_challenges_data['challenge_history']
+            history.append(self._history_entry(dict(challenge, completed_date=challenge['date'])))
+            del history[:-HISTORY_DISPLAY_LIMIT]
             
             return True
         return False
     
     def get_streak_info(self) -> Dict:
         """Get current streak information."""
+        index = self._completion_index()
+        return {
+            'current_streak': index.current_streak(datetime.now().date()),
+            'longest_streak': index.longest_streak,
+            'total_points': index.total_points,
+            'total_completed': index.total_completions
+        }
+    
+    def get_completion_heatmap(self, year: int = None):
+        """Points per day for a year as a weekday x week grid (see CompletionIndex.year_heatmap)."""
+        return self._completion_index().year_heatmap(year or datetime.now().year)
+    
+    def get_leaderboard_standing(self, window: str = 'all_time', k: int = 10) -> Dict:
+        """Top users and this user's rank for a leaderboard window."""
+        leaderboard = get_leaderboard()
         return {
-            'current_streak': st.session_state.daily_challenges_data['streak'],
-            'total_points': st.session_state.daily_challenges_data['total_points'],
-            'total_completed': len(st.session_state.daily_challenges_data['completed_challenges'])
+            'top': leaderboard.top(window, k),
+            'user': leaderboard.rank(self.user_id, window) if self.user_id != ANONYMOUS_USER else None
         }
     
     def render_challenges_tab(self, language: str = 'en'):
@@ -246,6 +151,14 @@ class DailyChallenges:
                 'next_challenge': 'Come back tomorrow for a new challenge!',
                 'challenge_history': '📈 Challenge History',
                 'no_history': 'Complete your first challenge to see history!',
+                'leaderboard': '🏅 Leaderboard',
+                'your_rank': 'Your rank',
+                'you': 'You',
+                'player': 'Player',
+                'no_leaderboard': 'No points on the leaderboard yet.',
+                'daily': 'Today',
+                'weekly': 'This Week',
+                'all_time': 'All Time',
                 'beginner': 'Beginner',
                 'intermediate': 'Intermediate', 
                 'advanced': 'Advanced'
@@ -266,6 +179,14 @@ class DailyChallenges:
                 'next_challenge': 'नई चुनौती के लिए कल वापस आएं!',
                 'challenge_history': '📈 चुनौती इतिहास',
                 'no_history': 'इतिहास देखने के लिए अपनी पहली चुनौती पूरी करें!',
+                'leaderboard': '🏅 लीडरबोर्ड',
+                'your_rank': 'आपकी रैंक',
+                'you': 'आप',
+                'player': 'खिलाड़ी',
+                'no_leaderboard': 'लीडरबोर्ड पर अभी कोई अंक नहीं।',
+                'daily': 'आज',
+                'weekly': 'इस सप्ताह',
+                'all_time': 'अब तक',
                 'beginner': 'शुरुआती',
                 'intermediate': 'मध्यम',
                 'advanced': 'उन्नत'
@@ -362,7 +283,7 @@ class DailyChallenges:
         if st.session_state.daily_challenges_data['challenge_history']:
             history = st.session_state.daily_challenges_data['challenge_history']
             
-            for i, past_challenge in enumerate(reversed(history[-7:])):  # Show last 7 challenges
+            for i, past_challenge in enumerate(reversed(history)):  # Show last 7 challenges
                 date_str = past_challenge.get('completed_date', 'Unknown')
                 st.markdown(f"""
                 <div style="background: rgba(40, 40, 40, 0.8); border-radius: 10px; padding: 1rem; margin: 0.5rem 0;">
@@ -378,6 +299,38 @@ class DailyChallenges:
         else:
             st.info(t['no_history'])
         
+        # Leaderboard
+        st.markdown("---")
+        st.subheader(t['leaderboard'])
+        
+        window = st.radio(
+            t['leaderboard'],
+            ['daily', 'weekly', 'all_time'],
+            format_func=lambda x: t[x],
+            horizontal=True,
+            label_visibility='collapsed',
+            key='leaderboard_window'
+        )
+        standing = self.get_leaderboard_standing(window)
+        
+        if standing['top']:
+            for entry in standing['top']:
+                is_user = entry['user_id'] == self.user_id
+                name_color = '#39FF14' if is_user else '#FFFFFF'
+                # Ids may be session ids, so other players are shown under a short pseudonym
+                name = t['you'] if is_user else f"{t['player']} {hashlib.sha256(entry['user_id'].encode('utf-8')).hexdigest()[:6]}"
+                st.markdown(f"""
+                <div style="display: flex; justify-content: space-between; background: rgba(40, 40, 40, 0.8); border-radius: 10px; padding: 0.6rem 1rem; margin: 0.3rem 0;">
+                    <span style="color: {name_color};"><strong style="color: #9D4EDD;">#{entry['rank']}</strong> {name}</span>
+                    <span style="color: #39FF14; font-weight: bold;">{entry['points']} pts</span>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            if standing['user']:
+                st.caption(f"{t['your_rank']}: #{standing['user']['rank']} / {standing['user']['total_users']}")
+        else:
+            st.info(t['no_leaderboard'])
+        
         # Back to Chatbot button
         st.markdown("---")
         if st.button("💬 Back to Chatbot", key="challenges_to_chat", type="secondary"):
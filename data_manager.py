@@ -1,18 +1,175 @@
 import json
+import re
 import pandas as pd
+from collections.abc import Mapping
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 import streamlit as st
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+from json_stream import JsonStreamReader, JsonStreamError, stream_size
+from emotion_taxonomy import LEVEL_LABELS, clip_levels
+from tracing import traced
+from metrics import registry, timed
+from records import as_dicts, compact_emotion, compact_message, compact_records, plain
+
+EXPORT_SECONDS = registry.histogram('data_export_seconds', 'Time to serialise a full data export')
+IMPORTED_RECORDS = registry.counter('imported_records_total', 'Records read by streaming imports', ('kind', 'outcome'))
+
+def classify_trend(avg_first: float, avg_last: float) -> str:
+    """Classify an emotion trend from the averages of the first and last windows."""
+    difference = avg_last - avg_first
+    
+    if difference > 0.5:
+        return 'improving'
+    elif difference < -0.5:
+        return 'declining'
+    else:
+        return 'stable'
+
+def _parse_date(timestamp: str):
+    """Parse the calendar date of an ISO timestamp, or None if unparseable."""
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).date()
+    except Exception:
+        return None
+
+class RunningStats:
+    """
+    Incremental statistics over chat and emotion histories.
+    
+    Every record is folded in once when it is appended, so reading counts,
+    averages, extremes, time span and trend is O(1) regardless of history size.
+    Emotion values are kept as a prefix-sum array, which gives the average of
+    any trend window with two lookups.
+    """
+    
+    # Fixed characters json.dumps adds around {'chat': [...], 'emotions': [...]}
+    _JSON_ENVELOPE_CHARS = len(json.dumps({'chat': [], 'emotions': []}))
+    
+    def __init__(self):
+        self.reset_chat()
+        self.reset_emotions()
+    
+    def reset_chat(self):
+        """Forget all chat message statistics."""
+        self.total_chat_messages = 0
+        self.user_messages = 0
+        self.bot_messages = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.first_date = None
+        self.last_date = None
+        self.chat_json_chars = 0
+    
+    def reset_emotions(self):
+        """Forget all emotion entry statistics."""
+        self.total_emotion_entries = 0
+        self.emotion_sum = 0
+        self.emotion_min = None
+        self.emotion_max = None
+        self.emotion_prefix_sums = [0]
+        self.emotion_json_chars = 0
+    
+    def add_message(self, msg: Dict):
+        """Fold one chat message into the statistics."""
+        self.total_chat_messages += 1
+        role = msg.get('role')
+        if role == 'user':
+            self.user_messages += 1
+        elif role == 'assistant':
+            self.bot_messages += 1
+        
+        timestamp = msg.get('timestamp')
+        if timestamp:
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+                self.first_date = _parse_date(timestamp)
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+                self.last_date = _parse_date(timestamp)
+        
+        self.chat_json_chars += len(json.dumps(msg, default=plain))
+    
+    def add_emotion(self, entry: Dict):
+        """Fold one emotion entry into the statistics."""
+        emotion = entry['emotion']
+        self.total_emotion_entries += 1
+        self.emotion_sum += emotion
+        self.emotion_prefix_sums.append(self.emotion_prefix_sums[-1] + emotion)
+        if self.emotion_min is None or emotion < self.emotion_min:
+            self.emotion_min = emotion
+        if self.emotion_max is None or emotion > self.emotion_max:
+            self.emotion_max = emotion
+        
+        self.emotion_json_chars += len(json.dumps(entry, default=plain))
+    
+    def rebuild(self, chat_history: List[Dict], emotion_history: List[Dict]):
+        """Recompute everything from scratch, e.g. after importing data."""
+        self.reset_chat()
+        self.reset_emotions()
+        for msg in chat_history:
+            self.add_message(msg)
+        for entry in emotion_history:
+            self.add_emotion(entry)
+    
+    @property
+    def average_emotion(self) -> float:
+        return self.emotion_sum / self.total_emotion_entries
+    
+    @property
+    def session_span_days(self) -> int:
+        if self.first_date is None or self.last_date is None:
+            return 0
+        return (self.last_date - self.first_date).days
+    
+    @property
+    def json_size_chars(self) -> int:
+        """Length of json.dumps({'chat': chat_history, 'emotions': emotion_history})."""
+        separators = 2 * (max(self.total_chat_messages - 1, 0) + max(self.total_emotion_entries - 1, 0))
+        return self._JSON_ENVELOPE_CHARS + self.chat_json_chars + self.emotion_json_chars + separators
+    
+    def emotion_trend(self) -> str:
+        """Compare the first and last thirds of the emotion history."""
+        n = self.total_emotion_entries
+        if n < 2:
+            return 'insufficient_data'
+        
+        # Same windows as slicing emotions[:n//3] and emotions[-n//3:]
+        first_count = n // 3 if n >= 9 else 1
+        last_count = -(-n // 3) if n >= 9 else 1
+        
+        prefix = self.emotion_prefix_sums
+        avg_first = prefix[first_count] / first_count
+        avg_last = (prefix[n] - prefix[n - last_count]) / last_count
+        
+        return classify_trend(avg_first, avg_last)
 
 class DataManager:
     def __init__(self):
         """Initialize data manager for handling user data storage and export."""
-        pass
+        self.stats = RunningStats()
+        # Lists the running statistics currently describe
+        self._chat_source = None
+        self._emotion_source = None
     
+    @traced('data.export', lambda self, chat_history, emotion_history: {
+        'chat.messages': len(chat_history), 'emotion.entries': len(emotion_history)
+    }, lambda exported: {'payload.chars': len(exported)})
+    @timed(EXPORT_SECONDS)
     def export_all_data(self, chat_history: List[Dict], emotion_history: List[Dict]) -> str:
         """
         Export all user data to JSON format.
         
+        Statistics are computed afresh from the given lists rather than from
+        the session's running statistics, so this may run on a background
+        thread over a snapshot while the script thread keeps appending.
+        
         Args:
             chat_history: Chat conversation history
             emotion_history: Emotion tracking history
@@ -26,11 +183,11 @@ class DataManager:
             'user_data': {
                 'chat_history': chat_history,
                 'emotion_history': emotion_history,
-                'statistics': self._calculate_statistics(chat_history, emotion_history)
+                'statistics': self._calculate_statistics(chat_history, emotion_history, fresh=True)
             }
         }
         
-        return json.dumps(export_data, indent=2, ensure_ascii=False)
+        return json.dumps(export_data, indent=2, ensure_ascii=False, default=plain)
     
     def export_chat_history_csv(self, chat_history: List[Dict]) -> str:
         """
@@ -45,7 +202,7 @@ class DataManager:
         if not chat_history:
             return "timestamp,role,content,emotion\n"
         
-        df = pd.DataFrame(chat_history)
+        df = pd.DataFrame(as_dicts(chat_history))
         return df.to_csv(index=False)
     
     def export_emotion_history_csv(self, emotion_history: List[Dict]) -> str:
@@ -61,72 +218,255 @@ class DataManager:
         if not emotion_history:
             return "timestamp,emotion\n"
         
-        df = pd.DataFrame(emotion_history)
+        df = pd.DataFrame(as_dicts(emotion_history))
         return df.to_csv(index=False)
     
-    def _calculate_statistics(self, chat_history: List[Dict], emotion_history: List[Dict]) -> Dict[str, Any]:
-        """Calculate statistics from user data."""
+    def export_chat_history_columnar(self, chat_history: List[Dict], file_format: str = 'parquet') -> bytes:
+        """
+        Export chat history as a typed columnar file.
+        
+        Args:
+            chat_history: Chat conversation history
+            file_format: 'parquet' or 'arrow' (Arrow IPC file)
+            
+        Returns:
+            File contents as bytes
+        """
+        return self._serialize_table(self._chat_table(chat_history), file_format)
+    
+    def export_emotion_history_columnar(self, emotion_history: List[Dict], file_format: str = 'parquet') -> bytes:
+        """
+        Export emotion history as a typed columnar file.
+        
+        Args:
+            emotion_history: Emotion tracking history
+            file_format: 'parquet' or 'arrow' (Arrow IPC file)
+            
+        Returns:
+            File contents as bytes
+        """
+        return self._serialize_table(self._emotion_table(emotion_history), file_format)
+    
+    def export_partitioned_dataset(self, user_histories: Dict[str, Dict[str, List[Dict]]], base_dir: str,
+                                   file_format: str = 'parquet') -> Dict[str, int]:
+        """
+        Bulk-export many users' histories as datasets partitioned by date.
+        
+        Writes base_dir/chat_history/date=YYYY-MM-DD/... and
+        base_dir/emotion_history/date=YYYY-MM-DD/... (Hive-style), one record
+        batch per user, so downstream jobs can read only the days they need.
+        
+        Args:
+            user_histories: user_id -> {'chat_history': [...], 'emotion_history': [...]}
+            base_dir: Output directory
+            file_format: 'parquet' or 'arrow'
+            
+        Returns:
+            Number of rows written per history kind
+        """
+        self._require_pyarrow()
+        dataset_format = 'ipc' if file_format == 'arrow' else 'parquet'
+        builders = {'chat_history': self._chat_table, 'emotion_history': self._emotion_table}
+        rows_written = {}
+        
+        for kind, build_table in builders.items():
+            schema = self._with_partition_columns(build_table([]).schema)
+            rows_written[kind] = 0
+            
+            def batches():
+                for user_id, histories in user_histories.items():
+                    table = self._add_partition_columns(build_table(histories.get(kind, [])), user_id)
+                    rows_written[kind] += table.num_rows
+                    yield from table.to_batches()
+            
+            ds.write_dataset(
+                batches(),
+                f"{base_dir}/{kind}",
+                schema=schema,
+                format=dataset_format,
+                partitioning=ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive'),
+                existing_data_behavior='overwrite_or_ignore'
+            )
+        
+        return rows_written
+    
+    def _require_pyarrow(self):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Columnar export requires pyarrow")
+    
+    def _timestamp_array(self, records: List[Dict]):
+        """
+        Parse ISO timestamp strings into a naive Arrow timestamp column.
+        
+        Imported data may mix naive and offset timestamps; offset ones are
+        converted to UTC, naive ones are kept as they are.
+        """
+        timestamps = pd.to_datetime(
+            pd.Series([record.get('timestamp') for record in records], dtype=object),
+            format='ISO8601',
+            errors='coerce',
+            utc=True
+        ).dt.tz_convert(None)
+        return pa.array(timestamps, type=pa.timestamp('us'), from_pandas=True)
+    
+    def _emotion_columns(self, records: List[Dict]):
+        """Emotion level as int8 plus its dictionary-encoded label; fractional levels are rounded."""
+        levels = [None if record.get('emotion') is None else round(record['emotion']) for record in records]
+        emotion = pa.array(levels, type=pa.int8())
+        
+        labels = [None] * len(levels)
+        known = [i for i, level in enumerate(levels) if level is not None]
+        if known:
+            names = LEVEL_LABELS['en'][clip_levels([levels[i] for i in known])]
+            for i, name in zip(known, names):
+                labels[i] = name
+        label = pa.array(pd.Categorical(labels), type=pa.dictionary(pa.int8(), pa.string()))
+        
+        return emotion, label
+    
+    def _chat_table(self, chat_history: List[Dict]):
+        self._require_pyarrow()
+        emotion, emotion_label = self._emotion_columns(chat_history)
+        return pa.table({
+            'timestamp': self._timestamp_array(chat_history),
+            'role': pa.array(pd.Categorical([msg.get('role') for msg in chat_history]),
+                             type=pa.dictionary(pa.int8(), pa.string())),
+            'content': pa.array([msg.get('content') for msg in chat_history], type=pa.string()),
+            'emotion': emotion,
+            'emotion_label': emotion_label
+        })
+    
+    def _emotion_table(self, emotion_history: List[Dict]):
+        self._require_pyarrow()
+        emotion, emotion_label = self._emotion_columns(emotion_history)
+        return pa.table({
+            'timestamp': self._timestamp_array(emotion_history),
+            'emotion': emotion,
+            'emotion_label': emotion_label
+        })
+    
+    def _with_partition_columns(self, schema):
+        return schema.append(pa.field('user_id', pa.dictionary(pa.int32(), pa.string()))).append(
+            pa.field('date', pa.date32()))
+    
+    def _add_partition_columns(self, table, user_id: str):
+        user_ids = pa.DictionaryArray.from_arrays(
+            pa.array([0] * table.num_rows, type=pa.int32()),
+            pa.array([str(user_id)], type=pa.string())
+        )
+        dates = table.column('timestamp').cast(pa.date32())
+        return table.append_column('user_id', user_ids).append_column('date', dates)
+    
+    def _serialize_table(self, table, file_format: str) -> bytes:
+        sink = pa.BufferOutputStream()
+        if file_format == 'arrow':
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        elif file_format == 'parquet':
+            pq.write_table(table, sink)
+        else:
+            raise ValueError(f"Unsupported columnar format: {file_format}")
+        return sink.getvalue().to_pybytes()
+    
+    def _sync_stats(self, chat_history: Optional[List[Dict]], emotion_history: Optional[List[Dict]]) -> RunningStats:
+        """
+        Bring the running statistics up to date with the given histories.
+        
+        Records appended since the last call are folded in; a different or
+        shortened list triggers a rebuild. Passing None leaves that side as is.
+        """
+        stats = self.stats
+        
+        if chat_history is not None:
+            if chat_history is not self._chat_source or len(chat_history) < stats.total_chat_messages:
+                stats.reset_chat()
+                self._chat_source = chat_history
+            for msg in chat_history[stats.total_chat_messages:]:
+                stats.add_message(msg)
+        
+        if emotion_history is not None:
+            if emotion_history is not self._emotion_source or len(emotion_history) < stats.total_emotion_entries:
+                stats.reset_emotions()
+                self._emotion_source = emotion_history
+            for entry in emotion_history[stats.total_emotion_entries:]:
+                stats.add_emotion(entry)
+        
+        return stats
+    
+    def rebuild_statistics(self, chat_history: List[Dict], emotion_history: List[Dict]) -> RunningStats:
+        """
+        Recompute the running statistics from scratch, e.g. after an import.
+        
+        Args:
+            chat_history: Chat conversation history
+            emotion_history: Emotion tracking history
+            
+        Returns:
+            The rebuilt statistics
+        """
+        self.stats.rebuild(chat_history, emotion_history)
+        self._chat_source = chat_history
+        self._emotion_source = emotion_history
+        return self.stats
+    
+    def append_message(self, chat_history: List[Dict], message: Dict):
+        """Append a chat message, stored compactly when it fits, and update the running statistics."""
+        self._sync_stats(chat_history, None)
+        message = compact_message(message)
+        chat_history.append(message)
+        self.stats.add_message(message)
+    
+    def append_emotion(self, emotion_history: List[Dict], entry: Dict):
+        """Append an emotion entry, stored compactly when it fits, and update the running statistics."""
+        self._sync_stats(None, emotion_history)
+        entry = compact_emotion(entry)
+        emotion_history.append(entry)
+        self.stats.add_emotion(entry)
+    
+    def count_user_messages(self, chat_history: List[Dict]) -> int:
+        """Number of user messages in the chat history."""
+        return self._sync_stats(chat_history, None).user_messages
+    
+    def average_emotion(self, emotion_history: List[Dict]):
+        """Average emotion level, or None if there are no entries."""
+        stats = self._sync_stats(None, emotion_history)
+        return stats.average_emotion if stats.total_emotion_entries else None
+    
+    def _calculate_statistics(self, chat_history: List[Dict], emotion_history: List[Dict],
+                              fresh: bool = False) -> Dict[str, Any]:
+        """Calculate statistics from user data; fresh=True leaves the running statistics untouched."""
+        if fresh:
+            running = RunningStats()
+            running.rebuild(chat_history, emotion_history)
+        else:
+            running = self._sync_stats(chat_history, emotion_history)
+        
         stats = {
-            'total_chat_messages': len(chat_history),
-            'total_emotion_entries': len(emotion_history),
-            'user_messages': len([msg for msg in chat_history if msg.get('role') == 'user']),
-            'bot_messages': len([msg for msg in chat_history if msg.get('role') == 'assistant'])
+            'total_chat_messages': running.total_chat_messages,
+            'total_emotion_entries': running.total_emotion_entries,
+            'user_messages': running.user_messages,
+            'bot_messages': running.bot_messages
         }
         
         # Emotion statistics
-        if emotion_history:
-            emotions = [entry['emotion'] for entry in emotion_history]
+        if running.total_emotion_entries:
             stats.update({
-                'average_emotion': sum(emotions) / len(emotions),
-                'highest_emotion': max(emotions),
-                'lowest_emotion': min(emotions),
-                'emotion_trend': self._calculate_emotion_trend(emotions)
+                'average_emotion': running.average_emotion,
+                'highest_emotion': running.emotion_max,
+                'lowest_emotion': running.emotion_min,
+                'emotion_trend': running.emotion_trend()
             })
         
         # Time-based statistics
-        if chat_history:
-            timestamps = [msg.get('timestamp') for msg in chat_history if msg.get('timestamp')]
-            if timestamps:
-                stats.update({
-                    'first_session': min(timestamps),
-                    'last_session': max(timestamps),
-                    'session_span_days': self._calculate_day_span(timestamps)
-                })
+        if running.first_timestamp:
+            stats.update({
+                'first_session': running.first_timestamp,
+                'last_session': running.last_timestamp,
+                'session_span_days': running.session_span_days
+            })
         
         return stats
     
-    def _calculate_emotion_trend(self, emotions: List[int]) -> str:
-        """Calculate overall emotion trend."""
-        if len(emotions) < 2:
-            return 'insufficient_data'
-        
-        # Simple trend calculation using first and last thirds
-        first_third = emotions[:len(emotions)//3] if len(emotions) >= 9 else emotions[:1]
-        last_third = emotions[-len(emotions)//3:] if len(emotions) >= 9 else emotions[-1:]
-        
-        avg_first = sum(first_third) / len(first_third)
-        avg_last = sum(last_third) / len(last_third)
-        
-        difference = avg_last - avg_first
-        
-        if difference > 0.5:
-            return 'improving'
-        elif difference < -0.5:
-            return 'declining'
-        else:
-            return 'stable'
-    
-    def _calculate_day_span(self, timestamps: List[str]) -> int:
-        """Calculate number of days between first and last session."""
-        try:
-            dates = [datetime.fromisoformat(ts.replace('Z', '+00:00')).date() 
-                    for ts in timestamps if ts]
-            if len(dates) >= 2:
-                return (max(dates) - min(dates)).days
-            return 0
-        except Exception:
-            return 0
-    
     def import_data(self, json_data: str) -> Dict[str, Any]:
         """
         Import data from JSON string.
@@ -143,6 +483,138 @@ class DataManager:
         except json.JSONDecodeError:
             return {}
     
+    def import_stream(self, stream, sink: Optional[Callable[[str, List[Dict]], None]] = None,
+                      batch_size: int = 500,
+                      progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Import data record by record from a stream.
+        
+        Accepts the JSON document written by export_all_data, a JSON array of
+        records, or newline-delimited JSON (one record per line). Records with
+        a 'role' are chat messages, others are emotion entries. Each record is
+        validated as it is read and valid ones are written in batches, so the
+        whole upload is never held in memory.
+        
+        Args:
+            stream: File-like object (text or binary), e.g. an uploaded file
+            sink: Called as sink(kind, records) for each batch, where kind is
+                'chat_history' or 'emotion_history'. Defaults to collecting
+                records into report['user_data'].
+            batch_size: Records per batch
+            progress_callback: Called with the report after every batch
+            
+        Returns:
+            Report with format, accepted/rejected counts, bytes read and error
+        """
+        report = {
+            'format': None,
+            'accepted': {'chat_history': 0, 'emotion_history': 0},
+            'rejected': {'chat_history': 0, 'emotion_history': 0, 'malformed': 0},
+            'batches_written': 0,
+            'bytes_read': 0,
+            'total_bytes': stream_size(stream),
+            'error': None
+        }
+        
+        if sink is None:
+            user_data = {'chat_history': [], 'emotion_history': []}
+            report['user_data'] = user_data
+            sink = lambda kind, records: user_data[kind].extend(compact_records(kind, records))
+        
+        reader = JsonStreamReader(stream)
+        batches = {'chat_history': [], 'emotion_history': []}
+        
+        def flush(kind: str):
+            if batches[kind]:
+                sink(kind, batches[kind])
+                batches[kind] = []
+                report['batches_written'] += 1
+                report['bytes_read'] = reader.bytes_read
+                if progress_callback:
+                    progress_callback(report)
+        
+        def handle(kind: Optional[str], record: Any):
+            if kind is None:
+                if not isinstance(record, dict):
+                    report['rejected']['malformed'] += 1
+                    return
+                kind = 'chat_history' if 'role' in record else 'emotion_history'
+            
+            is_valid = self._is_valid_message if kind == 'chat_history' else self._is_valid_emotion_entry
+            if not is_valid(record):
+                report['rejected'][kind] += 1
+                return
+            
+            report['accepted'][kind] += 1
+            batches[kind].append(record)
+            if len(batches[kind]) >= batch_size:
+                flush(kind)
+        
+        try:
+            first_char = reader.peek()
+            if first_char == '[':
+                report['format'] = 'json_array'
+                for record in reader.iter_array():
+                    handle(None, record)
+            elif first_char == '{' and self._is_export_document(reader):
+                report['format'] = 'export'
+                self._stream_export_document(reader, handle)
+            else:
+                report['format'] = 'ndjson'
+                for line in reader.iter_lines():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        report['rejected']['malformed'] += 1
+                        continue
+                    handle(None, record)
+        except JsonStreamError as e:
+            report['error'] = str(e)
+        
+        flush('chat_history')
+        flush('emotion_history')
+        report['bytes_read'] = reader.bytes_read
+        for outcome in ('accepted', 'rejected'):
+            for kind, count in report[outcome].items():
+                if count:
+                    IMPORTED_RECORDS.inc(count, kind=kind, outcome=outcome)
+        
+        if 'user_data' in report:
+            self.rebuild_statistics(report['user_data']['chat_history'], report['user_data']['emotion_history'])
+        
+        return report
+    
+    _EXPORT_KEYS = ('export_timestamp', 'data_version', 'user_data', 'chat_history', 'emotion_history', 'statistics')
+    
+    def _is_export_document(self, reader: JsonStreamReader) -> bool:
+        """Check whether the object at the reader starts like an export_all_data document."""
+        match = re.match(r'\{\s*"((?:[^"\\]|\\.)*)"', reader.lookahead(4096))
+        return bool(match) and match.group(1) in self._EXPORT_KEYS
+    
+    def _stream_export_document(self, reader: JsonStreamReader, handle: Callable[[Optional[str], Any], None]):
+        """Walk an export document, streaming the chat and emotion arrays."""
+        for key in reader.iter_object_keys():
+            if key == 'user_data' and reader.peek() == '{':
+                self._stream_export_document(reader, handle)
+            elif key in ('chat_history', 'emotion_history') and reader.peek() == '[':
+                for record in reader.iter_array():
+                    handle(key, record)
+            else:
+                reader.skip_value()
+    
+    def _is_valid_message(self, msg: Any) -> bool:
+        """Check a single chat message record (a dict or compact record)."""
+        return isinstance(msg, Mapping) and 'role' in msg and 'content' in msg
+    
+    def _is_valid_emotion_entry(self, entry: Any) -> bool:
+        """Check a single emotion entry record (a dict or compact record)."""
+        if not isinstance(entry, Mapping) or 'emotion' not in entry:
+            return False
+        emotion = entry['emotion']
+        if not isinstance(emotion, (int, float)):
+            return False
+        return 1 <= emotion <= 10
+    
     def validate_data_integrity(self, data: Dict) -> bool:
         """
         Validate data integrity.
@@ -162,17 +634,13 @@ class DataManager:
         # Validate chat history structure
         if isinstance(data['chat_history'], list):
             for msg in data['chat_history']:
-                if not isinstance(msg, dict) or 'role' not in msg or 'content' not in msg:
+                if not self._is_valid_message(msg):
                     return False
         
         # Validate emotion history structure
         if isinstance(data['emotion_history'], list):
             for entry in data['emotion_history']:
-                if not isinstance(entry, dict) or 'emotion' not in entry:
-                    return False
-                if not isinstance(entry['emotion'], (int, float)):
-                    return False
-                if entry['emotion'] < 1 or entry['emotion'] > 10:
+                if not self._is_valid_emotion_entry(entry):
                     return False
         
         return True
@@ -206,30 +674,24 @@ class DataManager:
         Returns:
             Summary dictionary
         """
+        running = self._sync_stats(chat_history, emotion_history)
+        
         summary = {
-            'total_conversations': len([msg for msg in chat_history if msg.get('role') == 'user']),
-            'total_emotion_logs': len(emotion_history),
-            'data_size_kb': len(json.dumps({'chat': chat_history, 'emotions': emotion_history})) / 1024
+            'total_conversations': running.user_messages,
+            'total_emotion_logs': running.total_emotion_entries,
+            'data_size_kb': running.json_size_chars / 1024
         }
         
-        if emotion_history:
-            emotions = [entry['emotion'] for entry in emotion_history]
+        if running.total_emotion_entries:
             summary.update({
-                'avg_emotion': round(sum(emotions) / len(emotions), 1),
-                'emotion_range': f"{min(emotions)}-{max(emotions)}"
+                'avg_emotion': round(running.average_emotion, 1),
+                'emotion_range': f"{running.emotion_min}-{running.emotion_max}"
             })
         
-        if chat_history:
-            timestamps = [msg.get('timestamp') for msg in chat_history if msg.get('timestamp')]
-            if timestamps:
-                try:
-                    first_date = min(timestamps)[:10]  # YYYY-MM-DD
-                    last_date = max(timestamps)[:10]
-                    summary.update({
-                        'first_session': first_date,
-                        'last_session': last_date
-                    })
-                except Exception:
-                    pass
+        if running.first_timestamp:
+            summary.update({
+                'first_session': running.first_timestamp[:10],  # YYYY-MM-DD
+                'last_session': running.last_timestamp[:10]
+            })
         
         return summary
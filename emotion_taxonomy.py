@@ -0,0 +1,183 @@
+"""
+Emotion taxonomy shared by chat, camera, tracking and remedy features.
+Named emotions get integer ids, and every per-emotion or per-level attribute
+(scale, color, label, remedy category) lives in a precomputed NumPy lookup
+array so conversions are a single index and can be vectorised over histories.
+"""
+
+import random
+import numpy as np
+
+# Emotions the vision model can report, in display order
+CAMERA_EMOTIONS = ('happy', 'sad', 'angry', 'neutral', 'surprised', 'fear', 'trauma', 'disgust')
+
+# Emotion name -> position on the 1-10 mood scale. The camera emotions come
+# first so their ids match CAMERA_EMOTIONS; the rest are finer-grained names.
+_EMOTION_SCALE_TABLE = (
+    ('happy', 8),
+    ('sad', 3),
+    ('angry', 2),
+    ('neutral', 5),
+    ('surprised', 6),
+    ('fear', 3),
+    ('trauma', 1),
+    ('disgust', 4),
+    ('rage', 1),
+    ('furious', 1),
+    ('terror', 1),
+    ('panic', 1),
+    ('depressed', 1),
+    ('devastated', 1),
+    ('shock', 2),
+    ('confused', 4),
+    ('calm', 6),
+    ('content', 7),
+    ('peaceful', 7),
+    ('joy', 9),
+    ('ecstatic', 10)
+)
+
+# Alternative spellings that resolve to a canonical name
+EMOTION_ALIASES = {
+    'surprise': 'surprised',
+    'anger': 'angry',
+    'sadness': 'sad',
+    'scared': 'fear',
+    'afraid': 'fear',
+    'happiness': 'happy'
+}
+
+EMOTION_NAMES = tuple(name for name, _ in _EMOTION_SCALE_TABLE)
+EMOTION_IDS = {name: i for i, name in enumerate(EMOTION_NAMES)}
+NEUTRAL_ID = EMOTION_IDS['neutral']
+NEUTRAL_LEVEL = 5
+
+# Emotion id -> 1-10 mood level
+EMOTION_SCALE = np.array([level for _, level in _EMOTION_SCALE_TABLE], dtype=np.int8)
+
+# The per-level tables below are indexed directly by mood level; slot 0 is
+# unused and holds the neutral value so stray zeros still render sensibly.
+LEVEL_FACES = np.array(
+    ['😶', '💔', '😠', '😕', '😐', '😶', '🙂', '😊', '😄', '😁', '🤩'],
+    dtype=object
+)
+
+LEVEL_COLORS = np.array(
+    [
+        '#FFEA00',
+        '#FF073A',  # Neon red
+        '#FF2D92',  # Neon pink
+        '#FF6B35',  # Neon orange
+        '#FFB627',  # Neon yellow-orange
+        '#FFEA00',  # Neon yellow
+        '#ADFF2F',  # Neon green-yellow
+        '#39FF14',  # Neon green
+        '#00FFFF',  # Neon cyan
+        '#1E90FF',  # Neon blue
+        '#9D4EDD'   # Neon purple (brand color)
+    ],
+    dtype=object
+)
+
+LEVEL_LABELS = {
+    'en': np.array(
+        ['Neutral', 'Crisis/Trauma', 'Angry/Very Sad', 'Down', 'Low', 'Neutral',
+         'Okay', 'Good', 'Happy', 'Very Happy', 'Excellent'],
+        dtype=object
+    ),
+    'hi': np.array(
+        ['सामान्य', 'गंभीर स्थिति/आघात', 'क्रोधित/बहुत दुखी', 'निराश', 'कम', 'सामान्य',
+         'ठीक', 'अच्छा', 'खुश', 'बहुत खुश', 'उत्कृष्ट'],
+        dtype=object
+    )
+}
+
+# Face + label, as shown by the emotion tracker
+LEVEL_DISPLAY_LABELS = {
+    language: LEVEL_FACES + ' ' + labels for language, labels in LEVEL_LABELS.items()
+}
+
+# Remedy categories used by QuickRemedies. GENERAL_CATEGORY marks levels where
+# any general-purpose technique fits and one is picked at random.
+REMEDY_CATEGORIES = ('sadness', 'stress', 'anxiety', 'anger')
+GENERAL_CATEGORY = -1
+GENERAL_REMEDY_CATEGORIES = ('stress', 'anxiety')
+
+LEVEL_REMEDY_CATEGORY = np.array(
+    [2, 0, 0, 0, 1, 2, 2, GENERAL_CATEGORY, GENERAL_CATEGORY, GENERAL_CATEGORY, GENERAL_CATEGORY],
+    dtype=np.int8
+)
+
+def emotion_id(name: str) -> int:
+    """
+    Resolve an emotion name to its integer id.
+
+    Args:
+        name: Emotion name, case-insensitive; aliases are accepted
+
+    Returns:
+        Emotion id, or the neutral id for unknown names
+    """
+    key = name.lower() if name else ''
+    return EMOTION_IDS.get(EMOTION_ALIASES.get(key, key), NEUTRAL_ID)
+
+def emotion_name_to_scale(name: str) -> int:
+    """Convert an emotion name to the 1-10 mood scale."""
+    return int(EMOTION_SCALE[emotion_id(name)])
+
+def emotion_ids_to_scale(ids) -> np.ndarray:
+    """Vectorised id -> mood level conversion for whole histories."""
+    return EMOTION_SCALE[np.asarray(ids, dtype=np.intp)]
+
+def clip_levels(levels) -> np.ndarray:
+    """Coerce mood levels into valid table indices (1-10)."""
+    return np.clip(np.asarray(levels, dtype=np.intp), 1, 10)
+
+def _level_index(level) -> int:
+    """Table index for a single level; out-of-range values map to neutral."""
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        return NEUTRAL_LEVEL
+    return level if 1 <= level <= 10 else NEUTRAL_LEVEL
+
+def level_color(level: int) -> str:
+    """Get neon color for a mood level."""
+    return LEVEL_COLORS[_level_index(level)]
+
+def levels_to_colors(levels) -> np.ndarray:
+    """Vectorised mood level -> color conversion."""
+    return LEVEL_COLORS[clip_levels(levels)]
+
+def level_face(level: int) -> str:
+    """Get the face emoji for a mood level."""
+    return LEVEL_FACES[_level_index(level)]
+
+def level_label(level: int, language: str = 'en', with_face: bool = False) -> str:
+    """
+    Get the localized label for a mood level.
+
+    Args:
+        level: Mood level (1-10)
+        language: 'en' or 'hi'
+        with_face: Prefix the label with its face emoji
+
+    Returns:
+        Label text
+    """
+    tables = LEVEL_DISPLAY_LABELS if with_face else LEVEL_LABELS
+    return tables.get(language, tables['en'])[_level_index(level)]
+
+def remedy_categories(level: int) -> tuple:
+    """All remedy categories that fit a mood level, without picking one at random."""
+    code = LEVEL_REMEDY_CATEGORY[_level_index(level)]
+    if code == GENERAL_CATEGORY:
+        return GENERAL_REMEDY_CATEGORIES
+    return (REMEDY_CATEGORIES[code],)
+
+def remedy_category(level: int) -> str:
+    """Determine the remedy category for a mood level."""
+    code = LEVEL_REMEDY_CATEGORY[_level_index(level)]
+    if code == GENERAL_CATEGORY:
+        return random.choice(GENERAL_REMEDY_CATEGORIES)
+    return REMEDY_CATEGORIES[code]
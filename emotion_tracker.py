@@ -5,36 +5,14 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict
 from translations import get_text
+from emotion_taxonomy import LEVEL_DISPLAY_LABELS, level_color, levels_to_colors
+from tracing import traced
+from records import as_dicts
 
 class EmotionTracker:
     def __init__(self):
         """Initialize the emotion tracker."""
-        self.emotion_labels = {
-            'en': {
-                1: "💔 Crisis/Trauma",
-                2: "😠 Angry/Very Sad", 
-                3: "😕 Down",
-                4: "😐 Low",
-                5: "😶 Neutral",
-                6: "🙂 Okay",
-                7: "😊 Good",
-                8: "😄 Happy",
-                9: "😁 Very Happy",
-                10: "🤩 Excellent"
-            },
-            'hi': {
-                1: "💔 गंभीर स्थिति/आघात",
-                2: "😠 क्रोधित/बहुत दुखी",
-                3: "😕 निराश",
-                4: "😐 कम",
-                5: "😶 सामान्य",
-                6: "🙂 ठीक",
-                7: "😊 अच्छा",
-                8: "😄 खुश",
-                9: "😁 बहुत खुश",
-                10: "🤩 उत्कृष्ट"
-            }
-        }
+        self.emotion_labels = LEVEL_DISPLAY_LABELS
     
     def display_emotion_interface(self, language: str) -> int:
         """
@@ -127,10 +105,7 @@ class EmotionTracker:
             
         st.subheader(get_text("emotion_timeline", language))
         
-        # Convert to DataFrame
-        df = pd.DataFrame(emotion_history)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['date'] = df['timestamp'].dt.date
+        df = self._build_timeline_frame(emotion_history)
         
         # Time range selector
         time_range = st.selectbox(
@@ -151,6 +126,24 @@ class EmotionTracker:
             st.info(get_text("no_data_range", language))
             return
         
+        fig = self._build_timeline_figure(df_filtered, language)
+        
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Emotion statistics
+        self._display_emotion_stats(df_filtered, language)
+    
+    @traced('emotion.dataframe_build', lambda self, emotion_history: {'entries': len(emotion_history)})
+    def _build_timeline_frame(self, emotion_history: List[Dict]) -> pd.DataFrame:
+        """Convert emotion entries to a DataFrame with parsed timestamps."""
+        df = pd.DataFrame(as_dicts(emotion_history))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['date'] = df['timestamp'].dt.date
+        return df
+    
+    @traced('emotion.figure_build', lambda self, df, language: {'points': len(df), 'language': language})
+    def _build_timeline_figure(self, df_filtered: pd.DataFrame, language: str) -> go.Figure:
+        """Build the emotion timeline chart."""
         # Create timeline chart
         fig = go.Figure()
         
@@ -163,7 +156,7 @@ class EmotionTracker:
             line=dict(color='#ff6b6b', width=3),
             marker=dict(
                 size=8,
-                color=df_filtered['emotion'].apply(self._get_emotion_color),
+                color=levels_to_colors(df_filtered['emotion'].to_numpy()),
                 line=dict(width=2, color='white')
             ),
             hovertemplate='<b>%{y}/10</b><br>%{x}<extra></extra>'
@@ -188,10 +181,7 @@ class EmotionTracker:
             height=400
         )
         
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Emotion statistics
-        self._display_emotion_stats(df_filtered, language)
+        return fig
     
     def _display_emotion_stats(self, df: pd.DataFrame, language: str):
         """Display emotion statistics."""
@@ -232,16 +222,4 @@ class EmotionTracker:
     
     def _get_emotion_color(self, emotion: int) -> str:
         """Get neon color for emotion level."""
-        colors = {
-            1: '#FF073A',  # Neon red
-            2: '#FF2D92',  # Neon pink
-            3: '#FF6B35',  # Neon orange
-            4: '#FFB627',  # Neon yellow-orange
-            5: '#FFEA00',  # Neon yellow
-            6: '#ADFF2F',  # Neon green-yellow
-            7: '#39FF14',  # Neon green
-            8: '#00FFFF',  # Neon cyan
-            9: '#1E90FF',  # Neon blue
-            10: '#9D4EDD'  # Neon purple (brand color)
-        }
-        return colors.get(emotion, '#FFEA00')
+        return level_color(emotion)
@@ -0,0 +1,252 @@
+"""
+Background job queue for slow work such as model calls and exports.
+Jobs are scheduled on an asyncio event loop running in its own thread and
+executed on a bounded worker pool, so the Streamlit script thread only
+submits a job, keeps its handle in session_state and polls it from a
+fragment. Job functions run without a script context: anything they need
+from the session (ids, settings) must be captured before submitting.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import streamlit as st
+from metrics import registry
+from tracing import span
+
+# Seconds between fragment polls of a pending job
+JOB_POLL_SECONDS = 0.5
+
+# Completed jobs kept for wait / service time percentiles
+TIMING_SAMPLES = 500
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity."""
+
+class Job:
+    """Handle for one submitted job."""
+
+    def __init__(self, job_id: int, kind: str, meta: Optional[Dict] = None):
+        self.id = job_id
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        # Formatted traceback of a failed job, taken on the worker thread
+        self.traceback = None
+        # Progress note set while running, e.g. an admission queue ETA
+        self.message = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        return self.started_at - self.submitted_at if self.started_at is not None else None
+
+    @property
+    def service_seconds(self) -> Optional[float]:
+        return self.finished_at - self.started_at if self.finished_at is not None else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+_current = threading.local()
+
+def current_job() -> Optional[Job]:
+    """The job running on this thread, or None outside a job."""
+    return getattr(_current, 'job', None)
+
+class JobQueue:
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        """
+        Start the event loop thread and worker pool.
+
+        Args:
+            max_workers: Jobs executed concurrently
+            max_pending: Jobs queued or running before submit() refuses more
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='job-loop', daemon=True)
+        self._thread.start()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._timings = deque(maxlen=TIMING_SAMPLES)
+
+    def submit(self, kind: str, fn: Callable[[], Any], meta: Optional[Dict] = None) -> Job:
+        """
+        Queue fn to run in the background.
+
+        Args:
+            kind: Job type used in metrics, e.g. 'chat', 'vision', 'export'
+            fn: Zero-argument callable; its return value becomes job.result
+            meta: Caller data kept on the handle for when the job finishes
+
+        Returns:
+            Job handle
+
+        Raises:
+            JobQueueFull: max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self.queued + self.running >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull(f"{self.queued + self.running} jobs pending")
+            job = Job(next(self._ids), kind, meta)
+            self.queued += 1
+            self.submitted += 1
+        # Run in the submitter's context so the job's spans join its trace
+        context = contextvars.copy_context()
+        asyncio.run_coroutine_threadsafe(self._run(job, fn, context), self._loop)
+        return job
+
+    def run_coroutine(self, coro) -> Future:
+        """Schedule a coroutine on the queue's event loop, e.g. async I/O from a job; never call from the loop itself."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _run(self, job: Job, fn: Callable[[], Any], context: contextvars.Context):
+        try:
+            job.result = await self._loop.run_in_executor(self._executor, context.run, self._execute, job, fn)
+            job.status = 'done'
+        except Exception as e:
+            print(f"Error in background {job.kind} job {job.id}: {e}\n{job.traceback or traceback.format_exc()}")
+            job.error = e
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.monotonic()
+            with self._lock:
+                if job.started_at is None:
+                    # Never reached a worker, e.g. the pool was shut down
+                    job.started_at = job.finished_at
+                    self.queued -= 1
+                else:
+                    self.running -= 1
+                if job.status == 'done':
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._timings.append((job.kind, job.wait_seconds, job.service_seconds))
+            job._finished.set()
+
+    def _execute(self, job: Job, fn: Callable[[], Any]) -> Any:
+        job.started_at = time.monotonic()
+        job.status = 'running'
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        _current.job = job
+        try:
+            with span(f'job.{job.kind}', {'job.wait_ms': job.wait_seconds * 1000}) as job_span:
+                try:
+                    return fn()
+                except Exception:
+                    # The script thread only sees the exception, so keep where it came from
+                    job.traceback = traceback.format_exc()
+                    job_span.set_attribute('exception.stacktrace', job.traceback)
+                    raise
+        finally:
+            _current.job = None
+
+    def stats(self) -> Dict:
+        """Queue depth plus wait (queued) and service (running) time, overall and by kind."""
+        with self._lock:
+            timings = list(self._timings)
+            stats = {
+                'depth': self.queued,
+                'running': self.running,
+                'workers': self.max_workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+        stats.update(_summarize(timings))
+        stats['by_kind'] = {
+            kind: _summarize([timing for timing in timings if timing[0] == kind])
+            for kind in sorted({timing[0] for timing in timings})
+        }
+        return stats
+
+def _summarize(timings) -> Dict:
+    summary = {'jobs': len(timings)}
+    for index, name in ((1, 'wait'), (2, 'service')):
+        values = sorted(timing[index] for timing in timings)
+        summary[f'{name}_avg'] = sum(values) / len(values) if values else 0.0
+        summary[f'{name}_p95'] = values[int(0.95 * (len(values) - 1))] if values else 0.0
+        summary[f'{name}_max'] = values[-1] if values else 0.0
+    return summary
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue shared by all sessions."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+def track_job(name: str, job: Job):
+    """Keep a job handle in session_state under name."""
+    st.session_state.setdefault('jobs', {})[name] = job
+
+def tracked_job(name: str) -> Optional[Job]:
+    return st.session_state.get('jobs', {}).get(name)
+
+def untrack_job(name: str) -> Optional[Job]:
+    """Stop watching a job; it still runs, but its outcome is never picked up."""
+    return st.session_state.get('jobs', {}).pop(name, None)
+
+def watch_job(name: str, on_done: Callable[[Job], None], pending_text: str):
+    """
+    Poll a tracked job from a fragment until it finishes.
+
+    Args:
+        name: Name the job was tracked under
+        on_done: Called once on the script thread with the finished job,
+            before the whole app reruns to show its outcome
+        pending_text: Shown while the job is queued or running
+    """
+    if tracked_job(name) is None:
+        return
+
+    def poll():
+        job = tracked_job(name)
+        if job is None:
+            return
+        if job.done:
+            del st.session_state.jobs[name]
+            on_done(job)
+            st.rerun()
+        note = f" ({job.message})" if job.message else ""
+        st.caption(f"⏳ {pending_text}{note}")
+
+    st.fragment(run_every=JOB_POLL_SECONDS)(poll)()
+
+registry.register_stats('jobs', lambda: get_job_queue().stats(),
+                        counters=('submitted', 'completed', 'failed', 'rejected'),
+                        gauges=('depth', 'running', 'wait_p95', 'service_p95'))
@@ -0,0 +1,183 @@
+"""
+Incremental JSON reading for large uploads.
+Reads a text or binary stream in fixed-size chunks and hands back one value,
+array item, object key or NDJSON line at a time, so memory use is bounded by
+the chunk size plus the largest single record rather than the file size.
+"""
+
+import codecs
+import json
+from typing import Any, Iterator, Optional
+
+class JsonStreamError(ValueError):
+    """Raised when the stream is not valid JSON at the current position."""
+
+class JsonStreamReader:
+    WHITESPACE = ' \t\r\n'
+
+    def __init__(self, stream, chunk_size: int = 64 * 1024, max_record_chars: int = 16 * 1024 * 1024):
+        """
+        Wrap a stream for incremental JSON reading.
+
+        Args:
+            stream: File-like object returning str or bytes from read()
+            chunk_size: Number of characters/bytes to read at a time
+            max_record_chars: Largest single value accepted before giving up
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._max_record_chars = max_record_chars
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        """Read the next chunk into the buffer. Returns False at end of stream."""
+        if self._eof:
+            return False
+
+        chunk = self._stream.read(self._chunk_size)
+        if isinstance(chunk, bytes):
+            if self._text_decoder is None:
+                self._text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            self.bytes_read += len(chunk)
+            text = self._text_decoder.decode(chunk, final=not chunk)
+        else:
+            self.bytes_read += len(chunk or '')
+            text = chunk or ''
+
+        if not chunk:
+            self._eof = True
+
+        # Drop everything already consumed so the buffer never grows with the file
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+
+        if len(self._buffer) > self._max_record_chars:
+            raise JsonStreamError(f"Record larger than {self._max_record_chars} characters")
+
+        return bool(text) or not self._eof
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at end of stream."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self.WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def lookahead(self, size: int) -> str:
+        """Return up to `size` upcoming characters without consuming them."""
+        self.peek()
+        while len(self._buffer) - self._pos < size and self._fill():
+            pass
+        return self._buffer[self._pos:self._pos + size]
+
+    def expect(self, char: str):
+        """Consume `char`, raising if the stream has something else."""
+        found = self.peek()
+        if found != char:
+            raise JsonStreamError(f"Expected {char!r}, found {found or 'end of stream'!r}")
+        self._pos += 1
+
+    def read_value(self) -> Any:
+        """Decode the next complete JSON value."""
+        if not self.peek():
+            raise JsonStreamError("Unexpected end of stream")
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if not self._fill():
+                    raise JsonStreamError(str(e)) from e
+                continue
+
+            # A number or literal ending at the buffer edge may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def skip_value(self):
+        """Consume and discard the next JSON value."""
+        self.read_value()
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yield the items of the JSON array at the current position one by one."""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self.read_value()
+            separator = self.peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise JsonStreamError(f"Expected ',' or ']', found {separator or 'end of stream'!r}")
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        Yield the keys of the JSON object at the current position.
+
+        The caller must consume each key's value (read_value, skip_value or
+        iter_array) before advancing the iterator.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise JsonStreamError("Object keys must be strings")
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise JsonStreamError(f"Expected ',' or '}}', found {separator or 'end of stream'!r}")
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield non-blank lines, for newline-delimited JSON."""
+        while True:
+            newline = self._buffer.find('\n', self._pos)
+            if newline == -1:
+                if self._fill():
+                    continue
+                line = self._buffer[self._pos:]
+                self._pos = len(self._buffer)
+                if line.strip():
+                    yield line
+                return
+
+            line = self._buffer[self._pos:newline]
+            self._pos = newline + 1
+            if line.strip():
+                yield line
+
+def stream_size(stream) -> Optional[int]:
+    """Best-effort total size of a stream, for progress reporting."""
+    size = getattr(stream, 'size', None)
+    if isinstance(size, int):
+        return size
+    try:
+        position = stream.tell()
+        stream.seek(0, 2)
+        size = stream.tell()
+        stream.seek(position)
+        return size
+    except Exception:
+        return None
@@ -0,0 +1,293 @@
+"""
+Cross-user leaderboard for challenge points.
+Each window (daily, weekly, all-time) keeps an indexable skip list ordered by
+points, so recording points, looking up a user's rank and reading the top K
+are all O(log n) regardless of how many users are on the board. One
+leaderboard is shared by every session in the process.
+"""
+
+import math
+import random
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+WINDOWS = ('daily', 'weekly', 'all_time')
+
+# Sorts after every (-points, user_id) key
+_END_KEY = (math.inf,)
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+class IndexableSkipList:
+    """Sorted collection with O(log n) insert, remove, rank and positional access."""
+
+    MAX_LEVELS = 24
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._end = _Node(_END_KEY, 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._end] * self.MAX_LEVELS
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_levels(self) -> int:
+        return min(self.MAX_LEVELS, 1 - int(math.log2(1.0 - self._rng.random())))
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key) -> int:
+        """Number of keys strictly less than key."""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def slice(self, start: int, count: int) -> List:
+        """Keys at positions [start, start + count)."""
+        if start >= self.size or count <= 0:
+            return []
+
+        remaining = start + 1
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        keys = []
+        while node is not self._end and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+class _Board:
+    """Points for one window period: a skip list of (-points, user_id) plus a score map."""
+
+    def __init__(self):
+        self.order = IndexableSkipList()
+        self.scores = {}
+
+    def add(self, user_id: str, points: int):
+        old = self.scores.get(user_id)
+        if old is not None:
+            self.order.remove((-old, user_id))
+        new = (old or 0) + points
+        self.scores[user_id] = new
+        self.order.insert((-new, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        points = self.scores.get(user_id)
+        if points is None:
+            return None
+        return self.order.rank((-points, user_id)) + 1
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[str, int]]:
+        return [(user_id, -negative) for negative, user_id in self.order.slice(offset, k)]
+
+class Leaderboard:
+    def __init__(self, retained_periods: int = 2):
+        """
+        Initialize an empty leaderboard.
+
+        Args:
+            retained_periods: Daily/weekly periods kept per window; older ones are dropped
+        """
+        self.retained_periods = retained_periods
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def _period(self, window: str, day: date) -> str:
+        if window == 'daily':
+            return day.isoformat()
+        if window == 'weekly':
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02d}"
+        if window == 'all_time':
+            return 'all'
+        raise ValueError(f"Unknown leaderboard window: {window}")
+
+    def _board(self, window: str, day: Optional[date], create: bool = False) -> Optional[_Board]:
+        key = (window, self._period(window, day or datetime.now().date()))
+        board = self._boards.get(key)
+        if board is None and create:
+            board = self._boards[key] = _Board()
+            if window != 'all_time':
+                periods = sorted(period for w, period in self._boards if w == window)
+                for period in periods[:-self.retained_periods]:
+                    del self._boards[(window, period)]
+        return board
+
+    def add_points(self, user_id: str, points: int, day: Optional[date] = None):
+        """
+        Credit points to a user in every window.
+
+        Args:
+            user_id: Stable user identifier
+            points: Points earned
+            day: Day the points were earned; defaults to today
+        """
+        with self._lock:
+            for window in WINDOWS:
+                self._board(window, day, create=True).add(user_id, points)
+
+    def top(self, window: str = 'all_time', k: int = 10, day: Optional[date] = None) -> List[Dict]:
+        """
+        Get the highest-scoring users.
+
+        Args:
+            window: 'daily', 'weekly' or 'all_time'
+            k: Number of entries
+            day: Day selecting the daily/weekly period; defaults to today
+
+        Returns:
+            Dicts with rank, user_id and points, best first
+        """
+        with self._lock:
+            board = self._board(window, day)
+            if board is None:
+                return []
+            return [
+                {'rank': position + 1, 'user_id': user_id, 'points': points}
+                for position, (user_id, points) in enumerate(board.top(k))
+            ]
+
+    def rank(self, user_id: str, window: str = 'all_time', day: Optional[date] = None) -> Optional[Dict]:
+        """
+        Get a user's standing.
+
+        Args:
+            user_id: Stable user identifier
+            window: 'daily', 'weekly' or 'all_time'
+            day: Day selecting the daily/weekly period; defaults to today
+
+        Returns:
+            Dict with rank (1-based), points and total users, or None if the
+            user has no points in the window
+        """
+        with self._lock:
+            board = self._board(window, day)
+            if board is None or user_id not in board.scores:
+                return None
+            return {
+                'rank': board.rank(user_id),
+                'points': board.scores[user_id],
+                'total_users': len(board.scores)
+            }
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+def get_leaderboard() -> Leaderboard:
+    """Get the process-wide leaderboard shared by all sessions."""
+    global _leaderboard
+    if _leaderboard is None:
+        with _leaderboard_lock:
+            if _leaderboard is None:
+                _leaderboard = Leaderboard()
+    return _leaderboard
+
+def run_benchmark(users: int = 100_000, updates: int = 200_000, queries: int = 10_000, seed: int = 7) -> Dict:
+    """
+    Time leaderboard operations on a synthetic population.
+
+    Args:
+        users: Number of distinct users
+        updates: Number of add_points calls after the initial fill
+        queries: Number of rank and top-10 queries
+        seed: Random seed
+
+    Returns:
+        Microseconds per operation for each phase
+    """
+    rng = random.Random(seed)
+    board = Leaderboard()
+    today = datetime.now().date()
+    user_ids = [f"user-{i}" for i in range(users)]
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        board.add_points(user_id, rng.randint(5, 50), today)
+    fill = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        board.add_points(rng.choice(user_ids), rng.randint(5, 50), today)
+    update = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        board.rank(rng.choice(user_ids), rng.choice(WINDOWS), today)
+    rank = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        board.top(rng.choice(WINDOWS), 10, today)
+    top = time.perf_counter() - start
+
+    return {
+        'users': users,
+        'fill_us_per_user': fill / users * 1e6,
+        'update_us': update / updates * 1e6,
+        'rank_us': rank / queries * 1e6,
+        'top10_us': top / queries * 1e6
+    }
+
+if __name__ == '__main__':
+    for name, value in run_benchmark().items():
+        print(f"{name}: {value:.1f}" if isinstance(value, float) else f"{name}: {value}")
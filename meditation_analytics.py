@@ -0,0 +1,112 @@
+"""
+Incremental meditation analytics.
+Each completed session is folded once into running aggregates (count, sums
+and a Welford mean/variance of effectiveness) overall, per meditation type
+and per starting-mood band, so history views and recommendations never
+rescan past sessions.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EMOTION_BANDS = ('low', 'medium', 'high')
+
+def emotion_band(emotion_level: int) -> str:
+    """Map a 1-10 mood level to the band used for meditation recommendations."""
+    if emotion_level <= 4:
+        return 'low'
+    if emotion_level <= 7:
+        return 'medium'
+    return 'high'
+
+class RunningAggregate:
+    """Count, totals and Welford mean/variance of effectiveness for a set of sessions."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_minutes = 0.0
+        self.improvement_sum = 0.0
+        self.effectiveness_mean = 0.0
+        self.effectiveness_m2 = 0.0
+
+    def add(self, minutes: float, improvement: float, effectiveness: float):
+        self.count += 1
+        self.total_minutes += minutes
+        self.improvement_sum += improvement
+        delta = effectiveness - self.effectiveness_mean
+        self.effectiveness_mean += delta / self.count
+        self.effectiveness_m2 += delta * (effectiveness - self.effectiveness_mean)
+
+    @property
+    def avg_improvement(self) -> float:
+        return self.improvement_sum / self.count if self.count else 0.0
+
+    @property
+    def avg_effectiveness(self) -> float:
+        return self.effectiveness_mean
+
+    @property
+    def effectiveness_variance(self) -> float:
+        """Sample variance of effectiveness; 0 with fewer than two sessions."""
+        return self.effectiveness_m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def effectiveness_std(self) -> float:
+        return math.sqrt(self.effectiveness_variance)
+
+class MeditationAnalytics:
+    # Sessions of a type needed in a band before it can outrank the default recommendation
+    MIN_SESSIONS_FOR_RANKING = 3
+
+    def __init__(self):
+        self.overall = RunningAggregate()
+        self.by_type: Dict[str, RunningAggregate] = {}
+        self.by_band: Dict[str, Dict[str, RunningAggregate]] = {band: {} for band in EMOTION_BANDS}
+        self.best_by_band: Dict[str, Optional[str]] = {band: None for band in EMOTION_BANDS}
+
+    @classmethod
+    def from_sessions(cls, sessions: Iterable[Dict]) -> 'MeditationAnalytics':
+        """Rebuild analytics from stored session records."""
+        analytics = cls()
+        for session in sessions:
+            analytics.add_session(session)
+        return analytics
+
+    def add_session(self, session: Dict):
+        """
+        Fold a completed session into every aggregate.
+
+        Args:
+            session: Record with 'type', 'duration', 'initial_emotion',
+                'emotion_change' and 'effectiveness'
+        """
+        values = (session['duration'], session['emotion_change'], session['effectiveness'])
+        meditation_type = session['type']
+        band = emotion_band(session['initial_emotion'])
+
+        self.overall.add(*values)
+        self.by_type.setdefault(meditation_type, RunningAggregate()).add(*values)
+        self.by_band[band].setdefault(meditation_type, RunningAggregate()).add(*values)
+        self._rerank(band)
+
+    def _rerank(self, band: str):
+        """Recompute the best type for one band; bounded by the number of meditation types."""
+        eligible = [
+            (aggregate.avg_effectiveness, aggregate.count, meditation_type)
+            for meditation_type, aggregate in self.by_band[band].items()
+            if aggregate.count >= self.MIN_SESSIONS_FOR_RANKING
+        ]
+        self.best_by_band[band] = max(eligible)[2] if eligible else None
+
+    def best_type(self, emotion_level: int) -> Optional[str]:
+        """Most effective meditation type for a starting mood, or None without enough data."""
+        return self.best_by_band[emotion_band(emotion_level)]
+
+    def ranking(self, band: Optional[str] = None) -> List[Tuple[str, RunningAggregate]]:
+        """Meditation types ordered by average effectiveness, overall or within a band."""
+        aggregates = self.by_type if band is None else self.by_band[band]
+        return sorted(
+            aggregates.items(),
+            key=lambda item: (item[1].avg_effectiveness, item[1].count),
+            reverse=True
+        )
@@ -1,14 +1,22 @@
 import streamlit as st
 import time
-import numpy as np
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from translations import get_text
+from content_catalog import get_catalog
+from session_clock import SessionClock
+from audio_engine import ambient_track, audio_mime_type
+from meditation_analytics import MeditationAnalytics, emotion_band
+
+# Guidance advances every PHASE_SECONDS; the active session view refreshes every TICK_SECONDS
+PHASE_SECONDS = 120
+TICK_SECONDS = 1
 
 class MeditationModule:
     def __init__(self):
         """Initialize meditation module with session tracking."""
         self.meditation_sessions = []
+        self.analytics = MeditationAnalytics()
         self.current_session = None
         self.is_active = False
         
@@ -91,163 +99,27 @@ class MeditationModule:
             st.rerun()
     
     def _get_emotion_based_meditation(self, emotion_level: int, language: str) -> Dict:
-        """Get recommended meditation based on emotion level."""
-        meditations = {
-            'en': {
-                'low': {
-                    'name': 'Compassion & Self-Love Meditation',
-                    'description': 'Gentle practice to nurture self-compassion and emotional healing',
-                    'type': 'compassion',
-                    'duration': 10,
-                    'icon': '💝'
-                },
-                'medium': {
-                    'name': 'Mindful Awareness Meditation',
-                    'description': 'Build present-moment awareness and emotional stability',
-                    'type': 'mindfulness',
-                    'duration': 15,
-                    'icon': '🌺'
-                },
-                'high': {
-                    'name': 'Gratitude & Joy Meditation',
-                    'description': 'Amplify positive emotions and cultivate gratitude',
-                    'type': 'gratitude',
-                    'duration': 12,
-                    'icon': '✨'
-                }
-            },
-            'hi': {
-                'low': {
-                    'name': 'करुणा और स्व-प्रेम ध्यान',
-                    'description': 'स्व-करुणा और भावनात्मक चिकित्सा के लिए कोमल अभ्यास',
-                    'type': 'compassion',
-                    'duration': 10,
-                    'icon': '💝'
-                },
-                'medium': {
-                    'name': 'सचेत जागरूकता ध्यान',
-                    'description': 'वर्तमान क्षण की जागरूकता और भावनात्मक स्थिरता बनाएं',
-                    'type': 'mindfulness',
-                    'duration': 15,
-                    'icon': '🌺'
-                },
-                'high': {
-                    'name': 'कृतज्ञता और आनंद ध्यान',
-                    'description': 'सकारात्मक भावनाओं को बढ़ाएं और कृतज्ञता विकसित करें',
-                    'type': 'gratitude',
-                    'duration': 12,
-                    'icon': '✨'
-                }
-            }
-        }
-        
-        if emotion_level <= 4:
-            category = 'low'
-        elif emotion_level <= 7:
-            category = 'medium'
-        else:
-            category = 'high'
-            
-        return meditations[language][category]
+        """Get recommended meditation based on emotion level and what has worked before."""
+        best_type = self.analytics.best_type(emotion_level)
+        if best_type:
+            meditation = self._find_meditation_by_type(best_type, language)
+            if meditation:
+                return meditation
+        
+        return get_catalog('meditations').find(emotion_band(emotion_level), 'recommended', language)
+    
+    def _find_meditation_by_type(self, meditation_type: str, language: str) -> Dict:
+        """Find a recommended or regular meditation of the given type."""
+        catalog = get_catalog('meditations')
+        language = 'hi' if language == 'hi' else 'en'
+        for meditation in catalog.entries('recommended', language) + catalog.entries('all', language):
+            if meditation['type'] == meditation_type:
+                return meditation
+        return None
     
     def _get_all_meditations(self, language: str) -> List[Dict]:
         """Get all available meditation types."""
-        if language == 'hi':
-            return [
-                {
-                    'id': 'breathing',
-                    'name': 'श्वास ध्यान',
-                    'description': 'गहरी सांस लेने पर ध्यान केंद्रित करें',
-                    'duration': 5,
-                    'difficulty': 'आसान',
-                    'icon': '🫁',
-                    'type': 'breathing'
-                },
-                {
-                    'id': 'body_scan',
-                    'name': 'शरीर स्कैन ध्यान',
-                    'description': 'शरीर के हर हिस्से में तनाव मुक्ति',
-                    'duration': 20,
-                    'difficulty': 'मध्यम',
-                    'icon': '🌊',
-                    'type': 'body_scan'
-                },
-                {
-                    'id': 'loving_kindness',
-                    'name': 'मैत्री ध्यान',
-                    'description': 'प्रेम और दया की भावनाओं को विकसित करें',
-                    'duration': 15,
-                    'difficulty': 'मध्यम',
-                    'icon': '💖',
-                    'type': 'loving_kindness'
-                },
-                {
-                    'id': 'walking',
-                    'name': 'चलते हुए ध्यान',
-                    'description': 'चलते समय सचेत रहने का अभ्यास',
-                    'duration': 10,
-                    'difficulty': 'आसान',
-                    'icon': '🚶‍♀️',
-                    'type': 'walking'
-                },
-                {
-                    'id': 'visualization',
-                    'name': 'दृश्यीकरण ध्यान',
-                    'description': 'शांत दृश्यों की कल्पना करें',
-                    'duration': 12,
-                    'difficulty': 'मध्यम',
-                    'icon': '🏔️',
-                    'type': 'visualization'
-                }
-            ]
-        else:
-            return [
-                {
-                    'id': 'breathing',
-                    'name': 'Breathing Meditation',
-                    'description': 'Focus on deep, mindful breathing patterns',
-                    'duration': 5,
-                    'difficulty': 'Easy',
-                    'icon': '🫁',
-                    'type': 'breathing'
-                },
-                {
-                    'id': 'body_scan',
-                    'name': 'Body Scan Meditation',
-                    'description': 'Progressive relaxation through body awareness',
-                    'duration': 20,
-                    'difficulty': 'Medium',
-                    'icon': '🌊',
-                    'type': 'body_scan'
-                },
-                {
-                    'id': 'loving_kindness',
-                    'name': 'Loving-Kindness Meditation',
-                    'description': 'Cultivate compassion and loving feelings',
-                    'duration': 15,
-                    'difficulty': 'Medium',
-                    'icon': '💖',
-                    'type': 'loving_kindness'
-                },
-                {
-                    'id': 'walking',
-                    'name': 'Walking Meditation',
-                    'description': 'Mindful awareness while walking',
-                    'duration': 10,
-                    'difficulty': 'Easy',
-                    'icon': '🚶‍♀️',
-                    'type': 'walking'
-                },
-                {
-                    'id': 'visualization',
-                    'name': 'Visualization Meditation',
-                    'description': 'Guided imagery for peace and relaxation',
-                    'duration': 12,
-                    'difficulty': 'Medium',
-                    'icon': '🏔️',
-                    'type': 'visualization'
-                }
-            ]
+        return list(get_catalog('meditations').entries('all', 'hi' if language == 'hi' else 'en'))
     
     def _start_meditation_session(self, meditation: Dict, initial_emotion: int, language: str):
         """Start a meditation session with emotion tracking."""
@@ -255,9 +127,12 @@ class MeditationModule:
         self.current_session = {
             'meditation': meditation,
             'start_time': datetime.now(),
+            'clock': SessionClock(
+                meditation['duration'] * 60,
+                self._build_phase_schedule(meditation['type'], language)
+            ),
             'initial_emotion': initial_emotion,
             'language': language,
-            'progress': 0,
             'emotion_tracking': [{'time': 0, 'emotion': initial_emotion}]
         }
         st.success(f"🧘‍♀️ Starting {meditation['name']} session...")
@@ -268,8 +143,30 @@ class MeditationModule:
         st.markdown("---")
         st.subheader("🎧 Active Meditation Session")
         
+        # Ambient loop stays outside the ticking fragment so playback is not restarted
+        meditation_type = self.current_session['meditation']['type']
+        st.audio(ambient_track(meditation_type), format=audio_mime_type(), loop=True)
+        st.caption("🎧 Use headphones for the binaural beat.")
+        
+        # Only the clock-driven part reruns on each tick, never the whole page
+        st.fragment(run_every=TICK_SECONDS)(self._render_session_clock)(language)
+        
+        if st.button("✅ Complete Session", key="complete_meditation"):
+            self._complete_meditation_session()
+            st.success("🎉 Meditation session completed!")
+            st.rerun()
+    
+    def _render_session_clock(self, language: str):
+        """Render timing, guidance and controls for the active session from its clock."""
         session = self.current_session
+        if session is None:
+            return
+        
         meditation = session['meditation']
+        clock = session['clock']
+        now = time.time()
+        elapsed_time = clock.position(now) / 60
+        progress = clock.progress(now) * 100
         
         # Session info
         col1, col2, col3 = st.columns(3)
@@ -278,18 +175,16 @@ class MeditationModule:
             st.metric("Session Type", meditation['name'])
         
         with col2:
-            elapsed_time = (datetime.now() - session['start_time']).total_seconds() / 60
             st.metric("Time Elapsed", f"{elapsed_time:.1f} min")
         
         with col3:
-            progress = min(100, (elapsed_time / meditation['duration']) * 100)
             st.metric("Progress", f"{progress:.0f}%")
         
         # Progress bar
         st.progress(progress / 100)
         
-        # Meditation guidance based on type
-        guidance = self._get_meditation_guidance(meditation['type'], language, elapsed_time)
+        # Meditation guidance from the precomputed phase schedule
+        guidance = clock.current_phase(now)
         st.markdown(f"""
         <div style="background: rgba(157, 78, 221, 0.1); border: 1px solid rgba(157, 78, 221, 0.3); border-radius: 15px; padding: 1.5rem; margin: 1rem 0;">
             <div style="color: #9D4EDD; font-weight: bold; margin-bottom: 1rem;">🧘‍♀️ Current Guidance</div>
@@ -299,109 +194,79 @@ class MeditationModule:
         </div>
         """, unsafe_allow_html=True)
         
+        if clock.is_paused:
+            st.info("Session paused. Take your time.")
+        elif clock.finished(now):
+            st.success("🔔 Time is up. Complete the session when you are ready.")
+        
         # Real-time emotion tracking
         st.subheader("💜 How are you feeling right now?")
         current_emotion = st.slider(
             "Rate your current emotional state",
             min_value=1,
             max_value=10,
-            value=session['initial_emotion'],
+            value=session['emotion_tracking'][-1]['emotion'],
             key=f"meditation_emotion_{len(session['emotion_tracking'])}"
         )
         
         # Update emotion tracking
         if current_emotion != session['emotion_tracking'][-1]['emotion']:
             session['emotion_tracking'].append({
-                'time': elapsed_time,
+                'time': clock.active_seconds(now) / 60,
                 'emotion': current_emotion
             })
         
-        # Session controls
-        col1, col2, col3 = st.columns(3)
+        # Session controls; callbacks update the clock before this fragment reruns
+        col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("⏸️ Pause", key="pause_meditation"):
-                st.info("Session paused. Take your time.")
+            if clock.is_paused:
+                st.button("▶️ Resume", key="resume_meditation", on_click=clock.resume)
+            else:
+                st.button("⏸️ Pause", key="pause_meditation", on_click=clock.pause)
         
         with col2:
-            if st.button("⏭️ Next Phase", key="next_phase"):
-                session['progress'] += 25
-                st.success("Moving to next phase...")
-        
-        with col3:
-            if st.button("✅ Complete Session", key="complete_meditation"):
-                self._complete_meditation_session()
-                st.success("🎉 Meditation session completed!")
-                st.rerun()
+            st.button(
+                "⏭️ Next Phase",
+                key="next_phase",
+                on_click=clock.next_phase,
+                disabled=clock.seconds_to_next_phase(now) is None
+            )
     
-    def _get_meditation_guidance(self, meditation_type: str, language: str, elapsed_time: float) -> str:
-        """Get meditation guidance based on type and elapsed time."""
-        guidance_texts = {
-            'breathing': {
-                'en': [
-                    "Begin by finding a comfortable position. Close your eyes and take three deep breaths.",
-                    "Focus on your natural breath. Feel the air entering and leaving your nostrils.",
-                    "If your mind wanders, gently bring your attention back to your breath.",
-                    "Notice the pause between each inhale and exhale. Rest in this peaceful space."
-                ],
-                'hi': [
-                    "आरामदायक स्थिति में बैठें। अपनी आंखें बंद करें और तीन गहरी सांसें लें।",
-                    "अपनी प्राकृतिक सांस पर ध्यान दें। हवा को नासिका में आते-जाते महसूस करें।",
-                    "यदि मन भटके, तो धीरे से अपना ध्यान सांस पर वापस लाएं।",
-                    "प्रत्येक सांस के बीच के विराम को महसूस करें। इस शांत स्थान में विश्राम करें।"
-                ]
-            },
-            'body_scan': {
-                'en': [
-                    "Lie down comfortably and close your eyes. Start by noticing your toes.",
-                    "Slowly move your attention up through your legs, feeling each part relax.",
-                    "Continue scanning through your torso, arms, and shoulders, releasing tension.",
-                    "Finally, relax your neck, face, and head. Feel your whole body at peace."
-                ],
-                'hi': [
-                    "आराम से लेटें और आंखें बंद करें। अपने पैर की उंगलियों को महसूस करें।",
-                    "धीरे-धीरे अपना ध्यान पैरों से ऊपर ले जाएं, हर हिस्से को आराम देते हुए।",
-                    "धड़, बाहों और कंधों को स्कैन करते हुए तनाव को मुक्त करें।",
-                    "अंत में गर्दन, चेहरे और सिर को आराम दें। पूरे शरीर को शांति में महसूस करें।"
-                ]
-            },
-            'loving_kindness': {
-                'en': [
-                    "Place your hand on your heart. Send loving-kindness to yourself: 'May I be happy.'",
-                    "Extend this love to someone you care about: 'May you be peaceful and free from suffering.'",
-                    "Now include someone neutral: 'May you find happiness and inner peace.'",
-                    "Finally, send love to all beings everywhere: 'May all beings be happy and free.'"
-                ],
-                'hi': [
-                    "अपना हाथ हृदय पर रखें। स्वयं को प्रेम भेजें: 'मैं खुश रहूं।'",
-                    "इस प्रेम को किसी प्रिय व्यक्ति तक फैलाएं: 'आप शांत और दुख से मुक्त रहें।'",
-                    "अब किसी तटस्थ व्यक्ति को शामिल करें: 'आपको खुशी और शांति मिले।'",
-                    "अंत में सभी प्राणियों को प्रेम भेजें: 'सभी प्राणी खुश और मुक्त रहें।'"
-                ]
-            }
-        }
-        
-        # Get appropriate guidance phase based on elapsed time
+    def _build_phase_schedule(self, meditation_type: str, language: str) -> List[Tuple[float, str]]:
+        """Precompute (start second, guidance) pairs for a session."""
+        guidance_texts = get_catalog('meditations')['guidance']
         guidance_list = guidance_texts.get(meditation_type, guidance_texts['breathing'])[language]
-        phase = min(int(elapsed_time / 2), len(guidance_list) - 1)  # Change guidance every 2 minutes
         
-        return guidance_list[phase]
+        return [(phase * PHASE_SECONDS, text) for phase, text in enumerate(guidance_list)]
     
     def _complete_meditation_session(self):
         """Complete the current meditation session and save data."""
         if not self.current_session:
             return
         
-        session = self.current_session.copy()
-        session['end_time'] = datetime.now()
-        session['duration'] = (session['end_time'] - session['start_time']).total_seconds() / 60
-        session['final_emotion'] = session['emotion_tracking'][-1]['emotion']
-        session['emotion_change'] = session['final_emotion'] - session['initial_emotion']
-        
-        # Calculate session metrics
-        session['effectiveness'] = self._calculate_effectiveness(session)
+        session = self.current_session
+        meditation = session['meditation']
+        clock = session['clock']
+        final_emotion = session['emotion_tracking'][-1]['emotion']
+        
+        # Keep only scalars; the tracking list and clock are dropped with the live session
+        record = {
+            'type': meditation['type'],
+            'name': meditation['name'],
+            'icon': meditation['icon'],
+            'started_at': session['start_time'].strftime('%Y-%m-%d %H:%M'),
+            'duration': clock.active_seconds() / 60,
+            'paused_minutes': clock.paused_seconds / 60,
+            'initial_emotion': session['initial_emotion'],
+            'final_emotion': final_emotion,
+            'emotion_change': final_emotion - session['initial_emotion'],
+            'emotion_checkins': len(session['emotion_tracking']),
+            'effectiveness': self._calculate_effectiveness(session)
+        }
         
-        self.meditation_sessions.append(session)
+        self.meditation_sessions.append(record)
+        self.analytics.add_session(record)
         self.is_active = False
         self.current_session = None
     
@@ -436,8 +301,8 @@ class MeditationModule:
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.markdown(f"**{session['meditation']['icon']} {session['meditation']['name']}**")
-                st.caption(f"{session['start_time'].strftime('%Y-%m-%d %H:%M')}")
+                st.markdown(f"**{session['icon']} {session['name']}**")
+                st.caption(session['started_at'])
             
             with col2:
                 st.metric("Duration", f"{session['duration']:.1f} min")
@@ -452,13 +317,14 @@ class MeditationModule:
                 st.metric("Effectiveness", f"{effectiveness:.0f}%")
         
         # Overall statistics
-        if len(self.meditation_sessions) >= 3:
+        overall = self.analytics.overall
+        if overall.count >= 3:
             st.subheader("🌟 Your Meditation Journey")
             
-            total_sessions = len(self.meditation_sessions)
-            total_time = sum(session['duration'] for session in self.meditation_sessions)
-            avg_improvement = sum(session['emotion_change'] for session in self.meditation_sessions) / total_sessions
-            avg_effectiveness = sum(session['effectiveness'] for session in self.meditation_sessions) / total_sessions
+            total_sessions = overall.count
+            total_time = overall.total_minutes
+            avg_improvement = overall.avg_improvement
+            avg_effectiveness = overall.avg_effectiveness
             
             col1, col2, col3, col4 = st.columns(4)
             
@@ -473,6 +339,13 @@ class MeditationModule:
             
             with col4:
                 st.metric("Avg Effectiveness", f"{avg_effectiveness * 100:.0f}%")
+            
+            meditation_type, aggregate = self.analytics.ranking()[0]
+            st.caption(
+                f"Most effective for you: {meditation_type.replace('_', ' ').title()} "
+                f"({aggregate.avg_effectiveness * 100:.0f}% ± {aggregate.effectiveness_std * 100:.0f}% "
+                f"over {aggregate.count} sessions)"
+            )
     
     def get_session_data(self) -> List[Dict]:
         """Get all meditation session data for export."""
@@ -481,5 +354,6 @@ class MeditationModule:
     def clear_session_data(self):
         """Clear all meditation session data."""
         self.meditation_sessions = []
+        self.analytics = MeditationAnalytics()
         self.current_session = None
         self.is_active = False
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+In-process metrics registry with a Prometheus endpoint.
+Counters, gauges and HDR-style log-linear histograms are updated on hot
+paths under one uncontended per-series lock each; component stats() dicts
+(caches, pools, queues) are read only when scraped. A sidecar HTTP server in
+the same process serves everything in the Prometheus text format.
+
+    METRICS_PORT=9464 (default); METRICS_PORT=0 disables the server
+    METRICS_HOST=127.0.0.1 (default); set e.g. 0.0.0.0 to let a remote scraper in
+"""
+
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+# Address the metrics server binds; loopback only unless overridden
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Histogram precision: 2**SUB_BUCKET_BITS sub-buckets per power of two (under 1% relative error)
+SUB_BUCKET_BITS = 7
+# Histograms record integers in this unit; 1e6 records seconds with microsecond resolution
+HISTOGRAM_SCALE = 1e6
+# Default bucket bounds (seconds) exported as Prometheus 'le' buckets, and exported quantiles
+EXPORT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+EXPORT_QUANTILES = (0.5, 0.9, 0.99)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        """fn, if given, is called at scrape time for the (unlabelled) value."""
+        super().__init__(name, help_text, labelnames)
+        self._fn = fn
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                self.set(self._fn())
+            except Exception as e:
+                print(f"Error reading gauge {self.name}: {e}")
+        return super().render()
+
+class HdrCounts:
+    """
+    Log-linear bucket counts of non-negative integers, as in HdrHistogram.
+    Values below 2**SUB_BUCKET_BITS are counted exactly; above that each
+    power of two is split into 2**(SUB_BUCKET_BITS - 1) equal buckets.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0.0
+
+    @staticmethod
+    def index(value: int) -> int:
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        if shift <= 0:
+            return value
+        half = 1 << (SUB_BUCKET_BITS - 1)
+        return (1 << SUB_BUCKET_BITS) + (shift - 1) * half + (value >> shift) - half
+
+    @staticmethod
+    def upper_bound(index: int) -> int:
+        """Largest value counted in bucket index."""
+        full = 1 << SUB_BUCKET_BITS
+        if index < full:
+            return index
+        half = full >> 1
+        shift = (index - full) // half + 1
+        sub = (index - full) % half + half
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value: int):
+        index = self.index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> int:
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(fraction * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return self.upper_bound(index)
+        return self.upper_bound(max(self.counts))
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = EXPORT_BUCKETS):
+        """
+        buckets are the exported 'le' bounds, counted exactly as values are
+        observed; the HDR counts behind the quantiles do not depend on them.
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: observations falling in each (previous bound, bound], plus one slot above the last
+        self._bucket_counts: Dict[Tuple[str, ...], List[int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        value = max(0.0, value)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._series.get(key)
+            if counts is None:
+                counts = self._series[key] = HdrCounts()
+                self._bucket_counts[key] = [0] * (len(self.buckets) + 1)
+            counts.record(int(value * HISTOGRAM_SCALE))
+            self._bucket_counts[key][slot] += 1
+
+    def quantile(self, fraction: float, **labels) -> float:
+        with self._lock:
+            counts = self._series.get(self._key(labels))
+            return counts.quantile(fraction) / HISTOGRAM_SCALE if counts else 0.0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        # Quantiles from the full-resolution counts, as a companion summary
+        lines.extend([f'# HELP {self.name}_quantiles {self.help} (quantiles)', f'# TYPE {self.name}_quantiles summary'])
+        with self._lock:
+            series = [(key, dict(counts.counts), counts.total, counts.sum) for key, counts in self._series.items()]
+        for key, bucket_counts, total, value_sum in series:
+            counts = HdrCounts()
+            counts.counts, counts.total, counts.sum = bucket_counts, total, value_sum
+            for fraction in EXPORT_QUANTILES:
+                labels = _format_labels(self.labelnames, key, ('quantile', str(fraction)))
+                lines.append(f'{self.name}_quantiles{labels} {_format_value(counts.quantile(fraction) / HISTOGRAM_SCALE)}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_quantiles_sum{labels} {_format_value(value_sum / HISTOGRAM_SCALE)}')
+            lines.append(f'{self.name}_quantiles_count{labels} {total}')
+        return lines
+
+    def _render_series(self, key, counts: HdrCounts) -> List[str]:
+        with self._lock:
+            bucket_counts = list(self._bucket_counts[key])
+            total, value_sum = counts.total, counts.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, bucket_counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", _format_value(bound)))} {cumulative}')
+        lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", "+Inf"))} {total}')
+        lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value_sum / HISTOGRAM_SCALE)}')
+        lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {total}')
+        return lines
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'lumosai'):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        full_name = f'{self.prefix}_{name}'
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = cls(full_name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames, fn)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = EXPORT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def register_stats(self, component: str, stats: Callable[[], Dict],
+                       counters: Sequence[str] = (), gauges: Sequence[str] = ()):
+        """
+        Expose numeric fields of a component's stats() at scrape time.
+
+        Args:
+            component: Metric name prefix, e.g. 'single_flight'
+            stats: Returns the component's stats dict
+            counters: Fields that only ever grow
+            gauges: Fields that go up and down
+        """
+        def collect() -> Iterable[str]:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Error collecting {component} metrics: {e}")
+                return []
+            lines = []
+            for fields, kind, suffix in ((counters, 'counter', '_total'), (gauges, 'gauge', '')):
+                for field in fields:
+                    if isinstance(values.get(field), (int, float)):
+                        name = f'{self.prefix}_{component}_{field}'
+                        if not name.endswith(suffix):
+                            name += suffix
+                        lines.extend([f'# HELP {name} {component} {field}', f'# TYPE {name} {kind}',
+                                      f'{name} {_format_value(values[field])}'])
+            return lines
+
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collect in collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+MODEL_REQUESTS = registry.counter('model_requests_total', 'Model API requests', ('kind', 'outcome'))
+MODEL_LATENCY = registry.histogram('model_request_seconds', 'Model API request latency', ('kind',))
+
+@contextmanager
+def model_call(kind: str):
+    """Count and time one model request of kind ('chat', 'vision', 'support')."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        MODEL_REQUESTS.inc(kind=kind, outcome=outcome)
+        MODEL_LATENCY.observe(time.perf_counter() - started, kind=kind)
+
+def metered_call(fn: Callable, kind: str) -> Callable:
+    """Wrap an upstream call so it is counted and timed as kind."""
+    def call():
+        with model_call(kind):
+            return fn()
+    return call
+
+def timed(histogram: Histogram, **labels):
+    """Decorator observing a function's duration in histogram."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorate
+
+_server = None
+_server_attempted = False
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    Start the sidecar /metrics server once per process.
+
+    Args:
+        port: Port to listen on; 0 or less disables the server
+        host: Address to bind
+
+    Returns:
+        The server, or None if disabled or the port could not be bound
+    """
+    global _server, _server_attempted
+    if _server_attempted or port <= 0:
+        return _server
+    with _server_lock:
+        if not _server_attempted:
+            _server_attempted = True
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Error starting metrics server on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
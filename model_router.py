@@ -0,0 +1,288 @@
+"""
+Latency-aware model routing with hedged requests.
+Each chat request is routed to a backend chosen from the message length, the
+user's emotion level and a per-backend EWMA of observed latency. If the first
+attempt has not answered by that backend's recent p95 latency, a hedged
+duplicate is sent; the first response wins and the other attempt is
+cancelled, except for a small sample left to finish so the p99 without
+hedging can be estimated. Attempts run as asyncio tasks on the job queue's
+event loop so cancelling the loser actually aborts its request.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from job_queue import get_job_queue
+from metrics import registry
+
+# Backends, fullest first; 'lite' backends serve only light requests
+CHAT_MODELS = (('gemini-2.5-flash', 'full'), ('gemini-2.5-flash-lite', 'lite'))
+
+# Requests that always go to a full backend: distressed users and long messages
+FULL_MODEL_MAX_EMOTION = 3
+LONG_MESSAGE_CHARS = 400
+
+# Latency EWMA smoothing, and the prior (seconds) before a backend has samples
+EWMA_ALPHA = 0.2
+PRIOR_LATENCY = 2.0
+
+# Hedge after the backend's p95 once it has enough samples, else after the default
+LATENCY_SAMPLES = 200
+MIN_SAMPLES_FOR_P95 = 20
+DEFAULT_HEDGE_DELAY = 3.0
+MIN_HEDGE_DELAY = 0.25
+
+# Stop hedging when more than this share of recent requests were hedged
+MAX_HEDGE_RATE = 0.15
+
+# Share of hedged requests whose losing primary is left to finish, so the
+# unhedged tail latency can be estimated; the rest are cancelled
+SHADOW_FRACTION = 0.25
+
+# Give up on a request after this long
+REQUEST_TIMEOUT = 60.0
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+def _weighted_percentile(samples: Sequence[tuple], fraction: float) -> float:
+    """Percentile of (value, weight) samples."""
+    ordered = sorted(samples)
+    total = sum(weight for _, weight in ordered)
+    running = 0.0
+    for value, weight in ordered:
+        running += weight
+        if running >= fraction * total:
+            return value
+    return ordered[-1][0] if ordered else 0.0
+
+class BackendStats:
+    def __init__(self, model: str, tier: str):
+        self.model = model
+        self.tier = tier
+        self.ewma = None
+        self.error_rate = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, ok: bool):
+        self.requests += 1
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA * (0.0 if ok else 1.0)
+        if ok:
+            self.latencies.append(seconds)
+            self.ewma = seconds if self.ewma is None else (1 - EWMA_ALPHA) * self.ewma + EWMA_ALPHA * seconds
+        else:
+            self.errors += 1
+
+    @property
+    def expected_latency(self) -> float:
+        """EWMA latency, inflated by the recent error rate."""
+        latency = PRIOR_LATENCY if self.ewma is None else self.ewma
+        return latency * (1 + 4 * self.error_rate)
+
+    @property
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < MIN_SAMPLES_FOR_P95:
+            return DEFAULT_HEDGE_DELAY
+        return max(MIN_HEDGE_DELAY, _percentile(self.latencies, 0.95))
+
+class ModelRouter:
+    def __init__(self, models: Sequence[tuple] = CHAT_MODELS):
+        """
+        Initialize the router.
+
+        Args:
+            models: (model name, tier) pairs, fullest first
+        """
+        self.backends = {model: BackendStats(model, tier) for model, tier in models}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self._recent_hedges = deque(maxlen=LATENCY_SAMPLES)
+        # End-to-end latency, and what it would have been without hedging as
+        # (seconds, weight); shadowed primaries stand in for the cancelled ones
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._unhedged_latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def choose(self, message_length: int, emotion_level: int) -> List[str]:
+        """
+        Rank backends for a request.
+
+        Args:
+            message_length: Characters in the user's message
+            emotion_level: Current emotion level (1-10)
+
+        Returns:
+            Model names, the one to try first at the front
+        """
+        with self._lock:
+            backends = list(self.backends.values())
+            if emotion_level <= FULL_MODEL_MAX_EMOTION or message_length > LONG_MESSAGE_CHARS:
+                backends = [backend for backend in backends if backend.tier == 'full'] or backends
+            backends.sort(key=lambda backend: backend.expected_latency)
+            return [backend.model for backend in backends]
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            recent = self._recent_hedges
+            return not recent or sum(recent) / len(recent) < MAX_HEDGE_RATE
+
+    def generate(self, call: Callable[[str], Awaitable[Any]], message_length: int, emotion_level: int,
+                 admit_hedge: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Make one routed, possibly hedged, model call. Blocks the calling thread.
+
+        Args:
+            call: Given a model name, returns a coroutine making the request
+            message_length: Characters in the user's message
+            emotion_level: Current emotion level (1-10)
+            admit_hedge: Asked before sending a hedge; return False to skip
+                it, e.g. when the duplicate would exceed the caller's quota
+
+        Returns:
+            The first successful response
+
+        Raises:
+            The last attempt's error if every attempt failed
+        """
+        models = self.choose(message_length, emotion_level)
+        future = get_job_queue().run_coroutine(self._hedged(call, models, admit_hedge))
+        return future.result(REQUEST_TIMEOUT + 5)
+
+    async def _hedged(self, call: Callable[[str], Awaitable[Any]], models: List[str],
+                      admit_hedge: Optional[Callable[[], bool]]) -> Any:
+        started = time.monotonic()
+        primary_model = models[0]
+        hedge_model = models[1] if len(models) > 1 else primary_model
+        hedge_delay = self.backends[primary_model].hedge_delay
+        primary = asyncio.ensure_future(self._attempt(call, primary_model))
+        attempts = {primary}
+        hedge = 'pending'  # then 'sent' or 'skipped'
+        error = None
+
+        try:
+            while attempts:
+                elapsed = time.monotonic() - started
+                if elapsed >= REQUEST_TIMEOUT:
+                    error = asyncio.TimeoutError("Model request timed out")
+                    break
+                timeout = REQUEST_TIMEOUT - elapsed
+                if hedge == 'pending':
+                    timeout = min(timeout, max(0.0, hedge_delay - elapsed))
+
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempts.discard(task)
+                    if task.exception() is None:
+                        self._record(started, primary, task, hedge == 'sent')
+                        if task is not primary and primary in attempts and random.random() < SHADOW_FRACTION:
+                            self._shadow(started, primary)
+                            attempts.discard(primary)
+                        return task.result()
+                    error = task.exception()
+
+                # Hedge once: at the p95 mark, or right away if the primary failed
+                if hedge == 'pending' and (not done or not attempts):
+                    if self._allow_hedge() and (admit_hedge is None or admit_hedge()):
+                        attempts.add(asyncio.ensure_future(self._attempt(call, hedge_model)))
+                        hedge = 'sent'
+                    else:
+                        hedge = 'skipped'
+        finally:
+            # Cancel the loser (or everything, on failure)
+            for task in attempts:
+                task.cancel()
+
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self._recent_hedges.append(1 if hedge == 'sent' else 0)
+        raise error
+
+    async def _attempt(self, call: Callable[[str], Awaitable[Any]], model: str) -> Any:
+        started = time.monotonic()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            with self._lock:
+                self.backends[model].observe(time.monotonic() - started, ok=False)
+            raise
+        with self._lock:
+            self.backends[model].observe(time.monotonic() - started, ok=True)
+        return result
+
+    def _record(self, started: float, primary: asyncio.Future, winner: asyncio.Future, hedged: bool):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.requests += 1
+            self.hedged += bool(hedged)
+            self.hedge_wins += winner is not primary
+            self._recent_hedges.append(1 if hedged else 0)
+            self._latencies.append(elapsed)
+            if winner is primary:
+                self._unhedged_latencies.append((elapsed, 1.0))
+
+    def _shadow(self, started: float, primary: asyncio.Future):
+        """Let a losing primary finish to measure the latency hedging saved."""
+        timeout = asyncio.get_running_loop().call_later(REQUEST_TIMEOUT - (time.monotonic() - started), primary.cancel)
+
+        def finished(task: asyncio.Future):
+            timeout.cancel()
+            latency = REQUEST_TIMEOUT if task.cancelled() else time.monotonic() - started
+            if task.cancelled() or task.exception() is None:
+                with self._lock:
+                    self._unhedged_latencies.append((latency, 1 / SHADOW_FRACTION))
+
+        primary.add_done_callback(finished)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            p99 = _percentile(self._latencies, 0.99)
+            p99_unhedged = _weighted_percentile(self._unhedged_latencies, 0.99)
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_rate': self.hedged / self.requests if self.requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'failures': self.failures,
+                'latency_p50': _percentile(self._latencies, 0.5),
+                'latency_p99': p99,
+                'unhedged_p99_estimate': p99_unhedged,
+                'p99_improvement': p99_unhedged - p99,
+                'backends': {
+                    model: {
+                        'tier': backend.tier,
+                        'ewma': backend.ewma,
+                        'hedge_delay': backend.hedge_delay,
+                        'error_rate': backend.error_rate,
+                        'requests': backend.requests,
+                        'errors': backend.errors
+                    }
+                    for model, backend in self.backends.items()
+                }
+            }
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_model_router() -> ModelRouter:
+    """Get the process-wide chat router; latency observations are shared by all sessions."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
+
+registry.register_stats('model_router', lambda: get_model_router().stats(),
+                        counters=('requests', 'hedged', 'hedge_wins', 'failures'),
+                        gauges=('hedge_rate', 'latency_p50', 'latency_p99', 'unhedged_p99_estimate', 'p99_improvement'))
@@ -0,0 +1,211 @@
+"""
+On-demand sampling profiler for slow script runs.
+While enabled, a background thread samples the script thread's Python stack
+every SAMPLE_INTERVAL seconds. Runs slower than SLOW_RUN_SECONDS are kept in
+a small process-wide ring buffer and can be downloaded as collapsed stacks
+(flamegraph.pl, speedscope, etc.) or as speedscope JSON.
+
+Enable for every session with PROFILE_RERUNS=1. With PROFILE_ALLOW_QUERY=1,
+a single session can also opt in by opening the app with ?profile=1
+(?profile=0 turns it off again); such a session only sees its own runs.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import streamlit as st
+from metrics import registry
+
+PROFILE_RERUNS = os.getenv('PROFILE_RERUNS', '0').lower() in ('1', 'true', 'yes')
+# Whether visitors may turn profiling on for their own session with ?profile=1
+PROFILE_ALLOW_QUERY = os.getenv('PROFILE_ALLOW_QUERY', '0').lower() in ('1', 'true', 'yes')
+# Runs at least this long are kept
+SLOW_RUN_SECONDS = float(os.getenv('PROFILE_THRESHOLD_SECONDS', '1.0'))
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+# Slow runs kept for download, oldest dropped first
+KEEP_SLOW_RUNS = int(os.getenv('PROFILE_KEEP_RUNS', '10'))
+
+SLOW_RUNS = registry.counter('slow_script_runs_total', 'Profiled script runs over the slow-run threshold', ('view',))
+
+# (function, file, first line) from the outermost profiled frame inward
+Stack = Tuple[Tuple[str, str, int], ...]
+
+def profiling_enabled() -> bool:
+    """Whether this session's runs are profiled; ?profile=1/0 toggles it for the session if allowed."""
+    if PROFILE_ALLOW_QUERY:
+        toggle = st.query_params.get('profile')
+        if toggle is not None:
+            st.session_state.profile_reruns = toggle == '1'
+    return PROFILE_RERUNS or (PROFILE_ALLOW_QUERY and st.session_state.get('profile_reruns', False))
+
+class SlowRun:
+    def __init__(self, run_id: int, session_id: str, view: Optional[str], started_at: datetime,
+                 duration: float, samples: Counter):
+        self.id = run_id
+        self.session_id = session_id
+        self.view = view
+        self.started_at = started_at
+        self.duration = duration
+        self.samples = samples
+
+    @property
+    def name(self) -> str:
+        return f"run-{self.id}-{self.view or 'none'}-{self.started_at.strftime('%Y%m%d_%H%M%S')}"
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one 'outer;...;inner count' line per distinct stack."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(';'.join(f"{function} ({file}:{line})" for function, file, line in stack) + f" {count}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self) -> str:
+        """Speedscope sampled-profile JSON; sample weights add up to the run's duration."""
+        frames: List[Dict] = []
+        frame_index: Dict[Tuple[str, str, int], int] = {}
+        samples, weights = [], []
+        total = sum(self.samples.values()) or 1
+        for stack, count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(self.duration * count / total)
+        return json.dumps({
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.name,
+            'exporter': 'lumosai',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.duration,
+                'samples': samples,
+                'weights': weights
+            }]
+        })
+
+class StackSampler:
+    """Samples one thread's stack, below a root frame, on a daemon thread."""
+
+    def __init__(self, thread_id: int, root, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.samples = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _label(self, code) -> Tuple[str, str, int]:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                if frame is self.root:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+class RunRecorder:
+    """Process-wide ring buffer of the last KEEP_SLOW_RUNS slow runs."""
+
+    def __init__(self, keep: int = KEEP_SLOW_RUNS):
+        self._runs = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, session_id: str, view: Optional[str], started_at: datetime, duration: float, samples: Counter):
+        with self._lock:
+            self._runs.append(SlowRun(next(self._ids), session_id, view, started_at, duration, samples))
+        SLOW_RUNS.inc(view=view or 'none')
+
+    def runs(self, session_id: Optional[str] = None) -> List[SlowRun]:
+        """Kept runs, newest first; only session_id's runs if given."""
+        with self._lock:
+            return [run for run in reversed(self._runs) if session_id is None or run.session_id == session_id]
+
+_recorder = RunRecorder()
+
+def get_run_recorder() -> RunRecorder:
+    return _recorder
+
+class profile_run:
+    """
+    Context manager profiling one script run if profiling is enabled.
+
+    Args:
+        session_id: Session the run belongs to
+        threshold: Runs at least this many seconds long are kept
+    """
+
+    def __init__(self, session_id: str, threshold: float = SLOW_RUN_SECONDS):
+        self.session_id = session_id
+        self.threshold = threshold
+        self._sampler = None
+
+    def __enter__(self):
+        if profiling_enabled():
+            self._started_at = datetime.now()
+            self._start = time.perf_counter()
+            self._sampler = StackSampler(threading.get_ident(), sys._getframe(1))
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._sampler is not None:
+            duration = time.perf_counter() - self._start
+            samples = self._sampler.stop()
+            if duration >= self.threshold and samples:
+                _recorder.add(self.session_id, st.session_state.get('active_view'), self._started_at, duration, samples)
+        return False
+
+def render_slow_runs(session_id: str):
+    """
+    Sidebar list of kept slow runs with download buttons.
+
+    Args:
+        session_id: Current session; unless profiling was enabled for the whole
+            process by the environment, only this session's runs are listed
+    """
+    runs = _recorder.runs(None if PROFILE_RERUNS else session_id)
+    with st.expander(f"🩺 Slow runs ({len(runs)})"):
+        if not runs:
+            st.caption(f"No runs over {SLOW_RUN_SECONDS:.1f}s yet.")
+        for run in runs:
+            st.markdown(f"**#{run.id}** {run.view or '-'} · {run.duration:.2f}s · {run.started_at.strftime('%H:%M:%S')}")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("Collapsed", data=run.collapsed(), file_name=f"{run.name}.txt",
+                                   mime="text/plain", key=f"profile_collapsed_{run.id}")
+            with col2:
+                st.download_button("Speedscope", data=run.speedscope(), file_name=f"{run.name}.speedscope.json",
+                                   mime="application/json", key=f"profile_speedscope_{run.id}")
@@ -2,176 +2,20 @@ import streamlit as st
 import random
 from typing import List, Dict
 from translations import get_text
+from emotion_taxonomy import remedy_category, remedy_categories
+from content_catalog import get_catalog
+from remedy_index import get_remedy_index
+from admission import quota_key
 
 class QuickRemedies:
     def __init__(self):
         """Initialize quick remedies system."""
-        self.remedies = {
-            'en': {
-                'anxiety': [
-                    {
-                        'title': '5-4-3-2-1 Grounding Technique',
-                        'description': 'Name 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, 1 you can taste.',
-                        'duration': '2-3 minutes',
-                        'category': 'grounding'
-                    },
-                    {
-                        'title': 'Progressive Muscle Relaxation',
-                        'description': 'Tense and relax each muscle group starting from your toes to your head.',
-                        'duration': '10-15 minutes',
-                        'category': 'relaxation'
-                    },
-                    {
-                        'title': 'Cold Water on Face',
-                        'description': 'Splash cold water on your face or hold ice cubes to activate the diving response.',
-                        'duration': '1-2 minutes',
-                        'category': 'physical'
-                    }
-                ],
-                'stress': [
-                    {
-                        'title': 'Box Breathing',
-                        'description': 'Breathe in for 4 counts, hold for 4, exhale for 4, hold for 4. Repeat.',
-                        'duration': '5-10 minutes',
-                        'category': 'breathing'
-                    },
-                    {
-                        'title': 'Quick Walk',
-                        'description': 'Take a 5-minute walk, focusing on your surroundings and breathing.',
-                        'duration': '5 minutes',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'Positive Affirmations',
-                        'description': 'Repeat: "I am capable, I am strong, I can handle this situation."',
-                        'duration': '2-3 minutes',
-                        'category': 'mental'
-                    }
-                ],
-                'sadness': [
-                    {
-                        'title': 'Gratitude List',
-                        'description': 'Write down 3 things you are grateful for today, no matter how small.',
-                        'duration': '5 minutes',
-                        'category': 'mental'
-                    },
-                    {
-                        'title': 'Gentle Movement',
-                        'description': 'Do some light stretching or gentle yoga poses to release tension.',
-                        'duration': '10 minutes',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'Connect with Someone',
-                        'description': 'Call or message a friend, family member, or support person.',
-                        'duration': '10-15 minutes',
-                        'category': 'social'
-                    }
-                ],
-                'anger': [
-                    {
-                        'title': 'Count to 10 Slowly',
-                        'description': 'Take deep breaths and count slowly from 1 to 10 before responding.',
-                        'duration': '1-2 minutes',
-                        'category': 'mental'
-                    },
-                    {
-                        'title': 'Physical Release',
-                        'description': 'Do jumping jacks, push-ups, or squeeze a stress ball to release tension.',
-                        'duration': '2-5 minutes',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'Write It Down',
-                        'description': 'Write about what made you angry without censoring yourself.',
-                        'duration': '5-10 minutes',
-                        'category': 'mental'
-                    }
-                ]
-            },
-            'hi': {
-                'anxiety': [
-                    {
-                        'title': '5-4-3-2-1 ग्राउंडिंग तकनीक',
-                        'description': '5 चीजें जो आप देख सकते हैं, 4 जो छू सकते हैं, 3 जो सुन सकते हैं, 2 जो सूंघ सकते हैं, 1 जो चख सकते हैं, उनके नाम बताएं।',
-                        'duration': '2-3 मिनट',
-                        'category': 'grounding'
-                    },
-                    {
-                        'title': 'प्रगतिशील मांसपेशी शिथिलता',
-                        'description': 'अपने पैर की उंगलियों से सिर तक प्रत्येक मांसपेशी समूह को तान कर फिर ढीला छोड़ें।',
-                        'duration': '10-15 मिनट',
-                        'category': 'relaxation'
-                    },
-                    {
-                        'title': 'चेहरे पर ठंडा पानी',
-                        'description': 'अपने चेहरे पर ठंडा पानी छिड़कें या बर्फ के टुकड़े पकड़ें।',
-                        'duration': '1-2 मिनट',
-                        'category': 'physical'
-                    }
-                ],
-                'stress': [
-                    {
-                        'title': 'बॉक्स ब्रीदिंग',
-                        'description': '4 गिनती में सांस लें, 4 में रोकें, 4 में छोड़ें, 4 में रोकें। दोहराएं।',
-                        'duration': '5-10 मिनट',
-                        'category': 'breathing'
-                    },
-                    {
-                        'title': 'तेज चलना',
-                        'description': '5 मिनट तेज चलें, अपने आस-पास और सांस पर ध्यान दें।',
-                        'duration': '5 मिनट',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'सकारात्मक पुष्टि',
-                        'description': 'दोहराएं: "मैं सक्षम हूं, मैं मजबूत हूं, मैं इस स्थिति को संभाल सकता हूं।"',
-                        'duration': '2-3 मिनट',
-                        'category': 'mental'
-                    }
-                ],
-                'sadness': [
-                    {
-                        'title': 'कृतज्ञता सूची',
-                        'description': 'आज आप जिन 3 बातों के लिए आभारी हैं, उन्हें लिखें, चाहे वे कितनी भी छोटी हों।',
-                        'duration': '5 मिनट',
-                        'category': 'mental'
-                    },
-                    {
-                        'title': 'हल्का व्यायाम',
-                        'description': 'कुछ हल्की स्ट्रेचिंग या योग आसन करें।',
-                        'duration': '10 मिनट',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'किसी से जुड़ें',
-                        'description': 'किसी मित्र, परिवारजन या सहायक व्यक्ति को फोन करें या संदेश भेजें।',
-                        'duration': '10-15 मिनट',
-                        'category': 'social'
-                    }
-                ],
-                'anger': [
-                    {
-                        'title': '10 तक धीरे-धीरे गिनती करें',
-                        'description': 'जवाब देने से पहले गहरी सांस लें और 1 से 10 तक धीरे-धीरे गिनें।',
-                        'duration': '1-2 मिनट',
-                        'category': 'mental'
-                    },
-                    {
-                        'title': 'शारीरिक निकास',
-                        'description': 'जंपिंग जैक्स, पुश-अप्स करें या स्ट्रेस बॉल दबाएं।',
-                        'duration': '2-5 मिनट',
-                        'category': 'physical'
-                    },
-                    {
-                        'title': 'इसे लिख दें',
-                        'description': 'जो बात आपको गुस्सा दिलाई है, उसके बारे में बिना रोक-टोक के लिखें।',
-                        'duration': '5-10 मिनट',
-                        'category': 'mental'
-                    }
-                ]
-            }
-        }
+        pass
+    
+    @property
+    def remedies(self) -> Dict:
+        """Remedies by language and category, shared read-only across sessions."""
+        return get_catalog('remedies').data
     
     def display_remedies_interface(self, language: str, emotion_level: int):
         """
@@ -184,19 +28,15 @@ class QuickRemedies:
         st.header(get_text("quick_remedies", language))
         st.markdown(get_text("remedies_description", language))
         
-        # Emotion-based remedy suggestions
-        emotion_category = self._get_emotion_category(emotion_level)
-        
         col1, col2 = st.columns([2, 1])
         
         with col1:
             # Display suggested remedies based on emotion
             st.subheader(get_text("suggested_for_you", language))
             
-            suggested_remedies = self.remedies[language].get(emotion_category, [])
-            if suggested_remedies:
-                for i, remedy in enumerate(suggested_remedies[:2]):  # Show top 2 suggestions
-                    self._display_remedy_card(remedy, language, f"suggested_{i}")
+            suggested_remedies = self.get_recommended_remedies(emotion_level, language, k=2)
+            for i, remedy in enumerate(suggested_remedies):  # Show top 2 suggestions
+                self._display_remedy_card(remedy, language, f"suggested_{i}")
             
             # All categories section
             st.subheader(get_text("all_remedies", language))
@@ -300,6 +140,18 @@ class QuickRemedies:
             with col2:
                 if st.button(get_text("set_reminder", language), key=f"remind_{key_suffix}"):
                     st.info(get_text("reminder_set", language))
+            
+            # Helpfulness feedback feeds the recommender's ranking
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(get_text("remedy_helpful", language), key=f"helpful_{key_suffix}"):
+                    self.record_feedback(remedy, True)
+                    st.success(get_text("feedback_thanks", language))
+            
+            with col2:
+                if st.button(get_text("remedy_not_helpful", language), key=f"unhelpful_{key_suffix}"):
+                    self.record_feedback(remedy, False)
+                    st.info(get_text("feedback_thanks", language))
     
     def _display_emergency_resources(self, language: str):
         """Display emergency mental health resources."""
@@ -336,23 +188,39 @@ class QuickRemedies:
         
         st.warning(emergency_info)
     
+    def get_recommended_remedies(self, emotion_level: int, language: str, k: int = 2,
+                                 max_minutes: float = None) -> List[Dict]:
+        """
+        Get the best remedies for a mood level, ranked by tag match and feedback.
+        
+        Args:
+            emotion_level: Current emotion level (1-10)
+            language: Current language
+            k: Number of remedies
+            max_minutes: Only include remedies that fit in this many minutes
+            
+        Returns:
+            Remedy entries, best first
+        """
+        return get_remedy_index().recommend(
+            language,
+            emotions=remedy_categories(emotion_level),
+            max_minutes=max_minutes,
+            user_id=quota_key(),
+            k=k
+        )
+    
+    def record_feedback(self, remedy: Dict, helpful: bool):
+        """Record whether a remedy helped, for this user and globally."""
+        get_remedy_index().record_feedback(remedy['id'], helpful, quota_key())
+    
     def _get_emotion_category(self, emotion_level: int) -> str:
         """Determine emotion category based on level."""
-        if emotion_level <= 3:
-            return 'sadness'
-        elif emotion_level <= 4:
-            return 'stress'
-        elif emotion_level <= 6:
-            return 'anxiety'
-        else:
-            return random.choice(['stress', 'anxiety'])  # For higher emotions, general techniques
+        return remedy_category(emotion_level)
     
     def _get_random_remedy(self, language: str) -> Dict:
         """Get a random remedy from all categories."""
-        all_remedies = []
-        for category_remedies in self.remedies[language].values():
-            all_remedies.extend(category_remedies)
-        return random.choice(all_remedies)
+        return random.choice(get_catalog('remedies').entries(language))
     
     def _get_random_affirmation(self, language: str) -> str:
         """Get a random positive affirmation."""
@@ -390,14 +258,9 @@ class QuickRemedies:
         Returns:
             List of relevant remedies
         """
-        situation_mapping = {
-            'work_stress': 'stress',
-            'relationship': 'sadness', 
-            'health_anxiety': 'anxiety',
-            'financial_worry': 'stress',
-            'family_issues': 'anger',
-            'social_anxiety': 'anxiety'
-        }
+        index = get_remedy_index()
+        if not index.has_tag(f"situation:{situation}"):
+            # Unknown situations get general stress relief, as before
+            return index.recommend(language, emotions=('stress',), user_id=quota_key(), k=None)
         
-        category = situation_mapping.get(situation, 'stress')
-        return self.remedies[language].get(category, [])
+        return index.recommend(language, situation=situation, user_id=quota_key(), k=None)
@@ -0,0 +1,219 @@
+"""
+Compact record types for chat messages and emotion entries.
+A plain dict per message costs a hash table plus an ISO timestamp string;
+these records keep the same fields in __slots__ instead: role and emotion as
+small ints, the timestamp as int64 microseconds since the epoch, and interned
+content. They are read-only Mappings, so code written against the dict form
+(msg['role'], msg.get('emotion'), 'emotion' in msg, dict(msg)) keeps working.
+
+Records that do not fit the compact layout (extra keys, unknown roles,
+timezone-aware timestamps) stay plain dicts, so histories may mix both.
+"""
+
+import json
+import random
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+ROLES = ('user', 'assistant')
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+NO_EMOTION = -1
+
+# Naive timestamps are stored relative to a naive epoch, so no timezone is applied either way
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_epoch_us(timestamp: Any) -> Optional[int]:
+    """Microseconds since the epoch, or None if the ISO string would not round-trip exactly."""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None or parsed.isoformat() != timestamp:
+        return None
+    return (parsed - _EPOCH) // _MICROSECOND
+
+def _to_iso(epoch_us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=epoch_us)).isoformat()
+
+def _emotion_code(emotion: Any) -> Optional[int]:
+    """The emotion as an int8-range level, or None if it cannot be stored compactly."""
+    if type(emotion) is int and -128 < emotion < 128:
+        return emotion
+    return None
+
+class ChatMessage(Mapping):
+    """A chat message: role, content, timestamp and, for user messages, the detected emotion."""
+
+    __slots__ = ('role_code', 'emotion_code', 'epoch_us', 'content')
+
+    def __init__(self, role_code: int, content: str, epoch_us: int, emotion_code: int = NO_EMOTION):
+        self.role_code = role_code
+        self.emotion_code = emotion_code
+        self.epoch_us = epoch_us
+        self.content = sys.intern(content)
+
+    @classmethod
+    def now(cls, role: str, content: str, emotion: Optional[int] = None) -> 'ChatMessage':
+        return cls(_ROLE_CODES[role], content, (datetime.now() - _EPOCH) // _MICROSECOND,
+                   NO_EMOTION if emotion is None else int(emotion))
+
+    def _fields(self):
+        yield 'role'
+        yield 'content'
+        yield 'timestamp'
+        if self.emotion_code != NO_EMOTION:
+            yield 'emotion'
+
+    def __getitem__(self, key: str):
+        if key == 'role':
+            return ROLES[self.role_code]
+        if key == 'content':
+            return self.content
+        if key == 'timestamp':
+            return _to_iso(self.epoch_us)
+        if key == 'emotion' and self.emotion_code != NO_EMOTION:
+            return self.emotion_code
+        raise KeyError(key)
+
+    def __iter__(self):
+        return self._fields()
+
+    def __len__(self) -> int:
+        return 3 if self.emotion_code == NO_EMOTION else 4
+
+    def __repr__(self) -> str:
+        return f"ChatMessage({dict(self)!r})"
+
+class EmotionEntry(Mapping):
+    """An emotion level (1-10) recorded at a point in time."""
+
+    __slots__ = ('emotion', 'epoch_us')
+
+    def __init__(self, emotion: int, epoch_us: int):
+        self.emotion = emotion
+        self.epoch_us = epoch_us
+
+    @classmethod
+    def now(cls, emotion: int) -> 'EmotionEntry':
+        return cls(int(emotion), (datetime.now() - _EPOCH) // _MICROSECOND)
+
+    def __getitem__(self, key: str):
+        if key == 'emotion':
+            return self.emotion
+        if key == 'timestamp':
+            return _to_iso(self.epoch_us)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('emotion', 'timestamp'))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"EmotionEntry({dict(self)!r})"
+
+Record = Union[ChatMessage, EmotionEntry, Dict]
+
+def compact_message(message: Mapping) -> Record:
+    """The compact form of a chat message dict, or the message itself if it does not fit."""
+    if isinstance(message, ChatMessage) or not isinstance(message, dict):
+        return message
+    if not set(message) <= {'role', 'content', 'timestamp', 'emotion'}:
+        return message
+    role_code = _ROLE_CODES.get(message.get('role'))
+    content = message.get('content')
+    epoch_us = _to_epoch_us(message.get('timestamp'))
+    emotion_code = _emotion_code(message['emotion']) if 'emotion' in message else NO_EMOTION
+    if role_code is None or type(content) is not str or epoch_us is None or emotion_code is None:
+        return message
+    return ChatMessage(role_code, content, epoch_us, emotion_code)
+
+def compact_emotion(entry: Mapping) -> Record:
+    """The compact form of an emotion entry dict, or the entry itself if it does not fit."""
+    if isinstance(entry, EmotionEntry) or not isinstance(entry, dict):
+        return entry
+    if set(entry) != {'emotion', 'timestamp'}:
+        return entry
+    emotion = _emotion_code(entry['emotion'])
+    epoch_us = _to_epoch_us(entry['timestamp'])
+    if emotion is None or epoch_us is None:
+        return entry
+    return EmotionEntry(emotion, epoch_us)
+
+def compact_records(kind: str, records: Iterable[Mapping]) -> List[Record]:
+    """Compact a batch of 'chat_history' or 'emotion_history' records."""
+    compact = compact_message if kind == 'chat_history' else compact_emotion
+    return [compact(record) for record in records]
+
+def plain(record: Any) -> Dict:
+    """json.dumps default= hook turning compact records back into dicts."""
+    if isinstance(record, (ChatMessage, EmotionEntry)):
+        return dict(record)
+    raise TypeError(f"Object of type {type(record).__name__} is not JSON serializable")
+
+def as_dicts(records: Iterable[Mapping]) -> List[Dict]:
+    """Records as plain dicts, e.g. for pandas."""
+    return [record if type(record) is dict else dict(record) for record in records]
+
+def run_benchmark(messages: int = 50_000, seed: int = 7) -> Dict:
+    """
+    Compare memory and access time of dict and compact chat histories.
+
+    Args:
+        messages: Number of chat messages; every user message also gets an emotion entry
+        seed: Random seed
+
+    Returns:
+        Bytes per record for each representation and access timings
+    """
+    from session_memory import deep_sizeof
+
+    rng = random.Random(seed)
+    words = ['calm', 'tired', 'anxious', 'work', 'sleep', 'family', 'today', 'really', 'better', 'breathe']
+    start_time = datetime(2025, 1, 1, 9, 0)
+    chat, emotions = [], []
+    for i in range(messages):
+        timestamp = (start_time + timedelta(seconds=37 * i, microseconds=rng.randrange(1_000_000))).isoformat()
+        role = ROLES[i % 2]
+        message = {'role': role, 'content': ' '.join(rng.choice(words) for _ in range(rng.randint(5, 40))),
+                   'timestamp': timestamp}
+        if role == 'user':
+            message['emotion'] = rng.randint(1, 10)
+            emotions.append({'emotion': message['emotion'], 'timestamp': timestamp})
+        chat.append(message)
+
+    compact_chat = compact_records('chat_history', chat)
+    compact_emotions = compact_records('emotion_history', emotions)
+
+    # Content strings are shared by both forms, so only the per-record overhead differs
+    contents = sum(deep_sizeof(message['content']) for message in chat)
+    results = {
+        'messages': messages,
+        'dict_message_bytes': (deep_sizeof(chat) - contents) / messages,
+        'compact_message_bytes': (deep_sizeof(compact_chat) - contents) / messages,
+        'dict_emotion_bytes': deep_sizeof(emotions) / len(emotions),
+        'compact_emotion_bytes': deep_sizeof(compact_emotions) / len(emotions)
+    }
+    results['message_saving'] = 1 - results['compact_message_bytes'] / results['dict_message_bytes']
+    results['emotion_saving'] = 1 - results['compact_emotion_bytes'] / results['dict_emotion_bytes']
+
+    for name, history in (('dict', chat), ('compact', compact_chat)):
+        start = time.perf_counter()
+        for message in history:
+            message['role'], message['content'], message.get('emotion')
+        results[f'{name}_read_us'] = (time.perf_counter() - start) / messages * 1e6
+        start = time.perf_counter()
+        json.dumps(history, default=plain)
+        results[f'{name}_json_us'] = (time.perf_counter() - start) / messages * 1e6
+    return results
+
+if __name__ == '__main__':
+    for name, value in run_benchmark().items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,222 @@
+"""
+Inverted-index remedy recommender.
+Every remedy in the catalog gets a doc id and is posted under tags for its
+language, emotion, situations and duration bucket. A query adds tag weights
+over the posting arrays, adds a smoothed helpfulness score from global and
+per-user feedback counters, and takes the top K with argpartition, so
+ranking stays vectorised at thousands of remedies.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from content_catalog import get_catalog
+
+# Score added for each matched tag kind
+EMOTION_WEIGHT = 3.0
+SITUATION_WEIGHT = 2.0
+DURATION_WEIGHT = 1.0
+
+# Weight of the smoothed helpfulness ratio (0-1) from all users and from the asking user
+GLOBAL_FEEDBACK_WEIGHT = 1.0
+USER_FEEDBACK_WEIGHT = 2.0
+
+# Upper bound in minutes for each duration bucket
+DURATION_BUCKETS = (('quick', 3), ('short', 10), ('long', float('inf')))
+
+def duration_minutes(duration: str) -> float:
+    """Longest time in a duration string such as '5-10 minutes' or '2-3 मिनट'."""
+    numbers = re.findall(r'\d+', duration or '')
+    return float(max(int(number) for number in numbers)) if numbers else float('inf')
+
+def duration_bucket(minutes: float) -> str:
+    for bucket, limit in DURATION_BUCKETS:
+        if minutes <= limit:
+            return bucket
+    return DURATION_BUCKETS[-1][0]
+
+class RemedyIndex:
+    def __init__(self, catalog_name: str = 'remedies'):
+        """
+        Initialize the index; postings are built from the catalog on first use.
+
+        Args:
+            catalog_name: Content catalog holding language -> emotion -> remedies
+        """
+        self.catalog_name = catalog_name
+        self._source = None
+        self._lock = threading.Lock()
+        self._feedback_lock = threading.Lock()
+        # Feedback is keyed by remedy id so it carries across languages and catalog reloads
+        self.global_feedback: Dict[str, List[int]] = {}
+        self.user_feedback: Dict[str, Dict[str, List[int]]] = {}
+        # user -> (doc ids, score deltas), rebuilt after that user's next vote
+        self._user_adjustments: Dict[str, tuple] = {}
+
+    def _ensure_built(self):
+        """(Re)build postings when the catalog has been (re)loaded."""
+        catalog = get_catalog(self.catalog_name)
+        if catalog.data is self._source:
+            return
+        with self._lock:
+            if catalog.data is not self._source:
+                self._build(catalog.data)
+
+    def _build(self, data: Dict):
+        docs, remedy_ids, minutes = [], [], []
+        postings: Dict[str, List[int]] = {}
+
+        for language, emotions in data.items():
+            for emotion, remedies in emotions.items():
+                for remedy in remedies:
+                    doc_id = len(docs)
+                    docs.append(remedy)
+                    remedy_ids.append(remedy['id'])
+                    length = duration_minutes(remedy.get('duration'))
+                    minutes.append(length)
+
+                    tags = [f"language:{language}", f"emotion:{emotion}", f"duration:{duration_bucket(length)}"]
+                    tags.extend(f"situation:{situation}" for situation in remedy.get('situations', ()))
+                    for tag in tags:
+                        postings.setdefault(tag, []).append(doc_id)
+
+        self.docs = tuple(docs)
+        self.remedy_ids = tuple(remedy_ids)
+        self.minutes = np.array(minutes, dtype=np.float64)
+        self.postings = {tag: np.array(ids, dtype=np.intp) for tag, ids in postings.items()}
+        self._doc_ids_by_remedy: Dict[str, np.ndarray] = {}
+        for doc_id, remedy_id in enumerate(remedy_ids):
+            self._doc_ids_by_remedy.setdefault(remedy_id, []).append(doc_id)
+        self._doc_ids_by_remedy = {key: np.array(ids, dtype=np.intp) for key, ids in self._doc_ids_by_remedy.items()}
+
+        # Global feedback as dense arrays so scoring is one vector expression
+        self._helpful = np.zeros(len(docs), dtype=np.float64)
+        self._unhelpful = np.zeros(len(docs), dtype=np.float64)
+        with self._feedback_lock:
+            for remedy_id, (helpful, unhelpful) in self.global_feedback.items():
+                doc_ids = self._doc_ids_by_remedy.get(remedy_id)
+                if doc_ids is not None:
+                    self._helpful[doc_ids] = helpful
+                    self._unhelpful[doc_ids] = unhelpful
+            self._user_adjustments = {}
+
+        self._source = data
+
+    def has_tag(self, tag: str) -> bool:
+        self._ensure_built()
+        return tag in self.postings
+
+    def record_feedback(self, remedy_id: str, helpful: bool, user_id: Optional[str] = None):
+        """
+        Count a helpful / not helpful vote.
+
+        Args:
+            remedy_id: Catalog id of the remedy
+            helpful: True for helpful
+            user_id: Voter, also counted in their personal feedback
+        """
+        self._ensure_built()
+        slot = 0 if helpful else 1
+        with self._feedback_lock:
+            self.global_feedback.setdefault(remedy_id, [0, 0])[slot] += 1
+            if user_id:
+                self.user_feedback.setdefault(user_id, {}).setdefault(remedy_id, [0, 0])[slot] += 1
+                self._user_adjustments.pop(user_id, None)
+            doc_ids = self._doc_ids_by_remedy.get(remedy_id)
+            if doc_ids is not None:
+                (self._helpful if helpful else self._unhelpful)[doc_ids] += 1
+
+    def recommend(self, language: str, emotions: Iterable[str] = (), situation: Optional[str] = None,
+                  max_minutes: Optional[float] = None, preferred_duration: Optional[str] = None,
+                  user_id: Optional[str] = None, k: Optional[int] = 5) -> List[Dict]:
+        """
+        Rank remedies for a query.
+
+        Args:
+            language: Language of the remedies to return
+            emotions: Emotion tags to match (e.g. 'stress', 'anxiety')
+            situation: Situation tag to match (e.g. 'work_stress')
+            max_minutes: Exclude remedies that can take longer than this
+            preferred_duration: Duration bucket to favour ('quick', 'short', 'long')
+            user_id: Apply this user's feedback on top of the global feedback
+            k: Number of results, or None for every matching remedy
+
+        Returns:
+            Catalog remedy entries, best first. Only remedies matching at least
+            one emotion or situation tag are returned when any are given.
+        """
+        self._ensure_built()
+        candidates = self.postings.get(f"language:{language}")
+        if candidates is None:
+            return []
+
+        scores = np.zeros(len(self.docs), dtype=np.float64)
+        tag_match = np.zeros(len(self.docs), dtype=bool)
+        query_tags = [(f"emotion:{emotion}", EMOTION_WEIGHT) for emotion in emotions]
+        if situation:
+            query_tags.append((f"situation:{situation}", SITUATION_WEIGHT))
+        for tag, weight in query_tags:
+            postings = self.postings.get(tag)
+            if postings is not None:
+                scores[postings] += weight
+                tag_match[postings] = True
+        if preferred_duration:
+            postings = self.postings.get(f"duration:{preferred_duration}")
+            if postings is not None:
+                scores[postings] += DURATION_WEIGHT
+
+        mask = np.zeros(len(self.docs), dtype=bool)
+        mask[candidates] = True
+        if query_tags:
+            mask &= tag_match
+        if max_minutes is not None:
+            mask &= self.minutes <= max_minutes
+
+        # Laplace-smoothed helpfulness ratio; unrated remedies score 0.5
+        scores += GLOBAL_FEEDBACK_WEIGHT * (self._helpful + 1) / (self._helpful + self._unhelpful + 2)
+        if user_id:
+            doc_ids, deltas = self._user_adjustment(user_id)
+            scores[doc_ids] += deltas
+
+        matched = np.flatnonzero(mask)
+        if len(matched) == 0:
+            return []
+        if k is not None and k < len(matched):
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        # Best score first, catalog order between equal scores
+        ordered = matched[np.lexsort((matched, -scores[matched]))]
+        return [self.docs[doc_id] for doc_id in ordered]
+
+    def _user_adjustment(self, user_id: str) -> tuple:
+        """Sparse per-user score deltas: positive for remedies the user found helpful."""
+        with self._feedback_lock:
+            cached = self._user_adjustments.get(user_id)
+            if cached is not None:
+                return cached
+
+            doc_ids, deltas = [], []
+            for remedy_id, (helpful, unhelpful) in self.user_feedback.get(user_id, {}).items():
+                ids = self._doc_ids_by_remedy.get(remedy_id)
+                if ids is not None:
+                    doc_ids.append(ids)
+                    deltas.append(np.full(len(ids), USER_FEEDBACK_WEIGHT * ((helpful + 1) / (helpful + unhelpful + 2) - 0.5)))
+
+            cached = (
+                np.concatenate(doc_ids) if doc_ids else np.empty(0, dtype=np.intp),
+                np.concatenate(deltas) if deltas else np.empty(0, dtype=np.float64)
+            )
+            self._user_adjustments[user_id] = cached
+            return cached
+
+_remedy_index = None
+_remedy_index_lock = threading.Lock()
+
+def get_remedy_index() -> RemedyIndex:
+    """Get the process-wide remedy index, whose feedback counters are shared by all sessions."""
+    global _remedy_index
+    if _remedy_index is None:
+        with _remedy_index_lock:
+            if _remedy_index is None:
+                _remedy_index = RemedyIndex()
+    return _remedy_index
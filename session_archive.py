@@ -0,0 +1,241 @@
+"""
+Compressed archive tier for saved chat sessions.
+An archived session is one bytes blob: a fixed prefix, a small JSON header
+(id, title, message_count, created_at) and the compressed messages and
+emotions. The sidebar only needs the header, which is read without touching
+the body; the body is decompressed only when the session is opened.
+
+    prefix   magic b'LSA1' | codec (1 byte) | header length (uint16, big endian)
+    header   UTF-8 JSON
+    body     zstd or zlib compressed JSON {'messages': [...], 'emotions': [...]}
+
+zstd is used when the zstandard package is installed, zlib otherwise.
+"""
+
+import json
+import random
+import struct
+import time
+import zlib
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Union
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+from records import compact_records, plain
+
+MAGIC = b'LSA1'
+_PREFIX = struct.Struct('>4sBH')
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# Characters of the first user message used as the session title
+TITLE_CHARS = 40
+
+HEADER_KEYS = ('id', 'title', 'message_count', 'created_at')
+
+class ArchiveError(Exception):
+    """Raised for blobs that are not session archives or use an unavailable codec."""
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ArchiveError("Session archived with zstd, but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    raise ArchiveError(f"Unknown archive codec {codec}")
+
+def session_title(messages: List[Mapping]) -> str:
+    """Title from the first user message."""
+    for message in messages:
+        if message.get('role') == 'user':
+            content = ' '.join(str(message.get('content', '')).split())
+            return content if len(content) <= TITLE_CHARS else content[:TITLE_CHARS - 1] + '…'
+    return ''
+
+def encode_session(session: Mapping, codec: int = None) -> bytes:
+    """
+    Serialise a saved session dict into an archive blob.
+
+    Args:
+        session: Dict with id, messages, emotions, created_at and message_count
+        codec: CODEC_ZSTD or CODEC_ZLIB; defaults to zstd when available
+
+    Returns:
+        Archive blob
+    """
+    if codec is None:
+        codec = CODEC_ZSTD if ZSTD_AVAILABLE else CODEC_ZLIB
+    header = {
+        'id': session['id'],
+        'title': session.get('title') or session_title(session['messages']),
+        'message_count': session['message_count'],
+        'created_at': session['created_at']
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    body = json.dumps({'messages': session['messages'], 'emotions': session['emotions']},
+                      ensure_ascii=False, separators=(',', ':'), default=plain).encode('utf-8')
+    return _PREFIX.pack(MAGIC, codec, len(header_bytes)) + header_bytes + _compress(body, codec)
+
+def decode_header(blob: bytes) -> Dict[str, Any]:
+    """Read an archive's header without decompressing its body."""
+    magic, _, header_length = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ArchiveError("Not a session archive")
+    return json.loads(blob[_PREFIX.size:_PREFIX.size + header_length].decode('utf-8'))
+
+def decode_body(blob: bytes) -> Dict[str, List]:
+    """Decompress an archive's messages and emotions, as compact records where they fit."""
+    magic, codec, header_length = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ArchiveError("Not a session archive")
+    body = json.loads(_decompress(blob[_PREFIX.size + header_length:], codec))
+    return {
+        'messages': compact_records('chat_history', body['messages']),
+        'emotions': compact_records('emotion_history', body['emotions'])
+    }
+
+class ArchivedSession(Mapping):
+    """
+    A saved session held as an archive blob.
+
+    Reads like the saved-session dict: header keys come from the decoded
+    header, while 'messages' and 'emotions' decompress the body on every
+    access, so use restore_session() to get both at once.
+    """
+
+    __slots__ = ('blob', 'header')
+
+    def __init__(self, blob: bytes):
+        self.blob = blob
+        self.header = decode_header(blob)
+
+    def __getitem__(self, key: str):
+        if key in self.header:
+            return self.header[key]
+        if key in ('messages', 'emotions'):
+            return decode_body(self.blob)[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(HEADER_KEYS + ('messages', 'emotions'))
+
+    def __len__(self) -> int:
+        return len(HEADER_KEYS) + 2
+
+    def restore(self) -> Dict[str, Any]:
+        """The full saved-session dict."""
+        session = dict(self.header)
+        session.update(decode_body(self.blob))
+        return session
+
+SavedSession = Union[Dict[str, Any], ArchivedSession]
+
+def archive_session(session: SavedSession) -> ArchivedSession:
+    """Archive a saved session dict; archived sessions are returned as is."""
+    if isinstance(session, ArchivedSession):
+        return session
+    return ArchivedSession(encode_session(session))
+
+def restore_session(session: SavedSession) -> Dict[str, Any]:
+    """A saved session as a dict with its messages and emotions."""
+    if isinstance(session, ArchivedSession):
+        return session.restore()
+    return session
+
+def archive_sessions(sessions: List[SavedSession], keep: int = 0) -> int:
+    """
+    Archive, in place, all but the newest keep saved sessions.
+
+    Returns:
+        Number of sessions archived by this call
+    """
+    archived = 0
+    for i in range(max(0, len(sessions) - keep)):
+        if not isinstance(sessions[i], ArchivedSession):
+            sessions[i] = archive_session(sessions[i])
+            archived += 1
+    return archived
+
+def run_benchmark(sessions: int = 30, messages: int = 200, seed: int = 7) -> Dict:
+    """
+    Measure archive size, header read and restore latency for each available codec.
+
+    Args:
+        sessions: Number of saved sessions
+        messages: Chat messages per session
+        seed: Random seed
+
+    Returns:
+        Compression ratio and per-session timings in microseconds, by codec
+    """
+    from session_memory import deep_sizeof
+
+    rng = random.Random(seed)
+    words = ['calm', 'tired', 'anxious', 'work', 'sleep', 'family', 'today', 'really', 'better', 'breathe',
+             'I', 'feel', 'you', 'that', 'sounds', 'hard', 'try', 'a', 'short', 'walk']
+    saved = []
+    for s in range(sessions):
+        start_time = datetime(2025, 1, 1, 9, 0) + timedelta(days=s)
+        chat, emotions = [], []
+        for i in range(messages):
+            timestamp = (start_time + timedelta(seconds=40 * i, microseconds=rng.randrange(1_000_000))).isoformat()
+            message = {'role': 'user' if i % 2 == 0 else 'assistant',
+                       'content': ' '.join(rng.choice(words) for _ in range(rng.randint(5, 60))),
+                       'timestamp': timestamp}
+            if i % 2 == 0:
+                message['emotion'] = rng.randint(1, 10)
+                emotions.append({'emotion': message['emotion'], 'timestamp': timestamp})
+            chat.append(message)
+        saved.append({
+            'id': str(start_time.timestamp()),
+            'messages': compact_records('chat_history', chat),
+            'emotions': compact_records('emotion_history', emotions),
+            'created_at': start_time.isoformat(),
+            'message_count': messages // 2
+        })
+
+    live_bytes = deep_sizeof(saved)
+    raw_json = sum(len(json.dumps({'messages': s['messages'], 'emotions': s['emotions']},
+                                  ensure_ascii=False, separators=(',', ':'), default=plain).encode('utf-8'))
+                   for s in saved)
+    results = {'sessions': sessions, 'messages_per_session': messages, 'live_bytes': live_bytes, 'json_bytes': raw_json}
+
+    codecs = [('zlib', CODEC_ZLIB)] + ([('zstd', CODEC_ZSTD)] if ZSTD_AVAILABLE else [])
+    for name, codec in codecs:
+        start = time.perf_counter()
+        archived = [ArchivedSession(encode_session(s, codec)) for s in saved]
+        archive_us = (time.perf_counter() - start) / sessions * 1e6
+        archive_bytes = deep_sizeof(archived)
+
+        start = time.perf_counter()
+        for session in archived:
+            decode_header(session.blob)
+        header_us = (time.perf_counter() - start) / sessions * 1e6
+
+        start = time.perf_counter()
+        for session in archived:
+            session.restore()
+        restore_us = (time.perf_counter() - start) / sessions * 1e6
+
+        results[f'{name}_bytes'] = archive_bytes
+        results[f'{name}_ratio_vs_json'] = raw_json / archive_bytes
+        results[f'{name}_ratio_vs_live'] = live_bytes / archive_bytes
+        results[f'{name}_archive_us'] = archive_us
+        results[f'{name}_header_us'] = header_us
+        results[f'{name}_restore_us'] = restore_us
+    return results
+
+if __name__ == '__main__':
+    for name, value in run_benchmark().items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
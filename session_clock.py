@@ -0,0 +1,95 @@
+"""
+Pausable clock for timed sessions.
+Stores only start, pause and resume timestamps plus seconds skipped ahead, so
+the current position, phase and progress are computed on demand in constant
+time from the wall clock instead of being advanced by reruns.
+"""
+
+import time
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+class SessionClock:
+    def __init__(self, duration_seconds: float, phases: Sequence[Tuple[float, str]], now: Optional[float] = None):
+        """
+        Start a clock.
+
+        Args:
+            duration_seconds: Planned session length
+            phases: (start offset in seconds, payload) pairs in ascending order,
+                precomputed once for the whole session
+            now: Start timestamp; defaults to time.time()
+        """
+        self.duration = float(duration_seconds)
+        self.phase_starts = tuple(start for start, _ in phases)
+        self.phase_payloads = tuple(payload for _, payload in phases)
+        self.started_at = time.time() if now is None else now
+        self.paused_at = None
+        self.paused_seconds = 0.0
+        self.skipped_seconds = 0.0
+        self.events: List[Tuple[str, float]] = [('start', self.started_at)]
+
+    def _now(self, now: Optional[float]) -> float:
+        if now is None:
+            now = time.time()
+        # A paused clock is frozen at the moment it was paused
+        return self.paused_at if self.paused_at is not None else now
+
+    def active_seconds(self, now: Optional[float] = None) -> float:
+        """Wall-clock seconds spent running, excluding pauses."""
+        return max(0.0, self._now(now) - self.started_at - self.paused_seconds)
+
+    def position(self, now: Optional[float] = None) -> float:
+        """Seconds into the session schedule, including phases skipped ahead."""
+        return min(self.duration, self.active_seconds(now) + self.skipped_seconds)
+
+    def progress(self, now: Optional[float] = None) -> float:
+        """Fraction of the session completed (0-1)."""
+        return self.position(now) / self.duration if self.duration > 0 else 1.0
+
+    def finished(self, now: Optional[float] = None) -> bool:
+        return self.position(now) >= self.duration
+
+    @property
+    def is_paused(self) -> bool:
+        return self.paused_at is not None
+
+    def pause(self, now: Optional[float] = None):
+        if self.paused_at is None:
+            self.paused_at = time.time() if now is None else now
+            self.events.append(('pause', self.paused_at))
+
+    def resume(self, now: Optional[float] = None):
+        if self.paused_at is not None:
+            now = time.time() if now is None else now
+            self.paused_seconds += now - self.paused_at
+            self.paused_at = None
+            self.events.append(('resume', now))
+
+    def phase_index(self, now: Optional[float] = None) -> int:
+        """Index of the current phase in the schedule."""
+        return max(0, bisect_right(self.phase_starts, self.position(now)) - 1)
+
+    def current_phase(self, now: Optional[float] = None) -> str:
+        return self.phase_payloads[self.phase_index(now)]
+
+    def seconds_to_next_phase(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the next phase begins, or None during the last phase."""
+        index = self.phase_index(now) + 1
+        if index >= len(self.phase_starts):
+            return None
+        return self.phase_starts[index] - self.position(now)
+
+    def next_phase(self, now: Optional[float] = None) -> bool:
+        """
+        Jump the schedule to the start of the next phase.
+
+        Returns:
+            False if already in the last phase
+        """
+        remaining = self.seconds_to_next_phase(now)
+        if remaining is None:
+            return False
+        self.skipped_seconds += remaining
+        self.events.append(('skip', time.time() if now is None else now))
+        return True
@@ -0,0 +1,248 @@
+"""
+Session activity and memory footprint tracking.
+Estimates the deep size of what a session keeps in st.session_state, per
+key, and keeps the latest measurement per session, so the process can report
+active sessions and the bytes they hold. Measuring walks every object, so each
+session is re-measured at most once per SIZE_SAMPLE_SECONDS.
+
+Sessions over their budget have cold data (old saved sessions, old camera
+analyses) moved into compressed in-memory form by the offloaders registered
+for those keys; the data is thawed again when it is next needed.
+"""
+
+import os
+import pickle
+import sys
+import threading
+import time
+import types
+import zlib
+from collections import deque
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+import numpy as np
+import pandas as pd
+from metrics import registry
+from session_archive import archive_sessions
+
+# Sessions seen within this many seconds count as active
+ACTIVE_SESSION_SECONDS = 300
+# Minimum seconds between size measurements of one session
+SIZE_SAMPLE_SECONDS = 30
+# Sessions idle this long are forgotten
+FORGET_SESSION_SECONDS = 3600
+
+MB = 1024 * 1024
+# Whole-session budget; over it every offloadable key is offloaded
+SESSION_BUDGET_BYTES = int(float(os.getenv('SESSION_BUDGET_MB', '16')) * MB)
+# Budgets for individual keys that grow without bound
+KEY_BUDGETS = {
+    'all_sessions': 8 * MB,
+    'camera_analysis': 2 * MB
+}
+COLD_COMPRESSION_LEVEL = 6
+
+# Shared, process-wide objects reachable from session state are not charged to it
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType, type(threading.Lock()), threading.Thread)
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Approximate bytes held by obj and everything it references.
+
+    Each object is counted once, so data shared between keys is not double
+    counted. Arrays and DataFrames report their buffer sizes.
+
+    Args:
+        obj: Object to measure
+        seen: Ids already counted, shared across calls to charge shared data once
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIPPED_TYPES):
+            continue
+        seen.add(id(item))
+
+        if isinstance(item, np.ndarray):
+            total += sys.getsizeof(item) + (item.nbytes if item.base is None else 0)
+            continue
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            usage = item.memory_usage(deep=True)
+            total += int(usage.sum() if isinstance(usage, pd.Series) else usage)
+            continue
+
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        else:
+            attributes = getattr(item, '__dict__', None)
+            if attributes is not None:
+                stack.append(attributes)
+            slots = getattr(type(item), '__slots__', ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+def key_sizes(state: Mapping) -> Dict[str, int]:
+    """
+    Deep size of each key of a session's state.
+
+    Data reachable from several keys (e.g. messages shared by chat_history and
+    an all_sessions snapshot) is charged to the first key that reaches it.
+    """
+    seen = set()
+    return {str(key): deep_sizeof(value, seen) for key, value in state.items()}
+
+class ColdData:
+    """A value kept zlib-compressed in memory until it is needed again."""
+
+    __slots__ = ('blob',)
+
+    def __init__(self, value: Any):
+        self.blob = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), COLD_COMPRESSION_LEVEL)
+
+    def thaw(self) -> Any:
+        return pickle.loads(zlib.decompress(self.blob))
+
+# session_state key -> offloader called with the key's value when over budget
+_OFFLOADERS: Dict[str, Callable[[Any], int]] = {'all_sessions': archive_sessions}
+
+def register_offloader(key: str, offload: Callable[[Any], int]):
+    """
+    Register how to shrink a session_state key that is over budget.
+
+    Args:
+        key: session_state key
+        offload: Called with the key's value; compresses or drops cold data in
+            place and returns how many items it offloaded
+    """
+    _OFFLOADERS[key] = offload
+
+def enforce_budget(state: Mapping, sizes: Dict[str, int]) -> Dict[str, int]:
+    """
+    Offload keys over their budget, or every offloadable key if the session is
+    over SESSION_BUDGET_BYTES.
+
+    Returns:
+        Sizes, re-measured if anything was offloaded
+    """
+    over_session = sum(sizes.values()) > SESSION_BUDGET_BYTES
+    offloaded = 0
+    for key, offload in _OFFLOADERS.items():
+        if key not in state:
+            continue
+        if over_session or sizes.get(key, 0) > KEY_BUDGETS.get(key, SESSION_BUDGET_BYTES):
+            try:
+                count = offload(state[key])
+            except Exception as e:
+                print(f"Error offloading session state key {key}: {e}")
+                continue
+            if count:
+                OFFLOADED_ITEMS.inc(count, key=key)
+                offloaded += count
+    return key_sizes(state) if offloaded else sizes
+
+class SessionActivity:
+    def __init__(self):
+        # session id -> [last seen, bytes, measured at, bytes per key]
+        self._sessions: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str, state: Mapping) -> Optional[int]:
+        """
+        Record a script run of a session, measuring its state and enforcing
+        its budget if due.
+
+        Args:
+            session_id: Streamlit session id
+            state: The session's state, e.g. st.session_state.to_dict()
+
+        Returns:
+            Bytes measured on this call, or None if not due
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [now, 0, None, {}])
+            entry[0] = now
+            due = entry[2] is None or now - entry[2] >= SIZE_SAMPLE_SECONDS
+            if due:
+                entry[2] = now
+            self._forget_idle(now)
+        if not due:
+            return None
+
+        sizes = enforce_budget(state, key_sizes(state))
+        size = sum(sizes.values())
+        SESSION_STATE_SIZE.observe(size / 1e6)
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id][1] = size
+                self._sessions[session_id][3] = sizes
+        for key, total in self._key_totals().items():
+            SESSION_KEY_BYTES.set(total, key=key)
+        return size
+
+    def _forget_idle(self, now: float):
+        for session_id in [key for key, entry in self._sessions.items() if now - entry[0] > FORGET_SESSION_SECONDS]:
+            del self._sessions[session_id]
+
+    def active_count(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for entry in self._active(now))
+
+    def total_bytes(self) -> int:
+        """Latest measured state size summed over active sessions."""
+        now = time.monotonic()
+        with self._lock:
+            return sum(entry[1] for entry in self._active(now))
+
+    def _active(self, now: float) -> List[list]:
+        return [entry for entry in self._sessions.values() if now - entry[0] <= ACTIVE_SESSION_SECONDS]
+
+    def _key_totals(self) -> Dict[str, int]:
+        totals = {}
+        with self._lock:
+            for entry in self._active(time.monotonic()):
+                for key, size in entry[3].items():
+                    totals[key] = totals.get(key, 0) + size
+        return totals
+
+    def report(self) -> Dict:
+        """Latest footprint of each active session, largest first, with its biggest keys, and the total."""
+        now = time.monotonic()
+        with self._lock:
+            sessions = [
+                {
+                    'session_id': session_id,
+                    'bytes': entry[1],
+                    'keys': dict(sorted(entry[3].items(), key=lambda item: item[1], reverse=True)[:10])
+                }
+                for session_id, entry in self._sessions.items() if now - entry[0] <= ACTIVE_SESSION_SECONDS
+            ]
+        sessions.sort(key=lambda session: session['bytes'], reverse=True)
+        return {'sessions': sessions, 'total_bytes': sum(session['bytes'] for session in sessions)}
+
+_session_activity = SessionActivity()
+
+def get_session_activity() -> SessionActivity:
+    return _session_activity
+
+registry.gauge('active_sessions', 'Sessions with a script run in the last 5 minutes',
+               fn=_session_activity.active_count)
+registry.gauge('session_state_bytes', 'Approximate bytes held in session_state across active sessions',
+               fn=_session_activity.total_bytes)
+SESSION_STATE_SIZE = registry.histogram('session_state_size_megabytes', 'Measured per-session state size',
+                                        buckets=(0.1, 0.5, 1, 2, 5, 10, 25, 50, 100))
+SESSION_KEY_BYTES = registry.gauge('session_state_key_bytes', 'Approximate bytes per session_state key across active sessions',
+                                   ('key',))
+OFFLOADED_ITEMS = registry.counter('session_state_offloaded_total', 'Items moved to compressed cold storage', ('key',))
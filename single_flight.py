@@ -0,0 +1,149 @@
+"""
+Single-flight de-duplication of expensive upstream calls.
+Identical requests (same key) that arrive while one is in flight wait for
+and share its result instead of calling the model again, and a result that
+completed within the replay window is handed back to reruns and
+double-submits directly.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from metrics import registry
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of request parts; bytes are hashed raw, everything else as JSON."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(b'b')
+            digest.update(bytes(part))
+        else:
+            digest.update(b'j')
+            digest.update(json.dumps(part, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def session_id() -> str:
+    """Id of the Streamlit session running this thread, or 'no-session' outside one."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return 'no-session'
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self, replay_window: float = 30.0, max_replays: int = 1024):
+        """
+        Initialize the coordinator.
+
+        Args:
+            replay_window: Seconds a completed result is reused for identical requests
+            max_replays: Completed results kept at most
+        """
+        self.replay_window = replay_window
+        self.max_replays = max_replays
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._recent: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+        self.replayed = 0
+
+    def _prune(self, now: float):
+        # Completion order: the oldest results are always at the front
+        while self._recent:
+            key, (finished_at, _) = next(iter(self._recent.items()))
+            if now - finished_at <= self.replay_window and len(self._recent) <= self.max_replays:
+                break
+            self._recent.popitem(last=False)
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+        """
+        Run fn once per key at a time.
+
+        Args:
+            key: Request identity, e.g. (session id, fingerprint)
+            fn: Upstream call
+            cacheable: Decides whether a result may be replayed; e.g. to skip
+                fallback responses. Exceptions are never replayed.
+
+        Returns:
+            (result, how) where how is 'called', 'shared' (joined an in-flight
+            call) or 'replayed' (completed within the replay window)
+        """
+        with self._lock:
+            self._prune(time.monotonic())
+            recent = self._recent.get(key)
+            if recent is not None:
+                self.replayed += 1
+                return recent[1], 'replayed'
+
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, 'shared'
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.error is None and (cacheable is None or cacheable(call.result)):
+                    self._recent[key] = (time.monotonic(), call.result)
+                    self._recent.move_to_end(key)
+            call.done.set()
+
+        return call.result, 'called'
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'replayed': self.replayed,
+                'duplicates_avoided': self.shared + self.replayed,
+                'in_flight': len(self._in_flight),
+                'replayable': len(self._recent)
+            }
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide coordinator; keys include the session id, so sessions never share results."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
+
+registry.register_stats('single_flight', lambda: get_single_flight().stats(),
+                        counters=('calls', 'shared', 'replayed'), gauges=('in_flight', 'replayable'))
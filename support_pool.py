@@ -0,0 +1,130 @@
+"""
+Pre-generated message pool.
+Keeps a small queue of ready-made messages per key (e.g. language and mood
+band) and refills it on a background thread, so serving a message is a
+constant-time pop and model latency stays off the request path. Entries
+expire after a TTL so users keep seeing fresh text.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+class MessagePool:
+    def __init__(self, generate: Callable[[Hashable, int], Optional[str]], target_size: int = 4,
+                 refill_below: int = 2, ttl_seconds: float = 1800.0, max_workers: int = 1):
+        """
+        Initialize an empty pool.
+
+        Args:
+            generate: Called off the request path with (key, variation) and
+                returns one message, or None if generation failed
+            target_size: Messages kept ready per key
+            refill_below: Start a background refill when fewer remain
+            ttl_seconds: Age after which a pooled message is discarded
+            max_workers: Background generation threads
+        """
+        self._generate = generate
+        self.target_size = target_size
+        self.refill_below = refill_below
+        self.ttl_seconds = ttl_seconds
+        self._queues: Dict[Hashable, deque] = {}
+        self._refilling = set()
+        self._variations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='message-pool')
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.generated = 0
+        self.failures = 0
+
+    def _drop_expired(self, queue: deque, now: float):
+        # Queues are in creation order, so expired entries are always at the front
+        while queue and now - queue[0][0] > self.ttl_seconds:
+            queue.popleft()
+            self.expired += 1
+
+    def take(self, key: Hashable) -> Optional[str]:
+        """
+        Pop a ready message without waiting on generation.
+
+        Args:
+            key: Pool key
+
+        Returns:
+            A pooled message, or None if none is ready (a refill is scheduled)
+        """
+        now = time.monotonic()
+        with self._lock:
+            queue = self._queues.setdefault(key, deque())
+            self._drop_expired(queue, now)
+            message = queue.popleft()[1] if queue else None
+            if message is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            needs_refill = len(queue) < self.refill_below
+        if needs_refill:
+            self._schedule_refill(key)
+        return message
+
+    def warm(self, keys: Iterable[Hashable]):
+        """Start background refills for keys, e.g. at startup."""
+        for key in keys:
+            self._schedule_refill(key)
+
+    def _schedule_refill(self, key: Hashable):
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        try:
+            self._executor.submit(self._refill, key)
+        except RuntimeError:
+            # Executor shut down with the process; serve fallbacks from now on
+            with self._lock:
+                self._refilling.discard(key)
+
+    def _refill(self, key: Hashable):
+        try:
+            while True:
+                with self._lock:
+                    queue = self._queues.setdefault(key, deque())
+                    self._drop_expired(queue, time.monotonic())
+                    if len(queue) >= self.target_size:
+                        return
+                    variation = self._variations.get(key, 0)
+                    self._variations[key] = variation + 1
+
+                try:
+                    message = self._generate(key, variation)
+                except Exception as e:
+                    print(f"Error pre-generating message for {key}: {e}")
+                    message = None
+
+                with self._lock:
+                    if not message:
+                        # Give up until the next take(); avoids hammering a failing backend
+                        self.failures += 1
+                        return
+                    if all(text != message for _, text in queue):
+                        queue.append((time.monotonic(), message))
+                        self.generated += 1
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'ready': {key: len(queue) for key, queue in self._queues.items()},
+                'refilling': len(self._refilling),
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'generated': self.generated,
+                'failures': self.failures
+            }
@@ -0,0 +1,94 @@
+import threading
+import time
+import pytest
+from admission import AdmissionController, TokenBucket
+
+def test_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2.0, capacity=4)
+    start = bucket.updated_at
+
+    assert all(bucket.try_take(1, start) for _ in range(4))
+    assert not bucket.try_take(1, start)
+    assert bucket.time_until(1, start) == pytest.approx(0.5)
+    assert not bucket.try_take(1, start + 0.4)
+    assert bucket.try_take(1, start + 0.5)
+    # Never refills past capacity
+    bucket._refill(start + 100)
+    assert bucket.tokens == 4
+
+def test_user_over_budget_is_rejected_until_refilled():
+    controller = AdmissionController(user_rate=20.0, user_burst=1, global_rate=100.0, global_burst=100)
+
+    assert controller.request('user').admitted
+    ticket = controller.request('user')
+    assert ticket.status == 'rejected'
+    assert ticket.reason == 'user_limit'
+    assert 0 < ticket.eta <= 0.05
+    # Other users have their own budget
+    assert controller.request('other').admitted
+
+    time.sleep(0.06)
+    assert controller.request('user').admitted
+    assert controller.stats()['rejected_user_limit'] == 1
+
+def test_fair_queue_orders_by_weight():
+    controller = AdmissionController(user_rate=100.0, user_burst=10, global_rate=20.0, global_burst=1)
+    controller.set_weight('heavy', 3.0)
+    assert controller.request('drain').admitted
+
+    tickets = [(user_id, controller.request(user_id)) for user_id in ('heavy', 'light', 'heavy', 'light', 'heavy')]
+    assert all(ticket.status == 'queued' for _, ticket in tickets)
+
+    order = []
+    lock = threading.Lock()
+
+    def wait(user_id, ticket):
+        assert ticket.wait(5)
+        with lock:
+            order.append(user_id)
+
+    threads = [threading.Thread(target=wait, args=pair) for pair in tickets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # Virtual finish tags: heavy 1/3, 2/3, 1 and light 1, 2; ties go to the earlier request
+    assert order == ['heavy', 'heavy', 'light', 'heavy', 'light']
+    assert controller.stats()['queue_depth'] == 0
+
+def test_queue_rejects_waits_over_max_wait():
+    controller = AdmissionController(user_rate=100.0, user_burst=10, global_rate=1.0, global_burst=1, max_wait=2.5)
+    assert controller.request('a').admitted
+    assert controller.request('b').status == 'queued'
+    assert controller.request('c').status == 'queued'
+
+    ticket = controller.request('d')
+    assert ticket.status == 'rejected'
+    assert ticket.reason == 'global_limit'
+    assert ticket.eta > 2.5
+
+def test_idle_users_are_evicted():
+    controller = AdmissionController(user_rate=50.0, user_burst=2, global_rate=1000.0, global_burst=100)
+    for i in range(20):
+        assert controller.request(f'user-{i}').admitted
+    assert controller.stats()['tracked_users'] == 20
+
+    time.sleep(0.05)
+    assert controller.stats()['tracked_users'] == 0
+
+def test_users_with_queued_requests_are_kept():
+    controller = AdmissionController(user_rate=100.0, user_burst=1, global_rate=10.0, global_burst=1)
+    assert controller.request('drain').admitted
+    ticket = controller.request('waiting')
+    assert ticket.status == 'queued'
+
+    # Both buckets are full again, but only the drained user has nothing queued
+    time.sleep(0.02)
+    controller.stats()
+    assert 'waiting' in controller._users
+    assert 'drain' not in controller._users
+
+    assert ticket.wait(2)
+    time.sleep(0.02)
+    assert controller.stats()['tracked_users'] == 0
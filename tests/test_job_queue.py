@@ -0,0 +1,58 @@
+import threading
+import pytest
+from job_queue import JobQueue, JobQueueFull, current_job
+
+def test_submit_raises_when_queue_is_full():
+    queue = JobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+    jobs = [queue.submit('export', lambda: release.wait(5)) for _ in range(2)]
+
+    with pytest.raises(JobQueueFull):
+        queue.submit('export', lambda: None)
+    assert queue.stats()['rejected'] == 1
+
+    release.set()
+    assert all(job.wait(5) for job in jobs)
+    # Room again once the pending jobs have finished
+    job = queue.submit('export', lambda: 'ok')
+    assert job.wait(5)
+    assert job.result == 'ok'
+
+def test_failed_job_reports_error_state():
+    queue = JobQueue(max_workers=1)
+
+    def export():
+        raise ValueError("disk full")
+
+    job = queue.submit('export', export)
+    assert job.wait(5)
+
+    assert job.done
+    assert job.status == 'failed'
+    assert isinstance(job.error, ValueError)
+    assert job.result is None
+    assert 'in export' in job.traceback
+    stats = queue.stats()
+    assert stats['failed'] == 1
+    assert stats['completed'] == 0
+    assert stats['running'] == 0 and stats['depth'] == 0
+
+def test_job_runs_off_the_submitting_thread():
+    queue = JobQueue(max_workers=1)
+    seen = {}
+
+    def work():
+        seen['job'] = current_job()
+        seen['thread'] = threading.current_thread().name
+        return 42
+
+    job = queue.submit('chat', work, meta={'session_id': 'abc'})
+    assert job.wait(5)
+
+    assert job.status == 'done'
+    assert job.result == 42
+    assert job.meta == {'session_id': 'abc'}
+    assert seen['job'] is job
+    assert seen['thread'].startswith('job-worker')
+    assert current_job() is None
+    assert job.wait_seconds >= 0 and job.service_seconds >= 0
@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+import single_flight
+from single_flight import SingleFlight
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def wait_until(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+def test_follower_gets_leader_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    follower_calls = []
+    outcomes = {}
+
+    def leader_fn():
+        release.wait(2)
+        raise ValueError("upstream failed")
+
+    def run(name, fn):
+        try:
+            outcomes[name] = flight.do('key', fn)
+        except ValueError as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=run, args=('leader', leader_fn))
+    leader.start()
+    wait_until(lambda: flight.stats()['in_flight'] == 1)
+    follower = threading.Thread(target=run, args=('follower', lambda: follower_calls.append(1)))
+    follower.start()
+    wait_until(lambda: flight.stats()['shared'] == 1)
+    release.set()
+    leader.join(2)
+    follower.join(2)
+
+    assert isinstance(outcomes['leader'], ValueError)
+    assert outcomes['follower'] is outcomes['leader']
+    assert follower_calls == []
+    # Exceptions are never replayed
+    assert flight.do('key', lambda: 'ok') == ('ok', 'called')
+
+def test_fallback_results_are_not_replayed():
+    flight = SingleFlight()
+    real_reply = lambda result: result != 'fallback'
+
+    assert flight.do('key', lambda: 'fallback', cacheable=real_reply) == ('fallback', 'called')
+    assert flight.do('key', lambda: 'reply', cacheable=real_reply) == ('reply', 'called')
+    assert flight.do('key', lambda: 'other', cacheable=real_reply) == ('reply', 'replayed')
+
+def test_replay_window_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(single_flight.time, 'monotonic', clock)
+    flight = SingleFlight(replay_window=30.0)
+
+    assert flight.do('key', lambda: 1) == (1, 'called')
+    clock.now += 29.0
+    assert flight.do('key', lambda: 2) == (1, 'replayed')
+    clock.now += 2.0
+    assert flight.do('key', lambda: 3) == (3, 'called')
+    assert flight.stats()['replayable'] == 1
+
+def test_keys_do_not_share_results():
+    flight = SingleFlight()
+    assert flight.do(('session-a', 'hi'), lambda: 'a') == ('a', 'called')
+    assert flight.do(('session-b', 'hi'), lambda: 'b') == ('b', 'called')
+
+def test_failed_call_is_not_left_in_flight():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.stats()['in_flight'] == 0
@@ -1,5 +1,6 @@
 import os
 import json
+import threading
 import streamlit as st
 from datetime import datetime
 try:
@@ -8,15 +9,124 @@ try:
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 from translations import get_text
+from support_pool import MessagePool
+from single_flight import fingerprint, get_single_flight, session_id
+from model_router import get_model_router
+from tracing import span, traced
+from metrics import model_call, registry
+from admission import CHAT_REQUEST_COST, AdmissionRejected, admitted_call, get_admission_controller, quota_key
+
+SUPPORT_BANDS = ('low', 'medium', 'high')
+
+# Model used to pre-generate support messages
+SUPPORT_MODEL = "gemini-2.5-flash"
+
+# Admission-control budget shared by background pool refills
+SUPPORT_POOL_QUOTA_KEY = 'support-pool'
+
+# Angles rotated through while pre-generating so pooled messages differ
+SUPPORT_VARIATIONS = {
+    'en': (
+        "Suggest one small, concrete step they can take today.",
+        "Gently remind them of their own strength.",
+        "Offer a calming image or a simple breathing cue.",
+        "Share a hopeful perspective in two or three sentences."
+    ),
+    'hi': (
+        "आज उठाया जा सकने वाला एक छोटा, ठोस कदम सुझाएं।",
+        "उन्हें उनकी अपनी ताकत की धीरे से याद दिलाएं।",
+        "एक शांत करने वाली छवि या सरल सांस का अभ्यास सुझाएं।",
+        "दो-तीन वाक्यों में एक आशापूर्ण दृष्टिकोण साझा करें।"
+    )
+}
+
+_support_pool = None
+_support_client = None
+_support_pool_lock = threading.Lock()
+
+def _get_support_client():
+    global _support_client
+    if _support_client is None:
+        with _support_pool_lock:
+            if _support_client is None:
+                _support_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    return _support_client
+
+def generate_support_message(key: Tuple[str, str], variation: int) -> Optional[str]:
+    """
+    Generate one support message for the pool; runs on a background thread
+    with the pool's own client, so no session's bot is kept alive by it.
+    
+    Args:
+        key: (language, band)
+        variation: Sequence number used to rotate the message's angle
+        
+    Returns:
+        Message text, or None if generation failed
+    """
+    language, band = key
+    
+    if language == 'hi':
+        prompts = {
+            'low': "उपयोगकर्ता बहुत दुखी है। उन्हें सांत्वना और आशा दें।",
+            'medium': "उपयोगकर्ता थोड़ा परेशान है। उन्हें प्रेरणा और सकारात्मकता दें।",
+            'high': "उपयोगकर्ता अच्छी स्थिति में है। उनकी खुशी को बनाए रखने में मदद करें।"
+        }
+        system_prompt = f"आप एक दयालु मानसिक स्वास्थ्य परामर्शदाता हैं। हिंदी में जवाब दें। {prompts[band]}"
+    else:
+        prompts = {
+            'low': "The user is feeling very sad. Provide comfort and hope.",
+            'medium': "The user is feeling somewhat troubled. Provide encouragement and positivity.",
+            'high': "The user is in a good state. Help maintain their happiness."
+        }
+        system_prompt = f"You are a compassionate mental health counselor. Respond in English. {prompts[band]}"
+    
+    variations = SUPPORT_VARIATIONS[language]
+    system_prompt += f" {variations[variation % len(variations)]}"
+    
+    # Pre-generation draws on the shared quota too, under its own budget
+    if not get_admission_controller().request(SUPPORT_POOL_QUOTA_KEY).wait():
+        return None
+    
+    with model_call('support'):
+        response = _get_support_client().models.generate_content(
+            model=SUPPORT_MODEL,
+            contents=system_prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.9,
+                max_output_tokens=300
+            )
+        )
+    
+    return response.text or None
+
+def get_support_pool() -> MessagePool:
+    """
+    Get the process-wide pool of emotional support messages.
+
+    The prompts only depend on (language, band), so one pool serves every
+    session. Nothing is generated up front: a key's first take() misses and
+    schedules its refill.
+    """
+    global _support_pool
+    if _support_pool is None:
+        with _support_pool_lock:
+            if _support_pool is None:
+                _support_pool = MessagePool(generate_support_message)
+    return _support_pool
+
+registry.register_stats('support_pool', lambda: _support_pool.stats() if _support_pool else {},
+                        counters=('hits', 'misses', 'expired', 'generated', 'failures'), gauges=('refilling',))
 
 class TherapyBot:
     def __init__(self):
         """Initialize the therapy bot with Gemini API."""
         if GEMINI_AVAILABLE:
             self.client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-            self.model = "gemini-2.5-flash"
+            # Background generation model; chat replies are routed per request
+            self.model = SUPPORT_MODEL
         else:
             self.client = None
             self.model = None
@@ -32,6 +142,8 @@ class TherapyBot:
                 'user_name': None,
                 'session_start_time': None
             }
+        
+        self.support_pool = get_support_pool() if self.client else None
     
     def get_response(self, user_input: str, language: str, emotion_level: int, context_history: List[Dict] = None) -> str:
         """
@@ -46,83 +158,147 @@ class TherapyBot:
         Returns:
             Therapy bot response in the requested language
         """
-        try:
-            # Build context from history
-            context = ""
-            if context_history and len(context_history) > 0:
-                context = "Previous conversation context:\n"
-                for msg in context_history[-3:]:  # Last 3 messages for context
-                    role = "User" if msg["role"] == "user" else "Assistant"
-                    context += f"{role}: {msg['content']}\n"
-                context += "\n"
+        return self.prepare_response(user_input, language, emotion_level, context_history)()
+    
+    def prepare_response(self, user_input: str, language: str, emotion_level: int,
+                         context_history: List[Dict] = None) -> Callable[[], str]:
+        """
+        Capture a response request for running later, e.g. as a background job.
+        
+        Must be called on the script thread: the session and quota owner are
+        read here. Identical requests from the same session share one model
+        call while it is in flight and reuse its result for a short replay
+        window, so reruns and double-submits do not call the model twice.
+        Model calls go through admission control; a user over their rate
+        budget gets an offline reply with a retry hint instead.
+        
+        Args:
+            user_input: User's message
+            language: 'en' for English, 'hi' for Hindi
+            emotion_level: Current emotion level (1-10)
+            context_history: Previous conversation messages for context
             
-            # Create system prompt based on language and emotion
-            if language == 'hi':
-                system_prompt = f"""
-                आप एक मित्र की तरह हैं जो मानसिक स्वास्थ्य के बारे में जानता है। बिल्कुल सामान्य बातचीत की तरह बात करें, औपचारिक थेरेपिस्ट की तरह नहीं।
-                
-                उपयोगकर्ता का मूड: {emotion_level}/10 (1=बहुत परेशान, 10=बहुत अच्छा)
-                
-                बातचीत के लिए:
-                - एक समझदार दोस्त की तरह प्राकृतिक रूप से बात करें
-                - आसान, रोज़ाना की भाषा का उपयोग करें - कोई औपचारिक शब्दावली नहीं
-                - उनकी भावनाओं को समझने के लिए सवाल पूछें
-                - जब मूड कम हो तो बातचीत में ही प्राकृतिक रूप से किताब, गाना या मज़ाक सुझाएं
-                - सलाह को बातचीत में प्राकृतिक रूप से शामिल करें जैसे दोस्त करते हैं
-                - गर्मजोशी से, सच्चे और समझने योग्य हों
-                - तकनीकें सुझाते समय दोस्ताना सलाह की तरह कहें:
-                  * "कुछ धीमी, गहरी सांसें लेने की कोशिश करो - जब मैं परेशान होता हूं तो यह बहुत मदद करता है"
-                  * "कभी-कभी जब मैं चिंतित होता हूं, तो मैं आसपास देखता हूं और 5 चीजें गिनता हूं जो देख सकता हूं..."
-                  * "क्या तुमने थोड़ी देर टहलने की कोशिश की है? ताज़ी हवा मूड के लिए कमाल होती है"
-                  * "कुछ अच्छी किताब पढ़ने से मूड बेहतर होता है - कोई सुझाव चाहिए?"
-                  * "कुछ अच्छा गाना सुनकर देखो - संगीत में जादू होता है"
-                  * "हंसना सबसे अच्छी दवा है - कुछ मज़ेदार सुनाऊं?"
-                
-                {context}
-                """
-            else:
-                system_prompt = f"""
-                You are a warm, empathetic mental health companion who talks like a caring friend. Your goal is to provide genuine emotional support through natural conversation.
-                
-                User's current mood: {emotion_level}/10 (1=feeling really down, 10=feeling great)
-                
-                Conversation approach:
-                - Talk like a supportive friend who understands mental health
-                - Use everyday language - avoid clinical or formal terminology
-                - Show genuine interest in their feelings and experiences
-                - Ask thoughtful follow-up questions to help them process emotions
-                - Validate their feelings before offering suggestions
-                - Share relatable experiences when appropriate
-                - When mood is low, naturally weave in book recommendations, song suggestions, or jokes during conversation
-                - Offer practical coping strategies as friendly suggestions like a caring friend would
-                
-                Helpful techniques to suggest naturally:
-                - Breathing exercises: "I find taking slow, deep breaths really helps when I'm overwhelmed"
-                - Grounding techniques: "When my mind is racing, I try the 5-4-3-2-1 technique - name 5 things you see, 4 you hear..."
-                - Movement: "Sometimes a quick walk or even just stretching can shift my whole mood"
-                - Self-compassion: "Be kind to yourself - you'd comfort a friend going through this, right?"
-                - Book recommendations: "Have you tried reading something uplifting? I love recommending books that help"
-                - Music therapy: "Music can be incredibly healing - maybe try listening to something soothing"
-                - Humor therapy: "Sometimes a good laugh is exactly what we need. Want to hear something funny?"
-                - Mindfulness: "Focusing on the present moment for just a few minutes can be surprisingly calming"
-                
-                Remember:
-                - Respond with empathy first, advice second
-                - Keep responses conversational (2-4 sentences usually)
-                - Ask one thoughtful question to keep the conversation flowing
-                - If they seem in crisis, gently suggest professional help
-                - Keep responses conversational and supportive, not clinical or overly formal
-                
-                {context}
-                """
+        Returns:
+            Zero-argument callable returning the response; it never raises
+        """
+        # Fingerprint exactly what reaches the prompt
+        context_history = list(context_history or [])
+        context = [(msg.get('role'), msg.get('content')) for msg in context_history[-3:]]
+        key = (session_id(), fingerprint('chat', user_input, language, emotion_level, context))
+        fallback = self._get_fallback_response(language)
+        
+        quota_owner = quota_key()
+        generate = lambda: self._generate_response(user_input, language, emotion_level, context_history, quota_owner)
+        if self.client and GEMINI_AVAILABLE:
+            generate = admitted_call(generate, CHAT_REQUEST_COST, quota_owner)
+        
+        def respond() -> str:
+            try:
+                response, _ = get_single_flight().do(key, generate, cacheable=lambda text: text != fallback)
+            except AdmissionRejected as e:
+                return self._get_rate_limited_response(language, e.eta)
+            return response
+        
+        return respond
+    
+    @traced('chat.prompt_build', lambda self, user_input, language, emotion_level, context_history=None: {
+        'language': language, 'payload.chars': len(user_input), 'context.messages': len(context_history or [])
+    }, lambda prompt: {'prompt.chars': len(prompt)})
+    def _build_prompt(self, user_input: str, language: str, emotion_level: int, context_history: List[Dict] = None) -> str:
+        """Build the chat prompt from the persona, mood and the last few messages."""
+        # Build context from history
+        context = ""
+        if context_history and len(context_history) > 0:
+            context = "Previous conversation context:\n"
+            for msg in context_history[-3:]:  # Last 3 messages for context
+                role = "User" if msg["role"] == "user" else "Assistant"
+                context += f"{role}: {msg['content']}\n"
+            context += "\n"
+        
+        # Create system prompt based on language and emotion
+        if language == 'hi':
+            system_prompt = f"""
+            आप एक मित्र की तरह हैं जो मानसिक स्वास्थ्य के बारे में जानता है। बिल्कुल सामान्य बातचीत की तरह बात करें, औपचारिक थेरेपिस्ट की तरह नहीं।
+            
+            उपयोगकर्ता का मूड: {emotion_level}/10 (1=बहुत परेशान, 10=बहुत अच्छा)
+            
+            बातचीत के लिए:
+            - एक समझदार दोस्त की तरह प्राकृतिक रूप से बात करें
+            - आसान, रोज़ाना की भाषा का उपयोग करें - कोई औपचारिक शब्दावली नहीं
+            - उनकी भावनाओं को समझने के लिए सवाल पूछें
+            - जब मूड कम हो तो बातचीत में ही प्राकृतिक रूप से किताब, गाना या मज़ाक सुझाएं
+            - सलाह को बातचीत में प्राकृतिक रूप से शामिल करें जैसे दोस्त करते हैं
+            - गर्मजोशी से, सच्चे और समझने योग्य हों
+            - तकनीकें सुझाते समय दोस्ताना सलाह की तरह कहें:
+              * "कुछ धीमी, गहरी सांसें लेने की कोशिश करो - जब मैं परेशान होता हूं तो यह बहुत मदद करता है"
+              * "कभी-कभी जब मैं चिंतित होता हूं, तो मैं आसपास देखता हूं और 5 चीजें गिनता हूं जो देख सकता हूं..."
+              * "क्या तुमने थोड़ी देर टहलने की कोशिश की है? ताज़ी हवा मूड के लिए कमाल होती है"
+              * "कुछ अच्छी किताब पढ़ने से मूड बेहतर होता है - कोई सुझाव चाहिए?"
+              * "कुछ अच्छा गाना सुनकर देखो - संगीत में जादू होता है"
+              * "हंसना सबसे अच्छी दवा है - कुछ मज़ेदार सुनाऊं?"
+            
+            {context}
+            """
+        else:
+            system_prompt = f"""
+            You are a warm, empathetic mental health companion who talks like a caring friend. Your goal is to provide genuine emotional support through natural conversation.
+            
+            User's current mood: {emotion_level}/10 (1=feeling really down, 10=feeling great)
+            
+            Conversation approach:
+            - Talk like a supportive friend who understands mental health
+            - Use everyday language - avoid clinical or formal terminology
+            - Show genuine interest in their feelings and experiences
+            - Ask thoughtful follow-up questions to help them process emotions
+            - Validate their feelings before offering suggestions
+            - Share relatable experiences when appropriate
+            - When mood is low, naturally weave in book recommendations, song suggestions, or jokes during conversation
+            - Offer practical coping strategies as friendly suggestions like a caring friend would
+            
+            Helpful techniques to suggest naturally:
+            - Breathing exercises: "I find taking slow, deep breaths really helps when I'm overwhelmed"
+            - Grounding techniques: "When my mind is racing, I try the 5-4-3-2-1 technique - name 5 things you see, 4 you hear..."
+            - Movement: "Sometimes a quick walk or even just stretching can shift my whole mood"
+            - Self-compassion: "Be kind to yourself - you'd comfort a friend going through this, right?"
+            - Book recommendations: "Have you tried reading something uplifting? I love recommending books that help"
+            - Music therapy: "Music can be incredibly healing - maybe try listening to something soothing"
+            - Humor therapy: "Sometimes a good laugh is exactly what we need. Want to hear something funny?"
+            - Mindfulness: "Focusing on the present moment for just a few minutes can be surprisingly calming"
+            
+            Remember:
+            - Respond with empathy first, advice second
+            - Keep responses conversational (2-4 sentences usually)
+            - Ask one thoughtful question to keep the conversation flowing
+            - If they seem in crisis, gently suggest professional help
+            - Keep responses conversational and supportive, not clinical or overly formal
+            
+            {context}
+            """
+        
+        return f"{system_prompt}\n\nUser: {user_input}"
+    
+    def _generate_response(self, user_input: str, language: str, emotion_level: int,
+                           context_history: List[Dict] = None, quota_owner: Optional[str] = None) -> str:
+        """Call the model for get_response, routed and hedged by the model router."""
+        try:
+            contents = self._build_prompt(user_input, language, emotion_level, context_history)
             
             # Generate response using simpler API format
             if self.client and GEMINI_AVAILABLE:
                 try:
-                    response = self.client.models.generate_content(
-                        model=self.model,
-                        contents=f"{system_prompt}\n\nUser: {user_input}"
-                    )
+                    # A hedged duplicate is only sent if the quota allows it right away
+                    admit_hedge = None
+                    if quota_owner:
+                        admit_hedge = lambda: get_admission_controller().try_acquire(quota_owner, CHAT_REQUEST_COST)
+                    with span('model.generate', {'language': language, 'emotion.level': emotion_level, 'prompt.chars': len(contents)}) as call, \
+                            model_call('chat'):
+                        response = get_model_router().generate(
+                            lambda model: self.client.aio.models.generate_content(model=model, contents=contents),
+                            message_length=len(user_input),
+                            emotion_level=emotion_level,
+                            admit_hedge=admit_hedge
+                        )
+                        call.set_attribute('response.chars', len(response.text or ''))
                     bot_response = response.text if response.text else self._get_fallback_response(language)
                     
                     # Integrate remedies directly into the conversation response
@@ -154,6 +330,16 @@ class TherapyBot:
             but your feelings matter. Take a few deep breaths and remember you're not alone. 
             Would you like to tell me more about what you're experiencing?"""
     
+    def _get_rate_limited_response(self, language: str, retry_seconds: float) -> str:
+        """Offline reply used while the user is over their request budget."""
+        seconds = max(1, round(retry_seconds))
+        if language == 'hi':
+            return f"""मैं यहीं हूं और आपकी बात सुन रहा हूं। अभी बहुत सारे संदेश एक साथ आ गए हैं, 
+            इसलिए लगभग {seconds} सेकंड में मैं पूरी तरह जवाब दे पाऊंगा। तब तक एक धीमी, गहरी सांस लें।"""
+        else:
+            return f"""I'm still here and listening. A lot of messages came in at once, 
+            so I'll be able to reply fully in about {seconds} seconds. Meanwhile, try one slow, deep breath."""
+    
     def _get_integrated_remedies_for_chat(self, emotion_level: int, language: str) -> str:
         """Get personalized remedies integrated naturally into conversation based on emotion level."""
         import random
@@ -231,9 +417,19 @@ Also, try a 10-minute walk outside or treat yourself to something small that mak
         
         return ""  # No remedies needed for higher mood levels
 
+    def _support_band(self, emotion_level: int) -> str:
+        if emotion_level <= 3:
+            return 'low'
+        if emotion_level <= 6:
+            return 'medium'
+        return 'high'
+    
     def get_emotional_support_response(self, emotion_level: int, language: str) -> str:
         """
-        Generate an emotional support message based on current emotion level.
+        Get an emotional support message based on current emotion level.
+        
+        Messages are pre-generated in the background, so this never waits on
+        the model; when none is ready the fallback response is used.
         
         Args:
             emotion_level: Current emotion level (1-10)
@@ -242,37 +438,10 @@ Also, try a 10-minute walk outside or treat yourself to something small that mak
         Returns:
             Supportive message based on emotion level
         """
-        try:
-            if language == 'hi':
-                if emotion_level <= 3:
-                    prompt = "उपयोगकर्ता बहुत दुखी है। उन्हें सांत्वना और आशा दें।"
-                elif emotion_level <= 6:
-                    prompt = "उपयोगकर्ता थोड़ा परेशान है। उन्हें प्रेरणा और सकारात्मकता दें।"
-                else:
-                    prompt = "उपयोगकर्ता अच्छी स्थिति में है। उनकी खुशी को बनाए रखने में मदद करें।"
-                
-                system_prompt = f"आप एक दयालु मानसिक स्वास्थ्य परामर्शदाता हैं। हिंदी में जवाब दें। {prompt}"
-            else:
-                if emotion_level <= 3:
-                    prompt = "The user is feeling very sad. Provide comfort and hope."
-                elif emotion_level <= 6:
-                    prompt = "The user is feeling somewhat troubled. Provide encouragement and positivity."
-                else:
-                    prompt = "The user is in a good state. Help maintain their happiness."
-                
-                system_prompt = f"You are a compassionate mental health counselor. Respond in English. {prompt}"
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=system_prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.8,
-                    max_output_tokens=300
-                )
-            )
-            
-            return response.text if response.text else self._get_fallback_response(language)
-            
-        except Exception as e:
-            print(f"Error getting emotional support response: {e}")
-            return self._get_fallback_response(language)
+        language = 'hi' if language == 'hi' else 'en'
+        message = None
+        if self.support_pool:
+            message = self.support_pool.take((language, self._support_band(emotion_level)))
+        
+        return message or self._get_fallback_response(language)
+    
@@ -0,0 +1,291 @@
+"""
+Lightweight tracing for hot paths.
+Spans nest through a context variable and are exported in batches from a
+background thread, either as JSON lines in a local file or as OTLP/HTTP JSON
+to a collector. Tracing is off unless TRACE_EXPORTER is set; then span()
+returns a shared no-op span and traced() leaves functions undecorated, so
+instrumentation costs next to nothing.
+
+    TRACE_EXPORTER=file   TRACE_FILE=traces/spans.jsonl
+    TRACE_EXPORTER=otlp   OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none').lower()
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join('traces', 'spans.jsonl'))
+OTLP_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318').rstrip('/') + '/v1/traces'
+SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'lumosai')
+
+# Export batching: flush at this many spans or after this many seconds
+BATCH_SIZE = 256
+FLUSH_SECONDS = 2.0
+# Spans dropped rather than buffered beyond this, if the exporter falls behind
+MAX_BUFFERED_SPANS = 10000
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+class _NoopSpan:
+    """Stand-in span used while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Optional[Dict[str, Any]] = None):
+        self._tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.trace_id = None
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = None
+        self.start_ns = None
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        else:
+            self.trace_id = os.urandom(16).hex()
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            if isinstance(exc, Exception):
+                self.error = f"{exc_type.__name__}: {exc}"
+            else:
+                # Control flow such as a Streamlit rerun, not a failure
+                self.attributes['exit'] = exc_type.__name__
+        self._tracer._export(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': (self.end_ns - self.start_ns) / 1e6,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+class BatchExporter:
+    """Buffers finished spans and writes them in batches on a daemon thread."""
+
+    def __init__(self):
+        self._buffer = deque()
+        self._wakeup = threading.Event()
+        self.exported = 0
+        self.dropped = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def add(self, span: Span):
+        if len(self._buffer) >= MAX_BUFFERED_SPANS:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+        if len(self._buffer) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        batch = []
+        while self._buffer and len(batch) < MAX_BUFFERED_SPANS:
+            batch.append(self._buffer.popleft())
+        if not batch:
+            return
+        try:
+            self.write(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.failures += 1
+            print(f"Error exporting {len(batch)} spans: {e}")
+
+    def write(self, spans: List[Span]):
+        raise NotImplementedError
+
+class FileExporter(BatchExporter):
+    """Appends spans as JSON lines."""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__()
+
+    def write(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+                f.write('\n')
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+class OtlpExporter(BatchExporter):
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        super().__init__()
+
+    def write(self, spans: List[Span]):
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+                'scopeSpans': [{
+                    'scope': {'name': SERVICE_NAME},
+                    'spans': [self._encode(span) for span in spans]
+                }]
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload, default=str).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _encode(self, span: Span) -> Dict:
+        encoded = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': _otlp_attributes(span.attributes),
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        return encoded
+
+class Tracer:
+    def __init__(self, exporter: Optional[BatchExporter] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Destination for finished spans; None disables tracing
+        """
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Context manager timing a block; nested spans become its children.
+
+        Args:
+            name: Span name, e.g. 'model.generate'
+            attributes: Initial attributes such as sizes or the language
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _export(self, span: Span):
+        self.exporter.add(span)
+
+def _create_tracer() -> Tracer:
+    try:
+        if TRACE_EXPORTER == 'file':
+            return Tracer(FileExporter())
+        if TRACE_EXPORTER == 'otlp':
+            return Tracer(OtlpExporter())
+    except Exception as e:
+        print(f"Error starting {TRACE_EXPORTER} trace exporter, tracing disabled: {e}")
+    return Tracer()
+
+tracer = _create_tracer()
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Start a span on the process-wide tracer."""
+    return tracer.span(name, attributes)
+
+def current_span():
+    """The innermost active span, or the no-op span."""
+    return _current_span.get() or NOOP_SPAN
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None,
+           result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None):
+    """
+    Decorator running a function inside a span.
+
+    Args:
+        name: Span name
+        attributes: Called with the function's arguments; returns span attributes
+        result_attributes: Called with the return value; returns span attributes
+    """
+    def decorate(fn):
+        if not tracer.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, attributes(*args, **kwargs) if attributes else None) as active:
+                result = fn(*args, **kwargs)
+                if result_attributes:
+                    active.set_attributes(result_attributes(result))
+                return result
+        return wrapper
+    return decorate
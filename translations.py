@@ -58,6 +58,18 @@ TRANSLATIONS = {
         'en': 'Thinking...',
         'hi': 'सोच रहा हूं...'
     },
+    'reply_failed': {
+        'en': 'Sorry, I couldn\'t put a reply together just now. Could you say that again?',
+        'hi': 'माफ़ करें, अभी मैं जवाब नहीं दे पाया। क्या आप फिर से कह सकते हैं?'
+    },
+    'preparing_export': {
+        'en': 'Preparing your export...',
+        'hi': 'आपका डेटा तैयार किया जा रहा है...'
+    },
+    'load_earlier': {
+        'en': '⬆️ Load {count} earlier messages ({total} hidden)',
+        'hi': '⬆️ {count} पुराने संदेश दिखाएं ({total} छिपे हुए)'
+    },
     'emotion': {
         'en': 'Emotion',
         'hi': 'भावना'
@@ -202,6 +214,10 @@ TRANSLATIONS = {
         'en': 'Visual Guide',
         'hi': 'दृश्य गाइड'
     },
+    'audio_guide': {
+        'en': 'Audio Pacing Cue',
+        'hi': 'ऑडियो गति संकेत'
+    },
     'breathing_tips': {
         'en': 'Breathing Tips',
         'hi': 'सांस लेने की युक्तियां'
@@ -394,6 +410,18 @@ TRANSLATIONS = {
         'en': 'Set Reminder',
         'hi': 'रिमाइंडर सेट करें'
     },
+    'remedy_helpful': {
+        'en': '👍 Helpful',
+        'hi': '👍 उपयोगी'
+    },
+    'remedy_not_helpful': {
+        'en': '👎 Not helpful',
+        'hi': '👎 उपयोगी नहीं'
+    },
+    'feedback_thanks': {
+        'en': 'Thanks! Your suggestions will adapt.',
+        'hi': 'धन्यवाद! आपके सुझाव इसके अनुसार बदलेंगे।'
+    },
     'remedy_started': {
         'en': 'Great! Take your time with this remedy.',
         'hi': 'बहुत अच्छा! इस उपचार के साथ अपना समय लें।'